@@ -0,0 +1,340 @@
+"""Local stand-in for api.vk.com serving synthetic, deterministic data.
+
+Serves wall.get (--pinned puts a post on top), wall.getComments (threads,
+thread_items_count, start_comment_id, profiles), users.get,
+groups.getMembers and execute with configurable latency, rate limit and
+internal errors. With --media-every
+posts and comments get photo attachments served from /media/ with Range
+support; --media-variants distinct contents repeat under different URLs.
+
+    python benchmarks/fake_vk_server.py --port 8765 --posts 1000 --latency 0.05 --rate-limit 20
+
+Point VKApi at it with api_url='http://127.0.0.1:8765/method/'.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import random
+import re
+import time
+import zlib
+
+from aiohttp import web
+
+
+DEFAULTS = {
+    'posts': 1000,  # Posts on the wall
+    'comments': 50,  # Top-level comments per post
+    'thread_every': 5,  # Every n-th comment has replies
+    'thread_size': 15,  # Replies in such a thread
+    'users': 50000,  # Distinct comment authors
+    'unlisted_every': 0,  # Users with ids divisible by it are left out of profiles, 0 for none
+    'members': 100000,  # Members of every group
+    'pinned': 0,  # Id of a post pinned on top of the wall, 0 for none
+    'latency': 0.0,  # Seconds added to every HTTP request
+    'jitter': 0.0,  # Random extra seconds up to this
+    'rate_limit': 0,  # Requests per second per token before error 6, 0 for none
+    'error_rate': 0.0,  # Share of requests answered with error 10
+    'media_every': 0,  # Every n-th post and comment has a photo, 0 for none
+    'media_size': 200000,  # Bytes of every photo
+    'media_variants': 1000,  # Distinct photo contents
+    'seed': 1
+}
+
+POST_INTERVAL = 3600  # Seconds between posts
+API_CALL_RE = re.compile(r'API\.([\w.]+)\(')
+
+
+def api_error(code, message):
+    return {'error': {'error_code': code, 'error_msg': message}}
+
+
+class FakeVKData:
+    """Synthetic wall, comments and members computed from ids, nothing is stored."""
+
+    def __init__(self, config, media_url='http://127.0.0.1/media/'):
+        self.config = config
+        self.media_url = media_url  # Where attachments are served
+        self.now = int(time.time())
+        self.stride = config['comments'] * (config['thread_size'] + 1) + 1  # Comment ids per post
+        self._media = {}  # Variant -> content
+
+    # Photo attachment for every media_every-th item
+    def attachments(self, name, index):
+        every = self.config['media_every']
+        if not every or index % every:
+            return []
+        return [{'type': 'photo', 'photo': {'sizes': [
+            {'type': 's', 'url': f'{self.media_url}{name}_s.jpg'},
+            {'type': 'x', 'url': f'{self.media_url}{name}.jpg'}
+        ]}}]
+
+    # Content of a photo; names map to media_variants contents, so files repeat under different URLs
+    def media(self, name):
+        variant = zlib.crc32(name.encode('utf-8')) % self.config['media_variants']
+        content = self._media.get(variant)
+        if content is None:
+            content = self._media[variant] = random.Random(variant).randbytes(self.config['media_size'])
+        return content
+
+    def post(self, post_id, owner_id):
+        index = self.config['posts'] - post_id
+        return {
+            'id': post_id,
+            'owner_id': owner_id,
+            'from_id': owner_id,
+            'date': self.now - index * POST_INTERVAL,
+            'text': f'Пост {post_id}: синтетический текст для проверки скорости',
+            'comments': {'count': self.total_comments()},
+            'likes': {'count': post_id % 97},
+            'reposts': {'count': post_id % 13},
+            'views': {'count': post_id * 10},
+            'attachments': self.attachments(f'p{post_id}', post_id)
+        }
+
+    def thread_size(self, index):
+        return self.config['thread_size'] if index % self.config['thread_every'] == 0 else 0
+
+    def total_comments(self):
+        comments = self.config['comments']
+        return comments + sum(self.thread_size(index) for index in range(comments))
+
+    # Ids grow in the order comments were written: comment, its replies, next comment
+    def comment_id(self, post_id, index, reply=None):
+        base = post_id * self.stride + index * (self.config['thread_size'] + 1) + 1
+        return base if reply is None else base + 1 + reply
+
+    def comment_index(self, post_id, comment_id):
+        return (comment_id - post_id * self.stride - 1) // (self.config['thread_size'] + 1)
+
+    def author(self, item_id):
+        return 1 + item_id * 7919 % self.config['users']
+
+    def comment(self, post_id, index, thread_items_count=0, owner_id=-1):
+        comment_id = self.comment_id(post_id, index)
+        size = self.thread_size(index)
+        return {
+            'id': comment_id,
+            'from_id': self.author(comment_id),
+            'post_id': post_id,
+            'owner_id': owner_id,
+            'date': self.now - (self.config['posts'] - post_id) * POST_INTERVAL + index * 60,
+            'text': f'Комментарий {comment_id} к посту {post_id}',
+            'likes': {'count': comment_id % 7},
+            'attachments': self.attachments(f'c{comment_id}', index),
+            'thread': {
+                'count': size,
+                'items': [self.reply(post_id, index, reply, owner_id) for reply in range(min(size, thread_items_count))]
+            }
+        }
+
+    def reply(self, post_id, index, reply, owner_id=-1):
+        reply_id = self.comment_id(post_id, index, reply)
+        return {
+            'id': reply_id,
+            'from_id': self.author(reply_id),
+            'post_id': post_id,
+            'owner_id': owner_id,
+            'parents_stack': [self.comment_id(post_id, index)],
+            'date': self.now - (self.config['posts'] - post_id) * POST_INTERVAL + index * 60 + reply + 1,
+            'text': f'Ответ {reply_id}',
+            'likes': {'count': reply_id % 5}
+        }
+
+    # Authors of extended responses; unlisted ones are only known to users.get
+    def profiles(self, items):
+        ids = {item['from_id'] for item in items}
+        ids.update(reply['from_id'] for item in items for reply in item.get('thread', {}).get('items', []))
+        unlisted = self.config['unlisted_every']
+        return [{'id': user_id, 'first_name': f'Имя{user_id}', 'last_name': f'Фамилия{user_id}'}
+                for user_id in sorted(ids) if user_id > 0 and not (unlisted and user_id % unlisted == 0)]
+
+    def wall_get(self, params):
+        owner_id = int(params.get('owner_id', -1))
+        offset = int(params.get('offset', 0))
+        count = min(int(params.get('count', 20)), 100)
+        posts, pinned = self.config['posts'], self.config['pinned']
+        items = []
+        for index in range(offset, min(offset + count, posts)):
+            if pinned:
+                # A pinned post tops the wall, the rest follow newest first without it
+                if index == 0:
+                    items.append(dict(self.post(pinned, owner_id), is_pinned=1))
+                    continue
+                index -= 1
+            post_id = posts - index
+            items.append(self.post(post_id if not pinned or post_id > pinned else post_id - 1, owner_id))
+        return {'response': {'count': posts, 'items': items}}
+
+    def wall_get_comments(self, params):
+        post_id = int(params['post_id'])
+        if not 0 < post_id <= self.config['posts']:
+            return api_error(100, 'One of the parameters specified was missing or invalid: post_id')
+        owner_id = int(params.get('owner_id', -1))
+        offset = int(params.get('offset', 0))
+        count = min(int(params.get('count', 10)), 100)
+
+        if params.get('comment_id'):
+            # Thread of one comment
+            index = self.comment_index(post_id, int(params['comment_id']))
+            size = self.thread_size(index)
+            items = [self.reply(post_id, index, reply, owner_id) for reply in range(offset, min(offset + count, size))]
+            response = {'count': size, 'current_level_count': size, 'items': items}
+        else:
+            start = 0
+            if params.get('start_comment_id'):
+                start = self.comment_index(post_id, int(params['start_comment_id']))
+            thread_items_count = min(int(params.get('thread_items_count', 0)), 10)
+            indices = range(start + offset, min(start + offset + count, self.config['comments']))
+            items = [self.comment(post_id, index, thread_items_count, owner_id) for index in indices]
+            response = {'count': self.total_comments(), 'current_level_count': self.config['comments'], 'items': items}
+
+        if str(params.get('extended', '0')) == '1':
+            response['profiles'] = self.profiles(response['items'])
+            response['groups'] = []
+        return {'response': response}
+
+    def users_get(self, params):
+        ids = [int(user_id) for user_id in str(params.get('user_ids', '')).split(',') if user_id]
+        return {'response': [{'id': user_id, 'first_name': f'Имя{user_id}', 'last_name': f'Фамилия{user_id}'}
+                             for user_id in ids]}
+
+    def groups_get_members(self, params):
+        offset = int(params.get('offset', 0))
+        count = min(int(params.get('count', 1000)), 1000)
+        ids = range(offset + 1, min(offset + count, self.config['members']) + 1)
+        if params.get('fields'):
+            items = [{'id': user_id, 'first_name': f'Имя{user_id}', 'last_name': f'Фамилия{user_id}'} for user_id in ids]
+        else:
+            items = list(ids)
+        return {'response': {'count': self.config['members'], 'items': items}}
+
+    def call(self, method, params):
+        handler = {
+            'wall.get': self.wall_get,
+            'wall.getComments': self.wall_get_comments,
+            'users.get': self.users_get,
+            'groups.getMembers': self.groups_get_members
+        }.get(method)
+        if handler is None:
+            return api_error(3, f'Unknown method passed: {method}')
+        return handler(params)
+
+    # Run API.method({...}) calls of a VKScript returning an array of them
+    def execute(self, code):
+        results = []
+        errors = []
+        decoder = json.JSONDecoder()
+        for match in API_CALL_RE.finditer(code):
+            params, _ = decoder.raw_decode(code, match.end())
+            result = self.call(match.group(1), {k: str(v) for k, v in params.items()})
+            if 'response' in result:
+                results.append(result['response'])
+            else:
+                results.append(False)
+                errors.append(dict(result['error'], method=match.group(1)))
+        response = {'response': results}
+        if errors:
+            response['execute_errors'] = errors
+        return response
+
+
+class FakeVKServer:
+    """aiohttp application answering /method/<name> like api.vk.com."""
+
+    def __init__(self, **config):
+        self.config = dict(DEFAULTS, **config)
+        self.data = FakeVKData(self.config)
+        self.random = random.Random(self.config['seed'])
+        self._recent = collections.defaultdict(collections.deque)  # token -> request times
+        self.stats = collections.Counter()
+        self.app = web.Application()
+        self.app.router.add_post('/method/{method}', self.handle)
+        self.app.router.add_get('/stats', self.handle_stats)
+        self.app.router.add_get('/media/{name}', self.handle_media)
+
+    def rate_limited(self, token):
+        if not self.config['rate_limit']:
+            return False
+        now = time.monotonic()
+        recent = self._recent[token]
+        while recent and recent[0] <= now - 1:
+            recent.popleft()
+        if len(recent) >= self.config['rate_limit']:
+            return True
+        recent.append(now)
+        return False
+
+    async def handle(self, request):
+        method = request.match_info['method']
+        params = dict(await request.post())
+        self.stats['requests'] += 1
+        self.stats[method] += 1
+
+        delay = self.config['latency'] + self.random.uniform(0, self.config['jitter'])
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.rate_limited(params.get('access_token', '')):
+            self.stats['rate_limited'] += 1
+            return web.json_response(api_error(6, 'Too many requests per second'))
+        if self.random.random() < self.config['error_rate']:
+            self.stats['errors'] += 1
+            return web.json_response(api_error(10, 'Internal server error'))
+
+        if method == 'execute':
+            result = self.data.execute(params.get('code', ''))
+        else:
+            result = self.data.call(method, params)
+        return web.json_response(result, dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+    async def handle_media(self, request):
+        name = request.match_info['name']
+        self.stats['media'] += 1
+        delay = self.config['latency'] + self.random.uniform(0, self.config['jitter'])
+        if delay:
+            await asyncio.sleep(delay)
+        if self.random.random() < self.config['error_rate']:
+            self.stats['media_errors'] += 1
+            return web.Response(status=503)
+
+        content = self.data.media(name)
+        match = re.fullmatch(r'bytes=(\d+)-', request.headers.get('Range', ''))
+        if not match:
+            return web.Response(body=content, content_type='image/jpeg')
+        start = int(match.group(1))
+        if start >= len(content):
+            return web.Response(status=416, headers={'Content-Range': f'bytes */{len(content)}'})
+        self.stats['media_ranges'] += 1
+        return web.Response(status=206, body=content[start:], content_type='image/jpeg',
+                            headers={'Content-Range': f'bytes {start}-{len(content) - 1}/{len(content)}'})
+
+    async def handle_stats(self, request):
+        return web.json_response(dict(self.stats))
+
+    # Start serving in the running loop, returns the runner to clean up
+    async def start(self, host='127.0.0.1', port=8765):
+        self.data.media_url = f'http://{host}:{port}/media/'
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    for name, value in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop('host'), args.pop('port')
+    print(f'Fake VK API on http://{host}:{port}/method/')
+    server = FakeVKServer(**args)
+    server.data.media_url = f'http://{host}:{port}/media/'
+    web.run_app(server.app, host=host, port=port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
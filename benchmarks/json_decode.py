@@ -0,0 +1,58 @@
+"""Decoding speed of API response bytes: the old text path against vk_json decoders.
+
+Payloads are the responses fake_vk_server.py sends, so they have the
+shape and size of real wall.getComments, execute and groups.getMembers
+answers.
+
+    python benchmarks/json_decode.py
+    python benchmarks/json_decode.py --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from fake_vk_server import DEFAULTS, FakeVKData  # noqa: E402
+from vk_json import DECODERS  # noqa: E402
+
+
+def payloads():
+    data = FakeVKData(dict(DEFAULTS, comments=100))
+    page = {'owner_id': '-1', 'post_id': '500', 'count': '100', 'thread_items_count': '10', 'extended': '1'}
+    execute_code = 'return [' + ','.join(
+        f'API.wall.getComments({json.dumps(dict(page, post_id=str(post_id)))})' for post_id in range(500, 525)) + '];'
+    responses = {
+        'wall.getComments extended': data.wall_get_comments(page),
+        'execute 25 x getComments': data.execute(execute_code),
+        'groups.getMembers fields': data.groups_get_members({'count': '1000', 'fields': 'first_name'}),
+        'wall.get 100': data.wall_get({'owner_id': '-1', 'count': '100'})
+    }
+    # Encoded like the server does it
+    return {name: json.dumps(response, ensure_ascii=False).encode('utf-8') for name, response in responses.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='Best of this many runs')
+    args = parser.parse_args()
+
+    decoders = {'text + json.loads': lambda body: json.loads(body.decode('utf-8'))}  # Before vk_json
+    decoders.update({f'{name} (bytes)': decoder for name, decoder in DECODERS.items()})
+
+    print(f"{'payload':<28} {'KB':>7} " + ' '.join(f'{name:>20}' for name in decoders) + f" {'speedup':>8}")
+    for name, body in payloads().items():
+        speeds = []
+        for decoder in decoders.values():
+            number = max(1, 2000000 // len(body))
+            seconds = min(timeit.repeat(lambda: decoder(body), number=number, repeat=args.repeat)) / number
+            speeds.append(len(body) / seconds / 1024 / 1024)
+        print(f'{name:<28} {len(body) / 1024:7.0f} ' + ' '.join(f'{speed:15.0f} MB/s' for speed in speeds)
+              + f' {speeds[-1] / speeds[0]:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Media downloads from the fake VK API: one file at a time against the worker pool.
+
+Every run starts a fake_vk_server.py process serving photos with the given
+latency and downloads the same URLs into a fresh directory in a fresh
+process. Contents repeat every --variants files, so the rest are found
+as duplicates by hash. The pooled run is then repeated on its directory to
+show that downloaded URLs are skipped.
+
+    python benchmarks/media_download.py
+    python benchmarks/media_download.py --files 5000 --size 500000 --latency 0.1 --workers 32
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from run_benchmarks import free_port, peak_rss_mb, start_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+def download_process(base_url, directory, files, workers, results):
+    from vk_media import MediaDownloader
+
+    async def run():
+        media = MediaDownloader(directory, workers=workers, limit_per_host=workers)
+        try:
+            for index in range(files):
+                media.add(f'{base_url}p{index}.jpg', post_id=index)
+            await media.join()
+        finally:
+            await media.close()
+        return media.summary()
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    summary = asyncio.run(run())
+    results.put({'seconds': time.perf_counter() - started, 'extra_rss_mb': peak_rss_mb() - baseline, **summary})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=200000, help='Bytes per file')
+    parser.add_argument('--variants', type=int, default=800, help='Distinct file contents')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds the server waits before answering')
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, {'latency': args.latency, 'media_size': args.size, 'media_variants': args.variants})
+    base_url = f'http://127.0.0.1:{port}/media/'
+    context = multiprocessing.get_context('spawn')
+    print(f"{'run':<12} {'seconds':>8} {'files/s':>8} {'MB/s':>7} {'fetched':>8} {'dupes':>6} {'failed':>6} "
+          f"{'extra RSS MB':>12}")
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            runs = [('sequential', os.path.join(root, 'sequential'), 1),
+                    ('pooled', os.path.join(root, 'pooled'), args.workers),
+                    ('pooled again', os.path.join(root, 'pooled'), args.workers)]
+            for name, directory, workers in runs:
+                results = context.Queue()
+                process = context.Process(target=download_process,
+                                          args=(base_url, directory, args.files, workers, results))
+                process.start()
+                result = results.get()
+                process.join()
+                seconds = result['seconds']
+                print(f"{name:<12} {seconds:8.2f} {result['downloaded'] / seconds:8.0f} "
+                      f"{result['bytes'] / seconds / 1024 / 1024:7.1f} {result['downloaded']:8} "
+                      f"{result['duplicates']:6} {result['failed']:6} {result['extra_rss_mb']:12.1f}")
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
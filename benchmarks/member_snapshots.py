@@ -0,0 +1,89 @@
+"""Member churn between two lists: pandas merge of CSV exports against snapshot diff.
+
+Writes two member exports of a group where --churn of the members left and
+as many joined, then finds who joined and left both ways, each in a fresh
+process: an outer merge of the two CSVs as done by hand, and
+vk_snapshots.diff_ids on two memory-mapped snapshots saved from the same
+lists beforehand.
+
+    python benchmarks/member_snapshots.py
+    python benchmarks/member_snapshots.py --members 5000000 --churn 0.05
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from run_benchmarks import peak_rss_mb
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+def pandas_merge(old_file, new_file, results):
+    import pandas as pd
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    merged = pd.read_csv(old_file).merge(pd.read_csv(new_file), on='id', how='outer', indicator=True)
+    joined = int((merged['_merge'] == 'right_only').sum())
+    left = int((merged['_merge'] == 'left_only').sum())
+    results.put({'seconds': time.perf_counter() - started, 'extra_rss_mb': peak_rss_mb() - baseline,
+                 'joined': joined, 'left': left})
+
+
+def snapshot_diff(old_file, new_file, results):
+    from vk_snapshots import MemberSnapshots
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    joined, left = MemberSnapshots().diff(old_file, new_file)
+    results.put({'seconds': time.perf_counter() - started, 'extra_rss_mb': peak_rss_mb() - baseline,
+                 'joined': len(joined), 'left': len(left)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=2000000)
+    parser.add_argument('--churn', type=float, default=0.01, help='Share of members who left, as many joined')
+    parser.add_argument('--fields', type=int, default=4, help='Extra CSV columns like first_name, city')
+    args = parser.parse_args()
+
+    from vk_snapshots import MemberSnapshots
+
+    rng = np.random.default_rng(0)
+    old = rng.choice(10 ** 9, args.members, replace=False)
+    changed = int(args.members * args.churn)
+    new = np.concatenate((old[changed:], rng.integers(10 ** 9, 2 * 10 ** 9, changed)))
+    rng.shuffle(new)
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        files = {}
+        for name, ids in (('old', old), ('new', new)):
+            filename = os.path.join(directory, f'{name}.csv')
+            columns = [ids] + [rng.integers(0, 10 ** 6, len(ids)) for _ in range(args.fields)]
+            header = ','.join(['id'] + [f'field{index}' for index in range(args.fields)])
+            np.savetxt(filename, np.column_stack(columns), fmt='%d', delimiter=',', header=header, comments='')
+            started = time.perf_counter()
+            snapshot = MemberSnapshots(directory).save(name, ids)  # Same second, so one group each
+            files[name] = (filename, snapshot, time.perf_counter() - started)
+        print(f"{args.members} members, {changed} joined and {changed} left; "
+              f"CSV {os.path.getsize(files['new'][0]) / 1024 / 1024:.0f} MB, "
+              f"snapshot {os.path.getsize(files['new'][1]) / 1024 / 1024:.0f} MB "
+              f"saved in {files['new'][2]:.2f} s")
+        print(f"{'method':<14} {'seconds':>8} {'joined':>8} {'left':>8} {'extra RSS MB':>12}")
+        for name, target, index in (('pandas merge', pandas_merge, 0), ('snapshot diff', snapshot_diff, 1)):
+            results = context.Queue()
+            process = context.Process(target=target, args=(files['old'][index], files['new'][index], results))
+            process.start()
+            result = results.get()
+            process.join()
+            print(f"{name:<14} {result['seconds']:8.3f} {result['joined']:8} {result['left']:8} "
+                  f"{result['extra_rss_mb']:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Memory of parsed records: list of dicts versus RecordTable.
+
+Builds synthetic comments shaped like VKParser.parse_comment output and
+measures the memory held by each representation with tracemalloc. The dict
+list is measured on a sample and scaled to the full size, since millions of
+dicts may not fit into memory at all.
+
+    python benchmarks/records_memory.py --comments 5000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from vk_records import RecordTable, format_date  # noqa: E402
+
+
+WORDS = ['привет', 'спасибо', 'отличный', 'пост', 'согласен', 'когда', 'будет', 'новость', 'город', 'люди',
+         'хорошо', 'вопрос', 'ответ', 'сегодня', 'завтра', 'дорога', 'ремонт', 'цены', 'магазин', 'работа']
+DOMAIN = 'synthetic'
+OWNER_ID = '123456'
+
+
+def synthetic_comments(count, seed=1):
+    rng = random.Random(seed)
+    names = [(f'Имя{i}', f'Фамилия{i}') for i in range(5000)]
+    start = int(time.time()) - 365 * 24 * 60 * 60
+    for index in range(count):
+        post_id = 100000 + index // 500
+        first_name, last_name = rng.choice(names)
+        record = {
+            'type': 'comment' if index % 4 else 'reply',
+            'date': format_date(start + index * 5),
+            'user_id': str(rng.randrange(1, 800000000)),
+            'first_name': first_name,
+            'last_name': last_name,
+            'text': ' '.join(rng.choices(WORDS, k=rng.randrange(3, 15))),
+            'photo_count': 0,
+            'video_count': 0,
+            'likes_count': rng.randrange(20),
+            'post_link': f'https://vk.com/{DOMAIN}?w=wall-{OWNER_ID}_{post_id}',
+            'post_id': post_id
+        }
+        if record['type'] == 'reply':
+            record['parent_comment_id'] = 5000000 + index - 1
+        record['comment_id'] = 5000000 + index
+        yield record
+
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--comments', type=int, default=5000000)
+    parser.add_argument('--sample', type=int, default=200000, help='Comments kept as dicts to extrapolate from')
+    args = parser.parse_args()
+    sample = min(args.sample, args.comments)
+
+    records, dict_size, dict_time = measure(lambda: list(synthetic_comments(sample)))
+    del records
+    dict_size = dict_size * args.comments / sample
+    dict_time = dict_time * args.comments / sample
+
+    def build_table():
+        table = RecordTable(DOMAIN, OWNER_ID)
+        for record in synthetic_comments(args.comments):
+            table.append(record)
+        return table
+
+    table, table_size, table_time = measure(build_table)
+
+    started = time.perf_counter()
+    counts = table.counts()
+    count_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in zip(range(sample), table):
+        pass
+    read_time = (time.perf_counter() - started) * args.comments / sample
+
+    mb = 1024 * 1024
+    print(f'Comments:          {args.comments} ({counts["comment"]} comments, {counts["reply"]} replies)')
+    print(f'List of dicts:     {dict_size / mb:9.1f} MB  {dict_size / args.comments:6.0f} B/record'
+          f'  (scaled from {sample})')
+    print(f'RecordTable:       {table_size / mb:9.1f} MB  {table_size / args.comments:6.0f} B/record')
+    print(f'Reduction:         {dict_size / table_size:9.1f}x')
+    print(f'Build time:        dicts {dict_time:.1f}s, table {table_time:.1f}s (tracemalloc on)')
+    print(f'Counts by type:    {count_time * 1000:.1f} ms')
+    print(f'Read back as dicts: {read_time:.1f}s (scaled from {sample})')
+
+
+if __name__ == '__main__':
+    main()
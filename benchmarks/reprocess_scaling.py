@@ -0,0 +1,63 @@
+"""Scaling of src/reprocess.py with the number of worker processes.
+
+Writes an NDJSON dump of wall.get and wall.getComments responses computed
+by FakeVKData (no server), then reprocesses it in this process (workers 0)
+and with pools of 1, 2, 4... processes up to the number of cores.
+
+    python benchmarks/reprocess_scaling.py
+    python benchmarks/reprocess_scaling.py --posts 2000 --workers 1 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from fake_vk_server import DEFAULTS, FakeVKData  # noqa: E402
+from reprocess import reprocess  # noqa: E402
+
+
+# Responses a crawl of the wall would get, one per line
+def write_dump(filename, posts, comments):
+    data = FakeVKData(dict(DEFAULTS, posts=posts, comments=comments))
+    with open(filename, 'w', encoding='utf-8') as f:
+        for offset in range(0, posts, 100):
+            page = data.wall_get({'owner_id': '-1', 'offset': str(offset), 'count': '100'})
+            f.write(json.dumps(page, ensure_ascii=False) + '\n')
+            for post in page['response']['items']:
+                for comment_offset in range(0, comments, 100):
+                    response = data.wall_get_comments({
+                        'owner_id': '-1', 'post_id': str(post['id']), 'offset': str(comment_offset), 'count': '100',
+                        'thread_items_count': '10', 'extended': '1'})
+                    f.write(json.dumps(response, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=200, help='Top-level comments per post')
+    parser.add_argument('--workers', type=int, action='append', help='Pool size to run, may be repeated')
+    parser.add_argument('--shard-mb', type=float, default=4)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    pools = args.workers or [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cores]
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, 'dump.ndjson')
+        write_dump(dump, args.posts, args.comments)
+        print(f'{os.path.getsize(dump) / 1024 / 1024:.0f} MB dump, {cores} cores')
+        print(f"{'workers':>7} {'seconds':>8} {'records/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in pools:
+            summary = reprocess([dump], os.path.join(directory, 'out.ndjson'), workers=workers, domain='benchmark',
+                                profiles_file=None, shard_bytes=int(args.shard_mb * 1024 * 1024))
+            baseline = baseline or summary['seconds']
+            print(f"{workers:>7} {summary['seconds']:8.2f} {summary['records_per_second']:10} "
+                  f"{baseline / summary['seconds']:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Throughput benchmarks of VKParser and VKGroupMembers against the fake VK API.
+
+Every scenario starts its own fake_vk_server.py process and runs the client
+in a fresh process, so peak RSS belongs to that scenario alone.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --posts 2000 --latency 0.05 --json results.json
+    python benchmarks/run_benchmarks.py --scenario crawl_execute --scenario members
+    python benchmarks/run_benchmarks.py --decoder json  # Compare with --decoder orjson
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from vk_json import DECODERS  # noqa: E402
+
+# name -> (client options, server options)
+SCENARIOS = {
+    'crawl_execute': ({'kind': 'crawl', 'use_execute': True}, {}),
+    'crawl_single': ({'kind': 'crawl', 'use_execute': False}, {}),
+    'crawl_rate_limited': ({'kind': 'crawl', 'use_execute': False}, {'rate_limit': 50}),
+    'members': ({'kind': 'members'}, {})
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, options):
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'fake_vk_server.py'), '--port', str(port)]
+    for name, value in options.items():
+        command += [f"--{name.replace('_', '-')}", str(value)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError('Fake VK API server did not start')
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+async def run_crawl(api_url, options):
+    from vk_api import VKApi
+    from vk_parser import VKParser
+
+    api = VKApi(api_url=api_url, decoder=options['decoder'])
+    parser = VKParser('benchmark', ['token1', 'token2'], '-1', count=options['posts'], time_period=None,
+                      api=api, token_type='group', delay=1 / options['rate'], use_execute=options['use_execute'])
+    try:
+        await parser.parse_data()
+    finally:
+        await parser.close()
+        await api.close()
+    summary = parser.print_summary()
+    return {'records': summary['total'], 'requests': api.stats['requests'],
+            'calls': parser.batcher.stats['calls'] if parser.batcher else api.stats['requests'],
+            'retries': summary['retries']['retries'], 'decode_seconds': api.metrics.totals()['decode_seconds']}
+
+
+async def run_members(api_url, options):
+    from vk_api import VKApi
+    from vk_limiter import RateLimiter
+    from vk_parser import VKGroupMembers
+
+    api = VKApi(api_url=api_url, decoder=options['decoder'])
+    tokens = ['token1', 'token2']
+    members = VKGroupMembers(tokens, 'benchmark', api=api, limiter=RateLimiter(tokens, rate=options['rate']))
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            result = await members.fetch_all_members(os.path.join(directory, 'members.ndjson'), fields='first_name')
+        finally:
+            await api.close()
+    return {'records': result['fetched'], 'requests': api.stats['requests'],
+            'calls': members.batcher.stats['calls'], 'retries': members.retry.stats['retries'],
+            'decode_seconds': api.metrics.totals()['decode_seconds']}
+
+
+def client_process(api_url, options, results):
+    run = run_crawl if options['kind'] == 'crawl' else run_members
+    started = time.perf_counter()
+    stats = asyncio.run(run(api_url, options))
+    stats['seconds'] = time.perf_counter() - started
+    stats['peak_rss_mb'] = peak_rss_mb()
+    results.put(stats)
+
+
+def run_scenario(name, args):
+    client_options, server_options = SCENARIOS[name]
+    client_options = dict(client_options, posts=args.posts, rate=args.rate, decoder=args.decoder)
+    server_options = dict({'posts': args.posts, 'comments': args.comments, 'members': args.members,
+                           'latency': args.latency, 'jitter': args.jitter}, **server_options)
+    port = free_port()
+    server = start_server(port, server_options)
+    try:
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        client = context.Process(target=client_process,
+                                 args=(f'http://127.0.0.1:{port}/method/', client_options, results))
+        client.start()
+        stats = results.get()
+        client.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    seconds = stats['seconds']
+    stats.update(scenario=name, requests_per_second=stats['requests'] / seconds,
+                 records_per_second=stats['records'] / seconds)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run, may be repeated; all by default')
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--comments', type=int, default=50, help='Top-level comments per post')
+    parser.add_argument('--members', type=int, default=200000)
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds of fake server latency')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--rate', type=float, default=100, help='Client requests per second per token')
+    parser.add_argument('--decoder', choices=sorted(DECODERS), help='JSON decoder, the fastest installed by default')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scenario':<20} {'seconds':>8} {'requests':>9} {'req/s':>8} {'records':>9} {'records/s':>10} "
+          f"{'calls':>7} {'retries':>7} {'decode s':>8} {'peak RSS MB':>11}")
+    for name in args.scenario or SCENARIOS:
+        stats = run_scenario(name, args)
+        results.append(stats)
+        print(f"{name:<20} {stats['seconds']:8.2f} {stats['requests']:9d} {stats['requests_per_second']:8.1f} "
+              f"{stats['records']:9d} {stats['records_per_second']:10.0f} {stats['calls']:7d} "
+              f"{stats['retries']:7d} {stats['decode_seconds']:8.2f} {stats['peak_rss_mb'] or '-':>11}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
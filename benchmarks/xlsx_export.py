@@ -0,0 +1,77 @@
+"""Excel export: DataFrame.to_excel against the streaming XLSXSink.
+
+Each method runs in a fresh process that builds the same RecordTable of
+synthetic comments first, so peak RSS above that baseline is the cost of
+the export alone. DataFrame.to_excel cannot write more rows than one sheet
+holds; the streaming writer splits them.
+
+    python benchmarks/xlsx_export.py --comments 300000
+    python benchmarks/xlsx_export.py --comments 1500000 --method stream
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from run_benchmarks import peak_rss_mb
+from records_memory import DOMAIN, OWNER_ID, synthetic_comments
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+METHODS = ('pandas', 'stream')
+
+
+def export_process(method, comments, results):
+    from vk_records import RecordTable
+    from vk_sinks import RECORD_FIELDS, XLSXSink
+
+    table = RecordTable(DOMAIN, OWNER_ID)
+    for record in synthetic_comments(comments):
+        table.append(record)
+    baseline = peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'export.xlsx')
+        started = time.perf_counter()
+        try:
+            if method == 'pandas':
+                import pandas as pd
+                pd.DataFrame(table.columns(RECORD_FIELDS)).to_excel(filename, index=False)
+            else:
+                sink = XLSXSink(filename, fieldnames=RECORD_FIELDS)
+                for record in table:
+                    sink.write(record)
+                sink.close()
+        except Exception as e:
+            results.put({'method': method, 'error': f'{type(e).__name__}: {e}'})
+            return
+        seconds = time.perf_counter() - started
+        results.put({'method': method, 'seconds': seconds, 'rows_per_second': comments / seconds,
+                     'extra_rss_mb': peak_rss_mb() - baseline, 'file_mb': os.path.getsize(filename) / 1024 / 1024})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--comments', type=int, default=300000)
+    parser.add_argument('--method', action='append', choices=METHODS, help='Method to run, may be repeated; all by default')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'method':<8} {'seconds':>8} {'rows/s':>8} {'extra RSS MB':>12} {'file MB':>8}")
+    for method in args.method or METHODS:
+        results = context.Queue()
+        process = context.Process(target=export_process, args=(method, args.comments, results))
+        process.start()
+        result = results.get()
+        process.join()
+        if 'error' in result:
+            print(f"{method:<8} {result['error']}")
+        else:
+            print(f"{method:<8} {result['seconds']:8.1f} {result['rows_per_second']:8.0f} "
+                  f"{result['extra_rss_mb']:12.1f} {result['file_mb']:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
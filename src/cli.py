@@ -0,0 +1,384 @@
+"""Headless batch mode: crawl many communities from a job file without the GUI.
+
+    python src/cli.py jobs.json --report report.json
+
+Job file is a JSON object:
+
+    {
+        "token": ["token1", "token2"],
+        "token_type": "user",
+        "output_dir": "results",
+        "format": "ndjson",
+        "concurrency": 4,
+        "count": 100,
+        "period_days": 30,
+        "walls": [
+            {"domain": "apiclub", "owner_id": "1"},
+            {"domain": "team", "owner_id": "22822305", "count": 500, "incremental": true}
+        ],
+        "members": [
+            {"group_id": "apiclub", "fields": "city,sex"}
+        ]
+    }
+
+token may be left out and passed in the VK_TOKEN environment variable
+(or left out entirely for replay).
+format is ndjson, csv, json, xlsx or db (one SQLite database for all walls);
+members are written to ndjson, csv or db and fall back to csv otherwise.
+Incremental walls append new records to their file, so they need ndjson,
+csv or db.
+count, period_days (0 for no limit), keywords, whole_words and incremental
+set at the top level apply to every wall job unless the job overrides them.
+Optional: proxy, api_url, profiles_file, checkpoint_dir, metrics_file, json_decoder
+(orjson or json, the fastest installed by default). Comment author names are
+kept between runs only in profiles_file, nothing is written without it.
+
+media_dir (or --media-dir) downloads photos and video previews of all parsed
+posts and comments there, media_workers (16 by default) at a time. Files are
+named by content hash and listed with their URL, post and comment in
+index.ndjson; a rerun skips what is listed and resumes partial files.
+
+archive_file (or --archive) appends every raw API response of the wall jobs
+to a compressed archive. With replay (or --replay) the wall jobs are run
+from that archive alone, without the network, to re-run parsing with the
+same count; period_days 0 keeps posts that have aged out since the crawl.
+
+Every wall report carries analytics of its records: engagement of posts,
+comments per day and per hour (UTC), top commenters, reply threads and
+keyword hit rates. analytics_dir (or --analytics-dir) also writes them to
+<domain>_analytics.json and a per-post engagement table to <domain>_analytics.csv.
+
+snapshot_dir (or --snapshot-dir) keeps every fetched member list of a group
+as a sorted id snapshot there and reports who joined and left since the
+previous one; their ids go to <group_id>_joined.csv and <group_id>_left.csv
+(see src/snapshots.py to compare any two snapshots). Lists fetched with a
+filter are kept as <group_id>_<filter>, apart from the full one.
+
+metrics_file (or --metrics) receives per-method request metrics every
+metrics_interval seconds (15 by default) and once more at the end:
+a Prometheus textfile for *.prom names, a JSON snapshot otherwise.
+
+--report - prints the JSON report to stdout alone; progress and job status
+lines then go to stderr.
+
+Exit codes: 0 all jobs done, 1 some job failed, 2 bad arguments or job file,
+3 all jobs finished but some comment pages could not be fetched, 130 interrupted.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+
+from vk_api import VKApi, API_URL
+from vk_archive import ResponseArchive
+from vk_execute import ExecuteBatcher
+from vk_json import DECODERS
+from vk_limiter import RateLimiter, RATE_LIMITS
+from vk_media import MediaDownloader
+from vk_parser import VKParser, VKGroupMembers, check_owner_id, community_id
+from vk_profiles import ProfileCache
+from vk_sinks import open_sink, APPENDABLE_FORMATS, RECORD_FIELDS
+from vk_snapshots import MemberSnapshots, fetched_member_ids, snapshot_key, write_ids
+from vk_storage import SQLiteStore
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_INTERRUPTED = 130
+
+FORMATS = ('ndjson', 'csv', 'json', 'xlsx', 'db')
+MEMBERS_FORMATS = ('ndjson', 'csv', 'db')  # Formats members are streamed and resumed in
+
+# Wall job options and their defaults
+WALL_DEFAULTS = {
+    'count': 100,
+    'period_days': 30,
+    'keywords': False,
+    'whole_words': False,
+    'incremental': False
+}
+
+
+class JobFileError(Exception):
+    pass
+
+
+def load_jobs(filename, overrides):
+    try:
+        with open(filename, encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise JobFileError(f"Не удалось прочитать файл заданий: {e}")
+    if not isinstance(config, dict):
+        raise JobFileError("Файл заданий должен содержать JSON-объект")
+    config.update({k: v for k, v in overrides.items() if v is not None})
+
+    token = config.get('token') or os.environ.get('VK_TOKEN', '')
+    tokens = [t for t in re.split(r'[,\s]+', token) if t] if isinstance(token, str) else list(token)
+    if not tokens and not config.get('replay'):
+        raise JobFileError("Не указан токен (поле token или переменная VK_TOKEN)")
+    config['token'] = tokens or ['']  # Replay sends no requests
+    if config.setdefault('token_type', 'user') not in RATE_LIMITS:
+        raise JobFileError(f"Неизвестный тип токена: {config['token_type']}")
+    if config.setdefault('format', 'ndjson') not in FORMATS:
+        raise JobFileError(f"Неизвестный формат: {config['format']}")
+    config.setdefault('output_dir', 'results')
+    config.setdefault('concurrency', 4)
+    config.setdefault('metrics_interval', 15)
+    config.setdefault('media_workers', 16)
+    if config.get('json_decoder') and config['json_decoder'] not in DECODERS:
+        raise JobFileError(f"Декодер JSON недоступен: {config['json_decoder']} (есть: {', '.join(DECODERS)})")
+
+    walls = []
+    for job in config.get('walls', []):
+        if isinstance(job, str):
+            raise JobFileError(f"Для группы {job} нужен owner_id: {{\"domain\": ..., \"owner_id\": ...}}")
+        if not job.get('domain') or not job.get('owner_id'):
+            raise JobFileError(f"Задание стены без domain или owner_id: {job}")
+        try:
+            check_owner_id(job['owner_id'])
+        except ValueError as e:
+            raise JobFileError(f"{job['domain']}: {e}")
+        walls.append({**WALL_DEFAULTS, **{k: config[k] for k in WALL_DEFAULTS if k in config}, **job})
+    members = []
+    for job in config.get('members', []):
+        if not isinstance(job, dict):
+            job = {'group_id': job}
+        if not job.get('group_id'):
+            raise JobFileError(f"Задание участников без group_id: {job}")
+        members.append(job)
+    if not walls and not members:
+        raise JobFileError("В файле заданий нет ни walls, ни members")
+    if (config['format'] not in APPENDABLE_FORMATS + ('db',) and not config.get('replay')
+            and any(job['incremental'] for job in walls)):
+        raise JobFileError(f"Формат {config['format']} не дописывается, для incremental нужен ndjson, csv или db")
+    if config.get('replay'):
+        if not config.get('archive_file') or not os.path.exists(config['archive_file']):
+            raise JobFileError(f"Нет архива ответов для повтора: {config.get('archive_file')}")
+        if members:
+            raise JobFileError("Участники не хранятся в архиве, уберите members для повтора")
+    return config, walls, members
+
+
+class BatchRunner:
+    """Runs all jobs in one event loop sharing the session, rate limiter and execute batcher."""
+
+    def __init__(self, config):
+        self.config = config
+        self.output_dir = config['output_dir']
+        self.file_format = config['format']
+        self.api = VKApi(proxy=config.get('proxy'), api_url=config.get('api_url', API_URL),
+                         decoder=config.get('json_decoder'))
+        self.metrics = self.api.metrics
+        self.metrics_file = config.get('metrics_file')
+        self.limiter = RateLimiter(config['token'], config['token_type'], metrics=self.metrics)
+        self.batcher = ExecuteBatcher(self.limiter.acquire, self.api.call)
+        self.profiles = ProfileCache(config.get('profiles_file'))
+        self.store = None  # Shared SQLite database for the db format
+        self.media = None  # Shared media downloader, created in the event loop
+        self.archive = None  # Raw responses of all walls
+        self.replay = bool(config.get('replay'))
+        self._semaphore = asyncio.Semaphore(max(1, int(config['concurrency'])))
+
+    def output_file(self, name):
+        if self.file_format == 'db':
+            return os.path.join(self.output_dir, 'vk_data.db')
+        return os.path.join(self.output_dir, f'{name}.{self.file_format}')
+
+    async def run(self, walls, members):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.file_format == 'db':
+            self.store = SQLiteStore(self.output_file(None))
+        if self.config.get('archive_file'):
+            self.archive = ResponseArchive(self.config['archive_file'], readonly=self.replay,
+                                           decoder=self.config.get('json_decoder'))
+        if self.config.get('media_dir'):
+            self.media = MediaDownloader(self.config['media_dir'], workers=max(1, int(self.config['media_workers'])),
+                                         proxy=self.config.get('proxy'))
+        reporter = asyncio.ensure_future(self._write_metrics()) if self.metrics_file else None
+        try:
+            return await asyncio.gather(*[self._run_job(self.crawl_wall, job) for job in walls],
+                                        *[self._run_job(self.fetch_members, job) for job in members])
+        finally:
+            if reporter:
+                reporter.cancel()
+                self.metrics.write(self.metrics_file)
+            self.profiles.save()
+            if self.store:
+                self.store.close()
+            if self.media:
+                await self.media.close()
+            if self.archive:
+                self.archive.close()
+            await self.api.close()
+
+    # Refresh the metrics file for monitoring while jobs run
+    async def _write_metrics(self):
+        while True:
+            await asyncio.sleep(float(self.config['metrics_interval']))
+            try:
+                self.metrics.write(self.metrics_file)
+            except OSError as e:
+                print(f'[Ошибка] Не удалось записать метрики: {e}')
+
+    async def _run_job(self, run, job):
+        async with self._semaphore:
+            started = time.monotonic()
+            try:
+                report = await run(job)
+            except Exception as e:
+                print(f'[Ошибка] {job}: {e}')
+                report = {'status': 'failed', 'error': str(e)}
+            report['job'] = job
+            report['seconds'] = round(time.monotonic() - started, 2)
+            return report
+
+    async def crawl_wall(self, job):
+        domain = job['domain']
+        output = self.output_file(f'{domain}_data')
+        checkpoint_file = None
+        if job['incremental'] and not self.replay:
+            checkpoint_file = os.path.join(self.config.get('checkpoint_dir', os.path.join('data', 'checkpoints')),
+                                           f'{domain}.json')
+        if self.store:
+            sinks = [self.store.sink(community_id(job['owner_id']))]
+        else:
+            # An incremental run only has the new records, the earlier ones stay in the file
+            sinks = [open_sink(output, fieldnames=RECORD_FIELDS, append=checkpoint_file is not None)]
+
+        parser = VKParser(domain, self.config['token'], job['owner_id'], count=int(job['count']),
+                          time_period=int(job['period_days']) * 24 * 60 * 60 or None,
+                          filter_keywords=job['keywords'], whole_words=job['whole_words'],
+                          api=self.api, limiter=self.limiter, batcher=self.batcher, sinks=sinks,
+                          keep_in_memory=False, checkpoint_file=checkpoint_file, profile_cache=self.profiles,
+                          media=self.media, archive=self.archive, replay=self.replay)
+        try:
+            await parser.parse_data()
+        finally:
+            await parser.close()
+
+        summary = parser.print_summary()
+        if self.config.get('analytics_dir'):
+            for extension in ('json', 'csv'):
+                parser.analytics.write_report(
+                    os.path.join(self.config['analytics_dir'], f'{domain}_analytics.{extension}'), self.profiles.get)
+        # Shared by all jobs, reported once
+        del summary['connections']
+        del summary['metrics']
+        del summary['media']
+        if summary['errors']:
+            status = 'failed'
+        elif summary['failed_posts'] or summary['retries']['failed']:
+            status = 'partial'
+        else:
+            status = 'ok'
+        return {'status': status, 'output': output, 'summary': summary}
+
+    async def fetch_members(self, job):
+        group_id = str(job['group_id'])
+        file_format = self.file_format if self.file_format in MEMBERS_FORMATS else 'csv'
+        # Own file per group, resume state is kept next to it
+        output = os.path.join(self.output_dir, f'{group_id}_members.{file_format}')
+        members = VKGroupMembers(self.config['token'], group_id, api=self.api, limiter=self.limiter,
+                                 batcher=self.batcher)
+        result = await members.fetch_all_members(output, file_format, sort=job.get('sort'), fields=job.get('fields'),
+                                                 filter_param=job.get('filter'))
+        summary = members.print_summary()
+        del summary['connections']
+        del summary['metrics']
+        if self.config.get('snapshot_dir'):
+            summary['snapshot'] = self.take_snapshot(snapshot_key(group_id, job.get('filter')), members, result)
+        return {'status': 'ok', 'output': output, 'summary': dict(summary, count=result['count'])}
+
+    # Snapshot of the fetched members compared with the previous one of the same list
+    def take_snapshot(self, key, members, result):
+        snapshot = MemberSnapshots(self.config['snapshot_dir']).take(key, fetched_member_ids(members, result))
+        for change in ('joined', 'left'):
+            change_ids = snapshot.pop(f'{change}_ids', None)
+            if change_ids is not None:
+                snapshot[f'{change}_file'] = os.path.join(self.output_dir, f'{key}_{change}.csv')
+                write_ids(snapshot[f'{change}_file'], change_ids)
+        return snapshot
+
+
+def exit_code(reports):
+    statuses = {report['status'] for report in reports}
+    if 'failed' in statuses:
+        return EXIT_FAILED
+    if 'partial' in statuses:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Парсер VK без графического интерфейса")
+    parser.add_argument('jobs', help="JSON-файл заданий")
+    parser.add_argument('--token', help="Токены через запятую, заменяют токен из файла")
+    parser.add_argument('--token-type', choices=sorted(RATE_LIMITS))
+    parser.add_argument('--output-dir')
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--concurrency', type=int)
+    parser.add_argument('--report', help="Файл для JSON-отчета, '-' для вывода в stdout")
+    parser.add_argument('--metrics', help="Файл метрик запросов: *.prom для Prometheus, иначе JSON")
+    parser.add_argument('--media-dir', help="Папка для фото и превью видео из постов и комментариев")
+    parser.add_argument('--analytics-dir', help="Папка для отчетов аналитики стен (JSON и CSV)")
+    parser.add_argument('--snapshot-dir', help="Папка снимков участников для отслеживания вступивших и вышедших")
+    parser.add_argument('--archive', help="Файл архива сырых ответов API")
+    parser.add_argument('--replay', action='store_true', default=None,
+                        help="Разобрать стены заново из архива, без обращения к сети")
+    args = parser.parse_args(argv)
+
+    try:
+        config, walls, members = load_jobs(args.jobs, {
+            'token': args.token, 'token_type': args.token_type, 'output_dir': args.output_dir,
+            'format': args.format, 'concurrency': args.concurrency, 'metrics_file': args.metrics,
+            'media_dir': args.media_dir, 'analytics_dir': args.analytics_dir, 'snapshot_dir': args.snapshot_dir,
+            'archive_file': args.archive, 'replay': args.replay
+        })
+    except JobFileError as e:
+        print(f'[Ошибка] {e}', file=sys.stderr)
+        return EXIT_USAGE
+
+    # The report alone on stdout, progress goes to stderr then
+    log = sys.stderr if args.report == '-' else sys.stdout
+    started = time.monotonic()
+    with contextlib.redirect_stdout(log):
+        runner = BatchRunner(config)
+        try:
+            reports = asyncio.run(runner.run(walls, members))
+        except KeyboardInterrupt:
+            print('[Прервано]', file=sys.stderr)
+            return EXIT_INTERRUPTED
+
+    code = exit_code(reports)
+    report = {
+        'exit_code': code,
+        'seconds': round(time.monotonic() - started, 2),
+        'connections': runner.api.connection_stats(),
+        'rate': round(runner.limiter.throughput, 2),
+        'metrics': runner.metrics.snapshot(),
+        'jobs': reports
+    }
+    if runner.archive:
+        report['archive'] = runner.archive.summary()
+    if runner.media:
+        report['media'] = dict(runner.media.summary(), metrics=runner.media.metrics.snapshot())
+    if args.report == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    for job_report in reports:
+        print(f"[{job_report['status']}] {job_report['job']} -> {job_report.get('output', job_report.get('error'))}",
+              file=log)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,30 @@
 import sys
 import asyncio
-import json
-import time
+import re
 from datetime import datetime
-import pandas as pd
-import aiofiles
-import aiohttp
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QLineEdit, QPushButton, QTextEdit, QFileDialog, 
-    QMessageBox, QProgressBar, QGroupBox, QCheckBox, QRadioButton, QTextBrowser
+    QMessageBox, QProgressBar, QGroupBox, QCheckBox, QRadioButton, QTextBrowser,
+    QTableView, QHeaderView, QSplitter, QComboBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 import os
+from vk_parser import VKParser, VKGroupMembers, check_owner_id, community_id
+from vk_sinks import open_sink, RECORD_FIELDS
+from vk_storage import SQLiteStore, is_sqlite_file
+from vk_profiles import ProfileCache
+from vk_media import MediaDownloader
+from vk_archive import ResponseArchive
+from vk_snapshots import SNAPSHOTS_DIR, MemberSnapshots, fetched_member_ids, snapshot_key, write_ids
+from vk_table_models import RecordTableModel, MembersTableModel
+
+
+# Seconds between request metrics lines in the log while a worker runs
+METRICS_LOG_INTERVAL = 10
+
+# Seconds between batched updates of the results table and progress bar
+UPDATE_INTERVAL = 0.25
 
 
 # Все доступные поля и фильтры, как на сайте VK
@@ -105,339 +117,57 @@ def parameters_help():
     return help_text
 
 
-class VKGroupMembers:
-    def __init__(self, token, group_id):
-        self.token = token
-        self.group_id = group_id
-        self.members_data = []
-
-    async def get_group_members(self, count=1000, offset=0, sort=None, fields=None, filter_param=None):
-        params = {
-            'access_token': self.token,
-            'group_id': self.group_id,
-            'v': '5.131',
-            'count': count,
-            'offset': offset
-        }
-        if sort:
-            params['sort'] = sort
-        if fields:
-            params['fields'] = fields
-        if filter_param:
-            params['filter'] = filter_param
-            
-        url = "https://api.vk.com/method/groups.getMembers"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as r:
-                result = await r.json()
-                if "response" in result:
-                    self.members_data = result["response"]["items"]
-                    return result
-                else:
-                    raise Exception(f"Ошибка VK API: {result}")
-
-    def export_json(self, filename="group_members.json"):
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(self.members_data, f, ensure_ascii=False, indent=2)
-
-    def export_csv(self, filename="group_members.csv"):
-        df = pd.json_normalize(self.members_data)
-        df.to_csv(filename, index=False, encoding="utf-8-sig")
-
-    def print_summary(self):
-        return {
-            'total': len(self.members_data)
-        }
-
-
-class VKParser:
-    def __init__(self, domain, token, owner_id, delay=0.35, count=10, time_period=60 * 60 * 24 * 30, proxy=None, filter_keywords=False):
-        # Configuration
-        self.TOKEN = token
-        self.DOMAIN = domain  # Community address
-        self.COUNT = count  # Number of posts per request
-        self.delay = delay  # Delay in seconds
-        self.lastRequestTime = 0
-        self.time_period = time_period
-        self.proxy = proxy
-        self.owner_id = owner_id
-        self.parsed_data = []  # Store parsed data
-        self.filter_keywords = filter_keywords  # Enable keyword filtering
-        self.keywords = []  # Keywords for filtering
-
-    # Load keywords for filtering
-    async def load_keywords(self):
-        try:
-            async with aiofiles.open('data/words.txt', mode='r', encoding='utf-8') as file:
-                self.keywords = [row.strip().lower() async for row in file]
-        except Exception as e:
-            print(f'[Ошибка] Не удалось загрузить ключевые слова: {e}')
-            self.keywords = []
-
-    # Check if text matches keywords
-    async def check_keywords(self, text):
-        if not self.keywords or not self.filter_keywords:
-            return True  # No filtering if keywords not loaded or filtering disabled
-        
-        # Simple keyword matching
-        text_lower = text.lower()
-        for keyword in self.keywords:
-            if keyword in text_lower:
-                return True
-        return False
-
-    # API requests
-    async def requests_func(self, method, url_params):
-        url = f'https://api.vk.com/method/{method}?v=5.131&access_token={self.TOKEN}&{url_params}'
+# Run coro in loop, calling every callback of [(interval, callback)] each interval
+# seconds meanwhile. Callbacks run in the worker thread between crawl steps,
+# so the state they report is consistent.
+def run_reporting(loop, coro, callbacks):
+    async def repeat(interval, callback):
         while True:
-            await asyncio.sleep(0.01)
-            if self.lastRequestTime + self.delay < time.time():
-                self.lastRequestTime = time.time()
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, proxy=self.proxy) as response:
-                        data = await response.text()
-                        return data
-
-    # Main function to parse data
-    async def parse_data(self, progress_callback=None):
-        print(f'[{self.DOMAIN}] Начало парсинга...')
-        
-        # Load keywords if filtering is enabled
-        if self.filter_keywords:
-            await self.load_keywords()
-            if self.keywords:
-                print(f"Загружено {len(self.keywords)} ключевых слов для фильтрации")
-            else:
-                print("Фильтрация включена, но ключевые слова не найдены")
-        
-        url = "wall.get", f"domain={self.DOMAIN}&count={self.COUNT}"
+            await asyncio.sleep(interval)
+            callback()
 
-        req_posts = await self.requests_func(*url)
-        try:
-            posts = json.loads(req_posts)['response']['items']
-        except Exception as e:
-            print(f'[Ошибка] {e}')
-            return
-
-        total_posts = len(posts)
-        for i, post in enumerate(posts):
-            # Parse post
-            await self.parse_post(post)
-
-            # Parse comments if there are any
-            if int(post['comments']['count']) > 0:
-                await self.parse_comments(post)
-            
-            # Report progress
-            if progress_callback:
-                progress_callback(int((i + 1) / total_posts * 100))
-
-    # Parse posts
-    async def parse_post(self, post):
-        await asyncio.sleep(0.01)
-        
-        # Check keywords if filtering is enabled
-        if self.filter_keywords:
-            if not await self.check_keywords(post['text']):
-                return  # Skip post if it doesn't match keywords
-        
-        # Collect photo and video information
-        photo = {}
-        video = {}
-        if 'attachments' in post.keys():
-            for i in range(len(post['attachments'])):
-                if 'video' in post['attachments'][i].keys():
-                    video[len(video)] = post['attachments'][i]['video']['image'][-1]['url']
-                elif 'photo' in post['attachments'][i].keys():
-                    photo[len(photo)] = post['attachments'][i]['photo']['sizes'][-1]['url']
-
-        # Collect general post information
-        post_data = {
-            'type': 'post',
-            'date': datetime.utcfromtimestamp(int(post['date'])).strftime('%Y-%m-%d %H:%M:%S'),
-            'user_id': post['owner_id'],
-            'text': str(post['text'].replace("'", "").replace("\n\n", "\n")),
-            'photo_count': len(photo),
-            'video_count': len(video),
-            'comments_count': int(post['comments']['count']),
-            'likes_count': int(post['likes']['count']) if 'likes' in post else 0,
-            'reposts_count': int(post['reposts']['count']) if 'reposts' in post else 0,
-            'views_count': int(post['views']['count']) if 'views' in post else 0,
-            'link': f'https://vk.com/{self.DOMAIN}?w=wall-{self.owner_id}_{post["id"]}',
-            'post_id': post['id']
-        }
-
-        self.parsed_data.append(post_data)
-
-    # Parse comments
-    async def parse_comments(self, post):
-        await asyncio.sleep(0.01)
-        
-        # Note: owner_id should be negative for communities
-        for offset in range(0, int(post['comments']['count']) + 100, 100):
-            url = ["wall.getComments", f"owner_id={self.owner_id}&post_id={post['id']}&count={100}&offset={offset}&extended=1"]
-
-            comments_full = json.loads(await self.requests_func(*url))
-
-            if 'response' in comments_full.keys():
-                comments = comments_full['response']['items']
-                profiles = comments_full['response']['profiles']
-
-                for comment in comments:
-                    # Check keywords if filtering is enabled
-                    if self.filter_keywords:
-                        if not await self.check_keywords(comment['text']):
-                            continue  # Skip comment if it doesn't match keywords
-                    
-                    # Get user info
-                    first_name = ""
-                    last_name = ""
-                    
-                    for profile in profiles:
-                        if comment['from_id'] == profile['id']:
-                            first_name = profile['first_name']
-                            last_name = profile['last_name']
-                            break
-
-                    # Collect photo and video information
-                    photo = {}
-                    video = {}
-                    if 'attachments' in comment.keys():
-                        for k in range(len(comment['attachments'])):
-                            if 'video' in comment['attachments'][k].keys():
-                                video[len(video)] = comment['attachments'][k]['video']['image'][-1]['url']
-                            elif 'photo' in comment['attachments'][k].keys():
-                                photo[len(photo)] = comment['attachments'][k]['photo']['sizes'][-1]['url']
-
-                    # Collect general comment information
-                    date = datetime.utcfromtimestamp(int(comment['date'])).strftime('%Y-%m-%d %H:%M:%S')
-                    comment_data = {
-                        'type': 'comment',
-                        'date': date,
-                        'user_id': str(comment['from_id']),
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'text': str(comment['text']),
-                        'photo_count': len(photo),
-                        'video_count': len(video),
-                        'likes_count': int(comment['likes']['count']) if 'likes' in comment else 0,
-                        'post_link': f'https://vk.com/{self.DOMAIN}?w=wall-{self.owner_id}_{post["id"]}',
-                        'post_id': post['id'],
-                        'comment_id': comment['id']
-                    }
-
-                    self.parsed_data.append(comment_data)
-
-                    # Parse comment threads/replies
-                    if 'thread' in comment and comment['thread']['count'] > 0:
-                        await self.parse_comment_thread(post, comment, profiles)
-
-    # Parse comment threads
-    async def parse_comment_thread(self, post, comment, profiles):
-        # Note: owner_id should be negative for communities
-        for offset in range(0, comment['thread']['count'] + 100, 100):
-            url = ["wall.getComments", f"owner_id={self.owner_id}&post_id={post['id']}&comment_id={comment['id']}&count={100}&offset={offset}&extended=1"]
-
-            comments_thread_full = json.loads(await self.requests_func(*url))
-
-            if 'response' in comments_thread_full.keys():
-                comments_thread = comments_thread_full['response']['items']
-                profiles_thread = comments_thread_full['response']['profiles']
-
-                for comment_thread in comments_thread:
-                    # Check keywords if filtering is enabled
-                    if self.filter_keywords:
-                        if not await self.check_keywords(comment_thread['text']):
-                            continue  # Skip reply if it doesn't match keywords
-                    
-                    # Get user info
-                    first_name = ""
-                    last_name = ""
-                    
-                    for profile in profiles_thread:
-                        if comment_thread['from_id'] == profile['id']:
-                            first_name = profile['first_name']
-                            last_name = profile['last_name']
-                            break
-
-                    # Collect photo and video information
-                    photo = {}
-                    video = {}
-                    if 'attachments' in comment_thread.keys():
-                        for k in range(len(comment_thread['attachments'])):
-                            if 'video' in comment_thread['attachments'][k].keys():
-                                video[len(video)] = comment_thread['attachments'][k]['video']['image'][-1]['url']
-                            elif 'photo' in comment_thread['attachments'][k].keys():
-                                photo[len(photo)] = comment_thread['attachments'][k]['photo']['sizes'][-1]['url']
-
-                    # Collect general comment information
-                    date = datetime.utcfromtimestamp(int(comment_thread['date'])).strftime('%Y-%m-%d %H:%M:%S')
-                    comment_data = {
-                        'type': 'reply',
-                        'date': date,
-                        'user_id': str(comment_thread['from_id']),
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'text': str(comment_thread['text']),
-                        'photo_count': len(photo),
-                        'video_count': len(video),
-                        'likes_count': int(comment_thread['likes']['count']) if 'likes' in comment_thread else 0,
-                        'post_link': f'https://vk.com/{self.DOMAIN}?w=wall-{self.owner_id}_{post["id"]}',
-                        'post_id': post['id'],
-                        'parent_comment_id': comment['id'],
-                        'comment_id': comment_thread['id']
-                    }
-
-                    self.parsed_data.append(comment_data)
-
-    # Export data to JSON
-    def export_to_json(self, filename='vk_data.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.parsed_data, f, ensure_ascii=False, indent=4)
-        print(f"Данные экспортированы в {filename}")
-
-    # Export data to Excel
-    def export_to_excel(self, filename='vk_data.xlsx'):
-        df = pd.DataFrame(self.parsed_data)
-        df.to_excel(filename, index=False)
-        print(f"Данные экспортированы в {filename}")
-
-    # Export data to CSV
-    def export_to_csv(self, filename='vk_data.csv'):
-        df = pd.DataFrame(self.parsed_data)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
-        print(f"Данные экспортированы в {filename}")
-
-    # Print summary in Russian
-    def print_summary(self):
-        posts_count = sum(1 for item in self.parsed_data if item['type'] == 'post')
-        comments_count = sum(1 for item in self.parsed_data if item['type'] == 'comment')
-        replies_count = sum(1 for item in self.parsed_data if item['type'] == 'reply')
-        
-        return {
-            'total': len(self.parsed_data),
-            'posts': posts_count,
-            'comments': comments_count,
-            'replies': replies_count
-        }
+    reporters = [loop.create_task(repeat(interval, callback)) for interval, callback in callbacks]
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        for reporter in reporters:
+            reporter.cancel()
+        loop.run_until_complete(asyncio.gather(*reporters, return_exceptions=True))
 
 
 class MembersWorker(QThread):
-    progress = pyqtSignal(int)
+    progress = pyqtSignal(int, int)  # Members fetched, members in the group
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
+    metrics = pyqtSignal(str)
+    table = pyqtSignal(object)  # Ids of streamed members, filled while fetching
+    rows = pyqtSignal(int)  # Ids fetched so far
 
-    def __init__(self, token, group_id, count, offset, sort, fields, filter_param):
+    def __init__(self, token, group_id, count, offset, sort, fields, filter_param, token_type='user', output_file=None,
+                 snapshot_dir=None):
         super().__init__()
+        self.snapshot_dir = snapshot_dir  # Save a snapshot of the fetched ids and compare it with the previous one
         self.token = token
+        self.token_type = token_type
+        self.output_file = output_file  # Stream all members to this file instead of one page
         self.group_id = group_id
         self.count = count
         self.offset = offset
         self.sort = sort
         self.fields = fields
         self.filter_param = filter_param
+        self._rows = 0  # Last reported state
+        self._progress = None
+
+    # Batched update of the results table and progress bar
+    def report(self, members):
+        rows, progress = len(members.member_ids), (members.fetched_count, members.members_count or 0)
+        if rows != self._rows:
+            self._rows = rows
+            self.rows.emit(rows)
+        if progress != self._progress:
+            self._progress = progress
+            self.progress.emit(*progress)
 
     def run(self):
         try:
@@ -446,34 +176,92 @@ class MembersWorker(QThread):
             asyncio.set_event_loop(loop)
             
             # Create members instance
-            members = VKGroupMembers(self.token, self.group_id)
+            members = VKGroupMembers(self.token, self.group_id, token_type=self.token_type)
             
             # Run fetching members
-            result = loop.run_until_complete(members.get_group_members(
-                count=self.count,
-                offset=self.offset,
-                sort=self.sort,
-                fields=self.fields,
-                filter_param=self.filter_param
-            ))
+            try:
+                if self.output_file:
+                    self.table.emit(members.member_ids)
+                    result = run_reporting(loop, members.fetch_all_members(
+                        self.output_file,
+                        sort=self.sort,
+                        fields=self.fields,
+                        filter_param=self.filter_param
+                    ), [
+                        (UPDATE_INTERVAL, lambda: self.report(members)),
+                        (METRICS_LOG_INTERVAL, lambda: self.metrics.emit(members.metrics.format_summary()))
+                    ])
+                    self.report(members)
+                    if self.snapshot_dir:
+                        result['snapshot'] = self.take_snapshot(members, result)
+                else:
+                    result = loop.run_until_complete(members.get_group_members(
+                        count=self.count,
+                        offset=self.offset,
+                        sort=self.sort,
+                        fields=self.fields,
+                        filter_param=self.filter_param
+                    ))
+            finally:
+                loop.run_until_complete(members.close())
+                loop.close()
             
             # Emit results
             self.finished.emit((members, result))
         except Exception as e:
             self.error.emit(str(e))
 
+    # Joined and left ids are written next to the members file
+    def take_snapshot(self, members, result):
+        snapshot = MemberSnapshots(self.snapshot_dir).take(snapshot_key(self.group_id, self.filter_param),
+                                                           fetched_member_ids(members, result))
+        base = os.path.splitext(self.output_file)[0]
+        for change in ('joined', 'left'):
+            change_ids = snapshot.pop(f'{change}_ids', None)
+            if change_ids is not None:
+                snapshot[f'{change}_file'] = f'{base}_{change}.csv'
+                write_ids(snapshot[f'{change}_file'], change_ids)
+        return snapshot
+
 
 class ParserWorker(QThread):
-    progress = pyqtSignal(int)
+    progress = pyqtSignal(int, int)  # Requests completed, requests planned
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
+    metrics = pyqtSignal(str)
+    table = pyqtSignal(object)  # RecordTable filled while parsing
+    rows = pyqtSignal(int)  # Records parsed so far
 
-    def __init__(self, domain, token, owner_id, count):
+    def __init__(self, domain, token, owner_id, count, token_type='user', time_period=None, stream_file=None,
+                 checkpoint_file=None, filter_keywords=False, whole_words=False, profile_cache=None, media_dir=None,
+                 archive_file=None, replay=False):
         super().__init__()
+        self.media_dir = media_dir  # Download attachments of posts and comments here
+        self.archive_file = archive_file  # Append raw API responses here
+        self.replay = replay  # Parse responses of archive_file instead of calling the API
+        self.profile_cache = profile_cache  # Author names kept between runs
+        self.filter_keywords = filter_keywords
+        self.whole_words = whole_words
+        self.stream_file = stream_file  # Write records to this file while parsing
+        self.checkpoint_file = checkpoint_file  # Fetch only what is new since the previous run
         self.domain = domain
         self.token = token
+        self.token_type = token_type
         self.owner_id = owner_id
         self.count = count
+        self.time_period = time_period
+        self._rows = 0  # Last reported state
+        self._progress = None
+
+    # Batched update of the results table and progress bar
+    def report(self, parser):
+        rows, progress = len(parser.parsed_data), (parser.requests_done, parser.requests_planned)
+        if rows != self._rows:
+            self._rows = rows
+            self.rows.emit(rows)
+        if progress != self._progress:
+            self._progress = progress
+            self.progress.emit(*progress)
 
     def run(self):
         try:
@@ -482,10 +270,38 @@ class ParserWorker(QThread):
             asyncio.set_event_loop(loop)
             
             # Create parser instance
-            parser = VKParser(self.domain, self.token, self.owner_id, count=self.count, filter_keywords=False)
+            store = None
+            sinks = None
+            if self.stream_file and is_sqlite_file(self.stream_file):
+                store = SQLiteStore(self.stream_file)
+                sinks = [store.sink(community_id(self.owner_id))]
+            elif self.stream_file:
+                # Incremental runs only add new records to the file
+                sinks = [open_sink(self.stream_file, fieldnames=RECORD_FIELDS, append=self.checkpoint_file is not None)]
+            media = MediaDownloader(self.media_dir) if self.media_dir else None
+            archive = ResponseArchive(self.archive_file, readonly=self.replay) if self.archive_file else None
+            parser = VKParser(self.domain, self.token, self.owner_id, count=self.count, filter_keywords=self.filter_keywords,
+                              token_type=self.token_type, time_period=self.time_period, sinks=sinks,
+                              checkpoint_file=self.checkpoint_file, whole_words=self.whole_words,
+                              profile_cache=self.profile_cache, media=media, archive=archive, replay=self.replay)
             
             # Run parsing
-            loop.run_until_complete(parser.parse_data(self.progress.emit))
+            try:
+                self.table.emit(parser.parsed_data)
+                run_reporting(loop, parser.parse_data(), [
+                    (UPDATE_INTERVAL, lambda: self.report(parser)),
+                    (METRICS_LOG_INTERVAL, lambda: self.metrics.emit(parser.metrics.format_summary()))
+                ])
+                self.report(parser)
+            finally:
+                loop.run_until_complete(parser.close())
+                if media:
+                    loop.run_until_complete(media.close())
+                if archive:
+                    archive.close()
+                loop.close()
+                if store:
+                    store.close()
             
             # Emit results
             self.finished.emit(parser)
@@ -493,11 +309,42 @@ class ParserWorker(QThread):
             self.error.emit(str(e))
 
 
+class ExportWorker(QThread):
+    """Writes export files of finished results off the GUI thread.
+
+    Steps are (path, write, size): write(path, progress_callback) writes one
+    file and may report how many of its size units are done; size is the
+    record count of record files and 1 for small reports.
+    """
+    progress = pyqtSignal(int, int)  # Units written, units of all files
+    finished = pyqtSignal(list)  # Paths written
+    error = pyqtSignal(str)
+
+    def __init__(self, steps):
+        super().__init__()
+        self.steps = steps
+
+    def run(self):
+        try:
+            total = sum(size for _, _, size in self.steps) or 1
+            done = 0
+            paths = []
+            for path, write, size in self.steps:
+                write(path, lambda written, done=done: self.progress.emit(done + written, total))
+                done += size
+                paths.append(path)
+                self.progress.emit(done, total)
+            self.finished.emit(paths)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("VK Group Parser")
-        self.setGeometry(100, 100, 700, 650)
+        self.setGeometry(100, 100, 900, 850)
+        self.profile_cache = ProfileCache()  # Shared by all parsing runs, on disk only when asked
         
         # Create central widget and layout
         central_widget = QWidget()
@@ -538,6 +385,10 @@ class MainWindow(QMainWindow):
         token_layout.addWidget(self.token_input)
         self.input_layout.addLayout(token_layout)
         
+        # Token type (user tokens allow 3 requests/s, community tokens 20 requests/s)
+        self.group_token_checkbox = QCheckBox("Токен сообщества (до 20 запросов/с вместо 3)")
+        self.input_layout.addWidget(self.group_token_checkbox)
+        
         # Owner ID input (for parsing)
         self.owner_layout = QHBoxLayout()
         self.owner_layout.addWidget(QLabel("Owner ID:"))
@@ -559,6 +410,51 @@ class MainWindow(QMainWindow):
         self.count_layout.addWidget(self.count_input)
         self.input_layout.addLayout(self.count_layout)
         
+        # Period input (for parsing)
+        self.period_layout = QHBoxLayout()
+        self.period_layout.addWidget(QLabel("За последние дней (0 — без ограничения):"))
+        self.period_input = QLineEdit("30")
+        self.period_layout.addWidget(self.period_input)
+        self.input_layout.addLayout(self.period_layout)
+        
+        # Stream results while parsing
+        self.stream_checkbox = QCheckBox("Записывать результаты в файл по ходу парсинга")
+        self.stream_checkbox.setToolTip("Данные попадают на диск сразу и сохраняются даже при сбое")
+        self.input_layout.addWidget(self.stream_checkbox)
+        
+        # Incremental mode
+        self.incremental_checkbox = QCheckBox("Только новые посты и комментарии с прошлого запуска")
+        self.incremental_checkbox.setToolTip("Состояние хранится в data/checkpoints/<имя группы>.json")
+        self.input_layout.addWidget(self.incremental_checkbox)
+        
+        # Media download
+        self.media_checkbox = QCheckBox("Скачивать фото и превью видео (data/media)")
+        self.media_checkbox.setToolTip("Одинаковые файлы сохраняются один раз, список со ссылками — в data/media/index.ndjson")
+        self.input_layout.addWidget(self.media_checkbox)
+        
+        # Raw response archive
+        archive_layout = QHBoxLayout()
+        self.archive_checkbox = QCheckBox("Сохранять сырые ответы API в архив")
+        self.archive_checkbox.setToolTip("Архив хранится в data/archive/<имя группы>.vka")
+        self.replay_checkbox = QCheckBox("Разобрать из архива без сети")
+        self.replay_checkbox.setToolTip("Повторный разбор сохраненных ответов с тем же количеством постов, токен не нужен")
+        archive_layout.addWidget(self.archive_checkbox)
+        archive_layout.addWidget(self.replay_checkbox)
+        self.input_layout.addLayout(archive_layout)
+        
+        # Author names between runs
+        self.profiles_checkbox = QCheckBox("Сохранять имена авторов между запусками (data/profiles.json)")
+        self.profiles_checkbox.setToolTip("Имена уже известных авторов не запрашиваются повторно")
+        self.input_layout.addWidget(self.profiles_checkbox)
+        
+        # Keyword filtering
+        keywords_layout = QHBoxLayout()
+        self.keywords_checkbox = QCheckBox("Фильтр по ключевым словам (data/words.txt)")
+        self.whole_words_checkbox = QCheckBox("Только целые слова")
+        keywords_layout.addWidget(self.keywords_checkbox)
+        keywords_layout.addWidget(self.whole_words_checkbox)
+        self.input_layout.addLayout(keywords_layout)
+        
         self.input_group.setLayout(self.input_layout)
         main_layout.addWidget(self.input_group)
         
@@ -617,6 +513,16 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(self.filter_input)
         self.members_layout.addLayout(filter_layout)
         
+        # Fetch all members mode
+        self.fetch_all_checkbox = QCheckBox("Получить всех участников (запись в CSV/NDJSON/SQLite по мере загрузки)")
+        self.fetch_all_checkbox.setToolTip("Количество и смещение игнорируются; прерванная выгрузка продолжится с места остановки")
+        self.members_layout.addWidget(self.fetch_all_checkbox)
+        
+        # Member list snapshots for tracking who joined and left
+        self.snapshot_checkbox = QCheckBox("Сохранять снимок участников и показывать вступивших/вышедших (data/snapshots)")
+        self.snapshot_checkbox.setToolTip("Только при получении всех участников; списки id пишутся рядом с файлом выгрузки")
+        self.members_layout.addWidget(self.snapshot_checkbox)
+        
         # Help buttons
         help_layout = QHBoxLayout()
         self.parameters_help_button = QPushButton("Справка по параметрам")
@@ -646,6 +552,11 @@ class MainWindow(QMainWindow):
         self.export_button.setEnabled(False)
         buttons_layout.addWidget(self.export_button)
         
+        # Excel workbooks take tens of seconds per 100k records to write
+        self.xlsx_checkbox = QCheckBox("Также в Excel (XLSX)")
+        self.xlsx_checkbox.setToolTip("Запись XLSX заметно медленнее JSON и CSV на больших выгрузках")
+        buttons_layout.addWidget(self.xlsx_checkbox)
+        
         main_layout.addLayout(buttons_layout)
         
         # Create progress bar
@@ -653,10 +564,53 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         main_layout.addWidget(self.progress_bar)
         
+        # Results table, filled while parsing
+        results_group = QGroupBox("Результаты")
+        results_layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Поиск по тексту и автору")
+        self.search_input.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.search_input)
+        self.type_filter = QComboBox()
+        for label, record_type in (("Все записи", None), ("Посты", 'post'), ("Комментарии", 'comment'), ("Ответы", 'reply')):
+            self.type_filter.addItem(label, record_type)
+        filter_layout.addWidget(self.type_filter)
+        self.rows_label = QLabel()
+        filter_layout.addWidget(self.rows_label)
+        results_layout.addLayout(filter_layout)
+        
+        self.results_view = QTableView()
+        self.results_view.setSortingEnabled(True)
+        self.results_view.setWordWrap(False)
+        self.results_view.setAlternatingRowColors(True)
+        self.results_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        # Fixed row heights keep scrolling over millions of rows cheap
+        self.results_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.results_view.verticalHeader().setDefaultSectionSize(22)
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        results_layout.addWidget(self.results_view)
+        results_group.setLayout(results_layout)
+        self.results_model = None
+        
+        # Filter is applied once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.type_filter.currentIndexChanged.connect(self.apply_filter)
+        
         # Create log area
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
-        main_layout.addWidget(self.log_area)
+        
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(results_group)
+        splitter.addWidget(self.log_area)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        main_layout.addWidget(splitter)
         
         # Create contact button
         contact_layout = QHBoxLayout()
@@ -676,7 +630,7 @@ class MainWindow(QMainWindow):
         # Set example values (without actual token for security)
         self.domain_input.setText("ddx_fitness")
         self.owner_input.setText("-164992662")
-        self.token_input.setPlaceholderText("Введите ваш токен VK")
+        self.token_input.setPlaceholderText("Введите ваш токен VK (несколько — через запятую)")
         self.group_id_input.setText("191570013")
         self.group_id_input.setToolTip("ID группы VK (число, например: 191570013)")
         self.members_count_input.setToolTip("Количество участников за один запрос (1-1000)")
@@ -708,6 +662,13 @@ class MainWindow(QMainWindow):
     def log_message(self, message):
         self.log_area.append(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
         
+    # Tokens are separated by commas or whitespace; requests rotate between them
+    def get_tokens(self):
+        return [t for t in re.split(r'[,\s]+', self.token_input.text()) if t]
+        
+    def get_token_type(self):
+        return 'group' if self.group_token_checkbox.isChecked() else 'user'
+        
     def start_parsing(self):
         if self.parse_mode_radio.isChecked():
             self.start_post_parsing()
@@ -718,8 +679,13 @@ class MainWindow(QMainWindow):
         # Get input values
         domain = self.domain_input.text().strip()
         owner_id = self.owner_input.text().strip()
-        token = self.token_input.text().strip()
+        token = self.get_tokens()
         count = self.count_input.text().strip()
+        period = self.period_input.text().strip() or "0"
+        replay = self.replay_checkbox.isChecked()
+        archive_file = None
+        if replay or self.archive_checkbox.isChecked():
+            archive_file = os.path.join('data', 'archive', f'{domain}.vka')
         
         # Validate inputs
         if not domain:
@@ -730,7 +696,17 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Введите Owner ID")
             return
             
-        if not token:
+        try:
+            check_owner_id(owner_id)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+            
+        if replay and not os.path.exists(archive_file):
+            QMessageBox.warning(self, "Ошибка", f"Нет архива {archive_file}")
+            return
+            
+        if not token and not replay:
             QMessageBox.warning(self, "Ошибка", "Введите токен")
             return
             
@@ -742,24 +718,59 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Количество постов должно быть положительным числом")
             return
             
+        try:
+            period = int(period)
+            if period < 0:
+                raise ValueError("Period must not be negative")
+        except ValueError:
+            QMessageBox.warning(self, "Ошибка", "Период должен быть неотрицательным числом дней")
+            return
+            
+        checkpoint_file = None
+        if self.incremental_checkbox.isChecked() and not replay:
+            checkpoint_file = os.path.join('data', 'checkpoints', f'{domain}.json')
+            
+        stream_file = None
+        if self.stream_checkbox.isChecked():
+            # New records of an incremental run are appended to the chosen file
+            options = QFileDialog.Option.DontConfirmOverwrite if checkpoint_file else QFileDialog.Option(0)
+            stream_file, _ = QFileDialog.getSaveFileName(
+                self, "Файл для записи результатов", f"{domain}_data.ndjson",
+                "NDJSON (*.ndjson);;CSV (*.csv);;SQLite (*.db)", options=options)
+            if not stream_file:
+                return
+            
+        self.profile_cache.use_file(os.path.join('data', 'profiles.json') if self.profiles_checkbox.isChecked() else None)
+            
         # Disable start button and reset progress
         self.start_button.setEnabled(False)
         self.export_button.setEnabled(False)
-        self.progress_bar.setValue(0)
+        self.reset_progress("%p% — %v из %m запросов")
+        self.set_results_model(None)
         self.log_area.clear()
         
         # Create and start worker thread
-        self.worker = ParserWorker(domain, token, owner_id, count)
+        self.worker = ParserWorker(domain, token or [''], owner_id, count, self.get_token_type(),
+                                   time_period=period * 24 * 60 * 60 or None, stream_file=stream_file,
+                                   checkpoint_file=checkpoint_file,
+                                   filter_keywords=self.keywords_checkbox.isChecked(),
+                                   whole_words=self.whole_words_checkbox.isChecked(),
+                                   profile_cache=self.profile_cache,
+                                   media_dir=os.path.join('data', 'media') if self.media_checkbox.isChecked() else None,
+                                   archive_file=archive_file, replay=replay)
         self.worker.progress.connect(self.update_progress)
+        self.worker.table.connect(lambda table: self.set_results_model(RecordTableModel(table)))
+        self.worker.rows.connect(self.update_rows)
         self.worker.finished.connect(self.parsing_finished)
         self.worker.error.connect(self.parsing_error)
+        self.worker.metrics.connect(self.log_message)
         self.worker.start()
         
         self.log_message("Начало парсинга постов/комментариев...")
         
     def start_members_parsing(self):
         # Get input values
-        token = self.token_input.text().strip()
+        token = self.get_tokens()
         group_id = self.group_id_input.text().strip()
         count = self.members_count_input.text().strip()
         offset = self.offset_input.text().strip()
@@ -790,29 +801,93 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Смещение должно быть числом")
             return
             
+        output_file = None
+        if self.fetch_all_checkbox.isChecked():
+            output_file, _ = QFileDialog.getSaveFileName(
+                self, "Файл для выгрузки участников", f"{group_id}_members.csv",
+                "CSV (*.csv);;NDJSON (*.ndjson);;SQLite (*.db)")
+            if not output_file:
+                return
+        snapshot_dir = SNAPSHOTS_DIR if output_file and self.snapshot_checkbox.isChecked() else None
+            
         # Disable start button and reset progress
         self.start_button.setEnabled(False)
         self.export_button.setEnabled(False)
-        self.progress_bar.setValue(0)
+        self.reset_progress("%p% — %v из %m участников" if output_file else "%p%")
+        self.set_results_model(None)
         self.log_area.clear()
         
         # Create and start worker thread
-        self.worker = MembersWorker(token, group_id, count, offset, sort, fields, filter_param)
+        self.worker = MembersWorker(token, group_id, count, offset, sort, fields, filter_param, self.get_token_type(),
+                                    output_file=output_file, snapshot_dir=snapshot_dir)
         self.worker.progress.connect(self.update_progress)
+        self.worker.table.connect(lambda member_ids: self.set_results_model(MembersTableModel(member_ids)))
+        self.worker.rows.connect(self.update_rows)
         self.worker.finished.connect(self.members_finished)
         self.worker.error.connect(self.parsing_error)
+        self.worker.metrics.connect(self.log_message)
         self.worker.start()
         
         self.log_message("Начало получения участников группы...")
         
-    def update_progress(self, value):
-        self.progress_bar.setValue(value)
+    def reset_progress(self, text_format):
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat(text_format)
+        
+    # Progress of requests completed against requests planned so far; planned
+    # grows while posts with comments are found, so the bar may step back
+    def update_progress(self, done, planned):
+        if planned:
+            self.progress_bar.setRange(0, planned)
+            self.progress_bar.setValue(min(done, planned))
+            
+    def finish_progress(self):
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        
+    def set_results_model(self, model):
+        self.results_model = model
+        self.results_view.setModel(model)
+        # Natural order until a column header is clicked
+        self.results_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.type_filter.setVisible(model is None or isinstance(model, RecordTableModel))
+        if model is not None:
+            if isinstance(model, RecordTableModel):
+                self.results_view.setColumnWidth(3, 400)  # Text
+            self.apply_filter()
+        self.update_rows_label()
+        
+    def update_rows(self, count):
+        if self.results_model is not None:
+            self.results_model.set_count(count)
+            self.update_rows_label()
+            
+    # All rows are in, put the ones shown unsorted while they came in place
+    def finish_rows(self):
+        if self.results_model is not None:
+            self.results_model.finish()
+            self.update_rows_label()
+
+    def update_rows_label(self):
+        if self.results_model is None:
+            self.rows_label.setText("")
+        else:
+            self.rows_label.setText(f"Показано {self.results_model.rowCount()} из {self.results_model.source_count}")
+            
+    def apply_filter(self):
+        if self.results_model is None:
+            return
+        if isinstance(self.results_model, RecordTableModel):
+            self.results_model.set_record_type(self.type_filter.currentData())
+        self.results_model.set_filter(self.search_input.text())
+        self.update_rows_label()
         
     def parsing_finished(self, parser):
         self.parser_result = parser
         self.start_button.setEnabled(True)
         self.export_button.setEnabled(True)
-        self.progress_bar.setValue(100)
+        self.finish_progress()
+        self.finish_rows()
         
         # Show summary
         summary = parser.print_summary()
@@ -821,13 +896,33 @@ class MainWindow(QMainWindow):
         self.log_message(f"Постов: {summary['posts']}")
         self.log_message(f"Комментариев: {summary['comments']}")
         self.log_message(f"Ответов: {summary['replies']}")
+        self.log_connection_stats(summary['connections'])
+        self.log_retry_stats(summary['retries'])
+        self.log_analytics(summary['analytics'])
+        self.log_metrics(parser.metrics)
+        if summary['media']:
+            self.log_media_stats(summary['media'], parser.media.directory)
+        if parser.archive is not None:
+            stats = parser.archive.stats
+            if parser.replay:
+                self.log_message(f"Из архива: ответов {stats['hits']}, не найдено {stats['misses']}")
+            else:
+                self.log_message(f"В архив записано ответов: {stats['appended']} "
+                                 f"({stats['raw_bytes'] / 1024 / 1024:.1f} МБ, сжато до "
+                                 f"{stats['compressed_bytes'] / 1024 / 1024:.1f} МБ)")
         
     def members_finished(self, result):
         members, api_result = result
         self.parser_result = members
         self.start_button.setEnabled(True)
         self.export_button.setEnabled(True)
-        self.progress_bar.setValue(100)
+        self.finish_progress()
+        if self.results_model is None:
+            # One page of members, shown once it is fetched
+            model = MembersTableModel(members.members_data)
+            self.set_results_model(model)
+            self.update_rows(len(members.members_data))
+        self.finish_rows()
         
         # Show summary
         summary = members.print_summary()
@@ -835,6 +930,78 @@ class MainWindow(QMainWindow):
         self.log_message(f"Всего участников: {summary['total']}")
         if 'response' in api_result and 'count' in api_result['response']:
             self.log_message(f"Общее количество участников в группе: {api_result['response']['count']}")
+        if 'filename' in api_result:
+            # Members are already on disk, nothing left to export
+            self.export_button.setEnabled(False)
+            self.log_message(f"Общее количество участников в группе: {api_result['count']}")
+            self.log_message(f"Участники записаны в {api_result['filename']}")
+        if 'snapshot' in api_result:
+            self.log_snapshot(api_result['snapshot'])
+        self.log_connection_stats(summary['connections'])
+        self.log_retry_stats(summary['retries'])
+        self.log_metrics(members.metrics)
+
+    def log_connection_stats(self, stats):
+        self.log_message(f"Запросов к API: {stats['requests']}")
+        self.log_message(f"Соединений: открыто {stats['connections_created']}, "
+                         f"переиспользовано {stats['connections_reused']} "
+                         f"({stats['reuse_ratio'] * 100:.0f}%)")
+
+    def log_retry_stats(self, stats):
+        if stats['retries'] or stats['failed']:
+            self.log_message(f"Повторных запросов: {stats['retries']} (лимит: {stats['rate_limited']}, "
+                             f"ошибки сервера: {stats['server_errors']}, сеть: {stats['network_errors']}), "
+                             f"не удалось: {stats['failed']}")
+            self.log_message(f"Итоговая скорость: {stats['rate']} запросов/с")
+
+    def log_media_stats(self, stats, directory):
+        self.log_message(f"Медиа: скачано {stats['downloaded']} файлов ({stats['bytes'] / 1024 / 1024:.1f} МБ), "
+                         f"дубликатов {stats['duplicates']}, продолжено {stats['resumed']}, "
+                         f"ошибок {stats['failed']}; файлы в {directory}")
+        for error in stats['errors'][:5]:
+            self.log_message(f"  {error['url']}: {error['error']}")
+
+    def log_snapshot(self, snapshot):
+        self.log_message(f"Снимок участников: {snapshot['snapshot']} ({snapshot['members']})")
+        if snapshot['previous'] is None:
+            self.log_message("Это первый снимок группы, изменения будут видны со следующего")
+            return
+        self.log_message(f"С прошлого снимка ({snapshot['previous']}): вступили {snapshot['joined']}, "
+                         f"вышли {snapshot['left']}")
+        self.log_message(f"  - {snapshot['joined_file']}")
+        self.log_message(f"  - {snapshot['left_file']}")
+
+    def log_analytics(self, analytics):
+        posts = analytics['posts']
+        if posts['count']:
+            rate = posts['engagement_rate_mean']
+            self.log_message(f"Вовлеченность поста (лайки + репосты + комментарии): в среднем "
+                             f"{posts['engagement_mean']}, медиана {posts['engagement_median']:g}"
+                             + (f", {rate * 100:.1f}% от просмотров" if rate is not None else ""))
+            best = posts['top'][0]
+            self.log_message(f"Лучший пост: {best['post_id']} от {best['date']} ({best['engagement']})")
+        by_hour = analytics['comments_by_hour']
+        if any(by_hour):
+            peak_day = max(analytics['comments_by_day'].items(), key=lambda item: item[1])
+            self.log_message(f"Комментарии: пик в {by_hour.index(max(by_hour)):02d}:00 UTC, "
+                             f"больше всего за день {peak_day[1]} ({peak_day[0]})")
+        threads = analytics['threads']
+        if threads['threads']:
+            self.log_message(f"Ветки ответов: {threads['threads']} ({threads['share'] * 100:.0f}% комментариев), "
+                             f"в среднем {threads['replies_mean']} ответа, максимум {threads['replies_max']}")
+        top = [f"{author['name'] or author['user_id']} ({author['comments'] + author['replies']})"
+               for author in analytics['top_commenters'][:5]]
+        if top:
+            self.log_message(f"Самые активные комментаторы: {', '.join(top)}")
+        hits = [f"{keyword} {stats['records']} ({stats['rate'] * 100:.1f}%)"
+                for keyword, stats in analytics['keywords'].items()]
+        if hits:
+            self.log_message(f"Ключевые слова: {', '.join(hits[:10])}")
+
+    def log_metrics(self, metrics):
+        self.log_message(metrics.format_summary())
+        for line in metrics.format_methods():
+            self.log_message(f"  {line}")
         
     def parsing_error(self, error_message):
         self.start_button.setEnabled(True)
@@ -853,44 +1020,57 @@ class MainWindow(QMainWindow):
         if not directory:
             return
             
-        try:
-            if isinstance(self.parser_result, VKParser):
-                # Export parsing results
-                domain = self.domain_input.text().strip()
-                filename_base = f"{domain}_data"
-                
-                # Export to JSON
-                json_path = os.path.join(directory, f"{filename_base}.json")
-                self.parser_result.export_to_json(json_path)
-                
-                # Export to CSV
-                csv_path = os.path.join(directory, f"{filename_base}.csv")
-                self.parser_result.export_to_csv(csv_path)
-                
-                self.log_message(f"Данные экспортированы в:")
-                self.log_message(f"  - {json_path}")
-                self.log_message(f"  - {csv_path}")
-            else:
-                # Export members results
-                group_id = self.group_id_input.text().strip() or "group"
-                filename_base = f"{group_id}_members"
-                
-                # Export to JSON
-                json_path = os.path.join(directory, f"{filename_base}.json")
-                self.parser_result.export_json(json_path)
-                
-                # Export to CSV
-                csv_path = os.path.join(directory, f"{filename_base}.csv")
-                self.parser_result.export_csv(csv_path)
-                
-                self.log_message(f"Данные экспортированы в:")
-                self.log_message(f"  - {json_path}")
-                self.log_message(f"  - {csv_path}")
-            
-            QMessageBox.information(self, "Успех", f"Данные успешно экспортированы в папку:\n{directory}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при экспорте:\n{str(e)}")
-            self.log_message(f"Ошибка экспорта: {str(e)}")
+        result = self.parser_result
+        xlsx = self.xlsx_checkbox.isChecked()
+        if isinstance(result, VKParser):
+            # Export parsing results
+            records = len(result.parsed_data)
+            base = os.path.join(directory, f"{self.domain_input.text().strip()}_data")
+            steps = [(f"{base}.json", result.export_to_json, records),
+                     (f"{base}.csv", result.export_to_csv, records)]
+            if xlsx:
+                # One sheet per record type
+                steps.append((f"{base}.xlsx", result.export_to_excel, records))
+            # Request metrics snapshot of the run
+            steps.append((f"{base}_metrics.json", lambda path, progress: result.metrics.write(path), 1))
+            # Analytics summary and per-post engagement table
+            for extension in ('json', 'csv'):
+                steps.append((f"{base}_analytics.{extension}",
+                              lambda path, progress: result.analytics.write_report(path, self.profile_cache.get), 1))
+        else:
+            # Export members results
+            records = len(result.members_data)
+            base = os.path.join(directory, f"{self.group_id_input.text().strip() or 'group'}_members")
+            steps = [(f"{base}.json", lambda path, progress: result.export_json(path), records),
+                     (f"{base}.csv", lambda path, progress: result.export_csv(path), records)]
+            if xlsx:
+                steps.append((f"{base}.xlsx", lambda path, progress: result.export_excel(path), records))
+
+        self.start_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.reset_progress("Экспорт: %p%")
+        self.export_worker = ExportWorker(steps)
+        self.export_worker.progress.connect(self.update_progress)
+        self.export_worker.finished.connect(lambda paths: self.export_finished(directory, paths))
+        self.export_worker.error.connect(self.export_error)
+        self.export_worker.start()
+        self.log_message("Экспорт данных...")
+
+    def export_finished(self, directory, paths):
+        self.start_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+        self.finish_progress()
+        self.log_message(f"Данные экспортированы в:")
+        for path in paths:
+            self.log_message(f"  - {path}")
+        QMessageBox.information(self, "Успех", f"Данные успешно экспортированы в папку:\n{directory}")
+
+    def export_error(self, error_message):
+        self.start_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при экспорте:\n{error_message}")
+        self.log_message(f"Ошибка экспорта: {error_message}")
             
     def open_contact(self):
         import webbrowser
@@ -0,0 +1,342 @@
+"""Parse saved raw API responses again on all CPU cores, without the network.
+
+    python src/reprocess.py dumps/*.ndjson -o results/all.ndjson
+    python src/reprocess.py data/archive/apiclub.vka -o apiclub.csv --workers 8
+
+Inputs are wall.get and wall.getComments responses (execute answers with
+lists of them too) in one of these forms:
+
+    *.ndjson  one response per line: {"response": {...}}, a bare {"items": [...]}
+              or {"method": ..., "params": {...}, "response": {...}}
+    *.json    one response or a JSON array of them
+    *.vka     response archive written by the parser (archive_file)
+
+Inputs are split into shards (byte ranges of NDJSON files, groups of archive
+frames or array elements) normalized by a pool of processes with the same
+parse_post/parse_comment code as a crawl. Output keeps the input order. NDJSON
+output is encoded in the workers and only concatenated here, other formats
+go through the usual sinks.
+
+Links need the community address: --domain, else the domain of archived
+wall.get requests, else club<id>. Comment authors are named from the
+profiles of extended responses, archived users.get answers and --profiles,
+a profiles_file kept by a crawl.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from vk_archive import FRAME, ResponseArchive, parse_key, read_response
+from vk_json import DECODERS, get_decoder
+from vk_keywords import KeywordMatcher
+from vk_parser import VKParser, check_owner_id, community_id
+from vk_profiles import ProfileCache
+from vk_sinks import RECORD_FIELDS, open_sink
+from vk_storage import SQLiteStore, is_sqlite_file
+
+
+EXIT_OK = 0
+EXIT_USAGE = 2
+
+SHARD_BYTES = 16 * 1024 * 1024  # Input bytes per shard
+SHARD_RESPONSES = 200  # Responses per shard of a JSON array
+
+# Worker process state set by init_worker
+_worker = {}
+
+
+def init_worker(options):
+    _worker.clear()
+    _worker.update(options)
+    _worker['decode'] = get_decoder(options['decoder'])
+    _worker['parsers'] = {}
+    _worker['profiles'] = ProfileCache(options['profiles_file'], max_size=10 ** 7)
+    for user_id, (first_name, last_name) in options['users'].items():
+        _worker['profiles'].put(user_id, first_name, last_name)
+    if options['keywords']:
+        _worker['matcher'] = KeywordMatcher(options['keywords'], options['whole_words'])
+
+
+# Parser normalizing records of one community; never sends a request
+def get_parser(owner_id, domain=None):
+    domain = _worker['domain'] or domain or _worker['domains'].get(owner_id) or f'club{owner_id}'
+    parser = _worker['parsers'].get((domain, owner_id))
+    if parser is None:
+        parser = VKParser(domain, [''], owner_id, time_period=None, use_execute=False, keep_in_memory=False,
+                          profile_cache=_worker['profiles'], filter_keywords='matcher' in _worker)
+        parser.keyword_matcher = _worker.get('matcher')
+        _worker['parsers'][(domain, owner_id)] = parser
+    return parser
+
+
+# Records of one response to wall.get or wall.getComments, in crawl order
+def normalize(response, method=None, params=None):
+    params = params or {}
+    if isinstance(response, list):  # execute
+        return [record for item in response for record in normalize(item)]
+    if not isinstance(response, dict) or not response.get('items'):
+        return []
+    items = response['items']
+    if method is None:
+        method = 'wall.getComments' if 'post_id' in items[0] or 'parents_stack' in items[0] else 'wall.get'
+
+    records = []
+    if method == 'wall.get':
+        for post in items:
+            parser = get_parser(_worker['owner_id'] or community_id(post['owner_id']), params.get('domain'))
+            record = parser.parse_post(post)
+            if record is not None:
+                records.append(record)
+        return records
+
+    source = params.get('owner_id') or items[0].get('owner_id')
+    parser = get_parser(_worker['owner_id'] or (community_id(source) if source else '0'))
+    parser.profiles.add_response(response)
+    thread_id = params.get('comment_id')
+    for comment, keywords in parser.filter_comments(items):
+        post_id = int(comment.get('post_id') or params['post_id'])
+        parent_id = thread_id or (comment.get('parents_stack') or [None])[0]
+        if parent_id:
+            records.append(parser.parse_comment(comment, post_id, int(parent_id), keywords))
+            continue
+        records.append(parser.parse_comment(comment, post_id, keywords=keywords))
+        # Replies returned inline with the comment
+        for reply, reply_keywords in parser.filter_comments(comment.get('thread', {}).get('items', [])):
+            records.append(parser.parse_comment(reply, post_id, comment['id'], reply_keywords))
+    return records
+
+
+# Records of one NDJSON line or JSON array element
+def normalize_object(obj):
+    if not isinstance(obj, dict):
+        return []
+    if 'method' in obj:
+        return normalize(obj.get('response'), obj['method'], obj.get('params'))
+    return normalize(obj.get('response', obj))
+
+
+def read_ndjson(filename, start, end):
+    decode = _worker['decode']
+    with open(filename, 'rb') as f:
+        if start:
+            # A line crossing the start belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if line.strip():
+                try:
+                    yield decode(line)
+                except ValueError:
+                    _worker['bad_lines'] += 1
+
+
+def read_archive(filename, positions):
+    decode = _worker['decode']
+    with open(filename, 'rb') as f:
+        for key, offset, length in positions:
+            method, params = parse_key(key)
+            result = read_response(f, offset, length, decode)
+            yield {'method': method, 'params': params, 'response': result.get('response')}
+
+
+# Normalize one shard; returns (NDJSON bytes or records, counts by type, bad lines)
+def process_shard(shard):
+    _worker['bad_lines'] = 0
+    kind = shard[0]
+    if kind == 'ndjson':
+        objects = read_ndjson(*shard[1:])
+    elif kind == 'archive':
+        objects = read_archive(*shard[1:])
+    else:
+        objects = shard[1]
+    counts = {'post': 0, 'comment': 0, 'reply': 0}
+    records = []
+    for obj in objects:
+        for record in normalize_object(obj):
+            counts[record['type']] += 1
+            records.append(record)
+    if _worker['encode']:
+        # Same encoding as NDJSONSink
+        records = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+    return records, counts, _worker['bad_lines']
+
+
+# Split inputs into shards in input order; archives also give owner id -> domain of their wall.get requests
+# and user id -> names of their users.get answers, which the crawl looked up past page profiles
+def plan_shards(filenames, decoder, shard_bytes=SHARD_BYTES):
+    shards = []
+    domains = {}
+    users = {}
+    for filename in filenames:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == '.vka':
+            archive = ResponseArchive(filename, readonly=True, decoder=decoder)
+            try:
+                group, size = [], 0
+                for key, (offset, length) in archive.index.items():
+                    if key.startswith('wall.get?'):
+                        method, params = parse_key(key)
+                        for post in archive.get(method, params).get('response', {}).get('items', [])[:1]:
+                            domains.setdefault(community_id(post['owner_id']), params.get('domain'))
+                    elif key.startswith('users.get?'):
+                        for user in archive.get(*parse_key(key)).get('response', []):
+                            users[user['id']] = (user.get('first_name', ''), user.get('last_name', ''))
+                    group.append((key, offset, length))
+                    size += length + FRAME.size + len(key)
+                    if size >= shard_bytes // 4:  # Compressed, several times smaller than the JSON
+                        shards.append(('archive', filename, group))
+                        group, size = [], 0
+                if group:
+                    shards.append(('archive', filename, group))
+            finally:
+                archive.close()
+        elif extension == '.json':
+            with open(filename, 'rb') as f:
+                data = get_decoder(decoder)(f.read())
+            data = data if isinstance(data, list) else [data]
+            shards.extend(('objects', data[start:start + SHARD_RESPONSES])
+                          for start in range(0, len(data), SHARD_RESPONSES))
+        else:
+            size = os.path.getsize(filename)
+            shards.extend(('ndjson', filename, start, min(start + shard_bytes, size))
+                          for start in range(0, size, shard_bytes))
+    return shards, domains, users
+
+
+# Shard results in shard order, at most window shards in flight
+def ordered_results(executor, shards, window):
+    pending = deque()
+    for shard in shards:
+        pending.append(executor.submit(process_shard, shard))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class InlineExecutor:
+    """Runs shards in this process, for --workers 0."""
+
+    def __init__(self, options):
+        init_worker(options)
+
+    def submit(self, function, *args):
+        return InlineResult(function(*args))
+
+    def shutdown(self):
+        pass
+
+
+class InlineResult:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def reprocess(filenames, output, workers=None, domain=None, owner_id=None, decoder=None, keywords=None,
+              whole_words=False, profiles_file=None, shard_bytes=SHARD_BYTES):
+    started = time.monotonic()
+    workers = os.cpu_count() if workers is None else workers
+    owner_id = owner_id and community_id(owner_id)
+    shards, domains, users = plan_shards(filenames, decoder, shard_bytes)
+    encode = os.path.splitext(output)[1].lower() in ('.ndjson', '.jsonl')
+    options = {'domain': domain, 'owner_id': owner_id, 'domains': domains, 'users': users, 'decoder': decoder,
+               'keywords': keywords, 'whole_words': whole_words, 'profiles_file': profiles_file, 'encode': encode}
+
+    store = None
+    if encode:
+        out = open(output, 'wb')
+    elif is_sqlite_file(output):
+        store = SQLiteStore(output)
+        out = store.sink(owner_id)
+    else:
+        out = open_sink(output, fieldnames=RECORD_FIELDS)
+    executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(options,)) if workers \
+        else InlineExecutor(options)
+    counts = {'post': 0, 'comment': 0, 'reply': 0}
+    bad_lines = 0
+    try:
+        for records, shard_counts, shard_bad_lines in ordered_results(executor, shards, max(2, workers * 2)):
+            if encode:
+                out.write(records)
+            else:
+                for record in records:
+                    out.write(record)
+            for record_type, count in shard_counts.items():
+                counts[record_type] += count
+            bad_lines += shard_bad_lines
+    finally:
+        executor.shutdown()
+        out.close()
+        if store:
+            store.close()
+
+    seconds = time.monotonic() - started
+    total = sum(counts.values())
+    return {
+        'total': total,
+        'posts': counts['post'],
+        'comments': counts['comment'],
+        'replies': counts['reply'],
+        'bad_lines': bad_lines,
+        'shards': len(shards),
+        'workers': workers,
+        'seconds': round(seconds, 2),
+        'records_per_second': round(total / seconds) if seconds else None,
+        'output': output
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Повторный разбор сохраненных ответов API на всех ядрах")
+    parser.add_argument('inputs', nargs='+', help="Файлы *.ndjson, *.json или архивы *.vka")
+    parser.add_argument('-o', '--output', required=True, help="Файл результата: ndjson, csv, json, xlsx или db")
+    parser.add_argument('--workers', type=int, help="Процессов (по числу ядер; 0 — без пула)")
+    parser.add_argument('--domain', help="Адрес сообщества для ссылок")
+    parser.add_argument('--owner-id', help="ID сообщества, обязателен для db")
+    parser.add_argument('--keywords', help="Оставить записи с ключевыми словами из файла (по строке на слово)")
+    parser.add_argument('--whole-words', action='store_true', help="Только целые слова")
+    parser.add_argument('--profiles', help="Кэш имен авторов (profiles_file парсинга)")
+    parser.add_argument('--decoder', choices=sorted(DECODERS))
+    parser.add_argument('--shard-mb', type=float, default=SHARD_BYTES / 1024 / 1024, help="Размер части входа, МБ")
+    args = parser.parse_args(argv)
+
+    missing = [filename for filename in args.inputs if not os.path.exists(filename)]
+    if missing:
+        print(f"[Ошибка] Нет файлов: {', '.join(missing)}", file=sys.stderr)
+        return EXIT_USAGE
+    if is_sqlite_file(args.output) and not args.owner_id:
+        print("[Ошибка] Для записи в базу нужен --owner-id", file=sys.stderr)
+        return EXIT_USAGE
+    if args.owner_id:
+        try:
+            check_owner_id(args.owner_id)
+        except ValueError as e:
+            print(f"[Ошибка] {e}", file=sys.stderr)
+            return EXIT_USAGE
+    keywords = None
+    if args.keywords:
+        with open(args.keywords, encoding='utf-8') as f:
+            keywords = [row.strip() for row in f if row.strip()]
+
+    summary = reprocess(args.inputs, args.output, workers=args.workers, domain=args.domain,
+                        owner_id=args.owner_id, decoder=args.decoder,
+                        keywords=keywords, whole_words=args.whole_words, profiles_file=args.profiles,
+                        shard_bytes=max(1, int(args.shard_mb * 1024 * 1024)))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Member list snapshots of groups: import exports, list them and compare any two.
+
+    python src/snapshots.py list apiclub
+    python src/snapshots.py diff apiclub
+    python src/snapshots.py diff apiclub 20240501-000000 -1 -o results/apiclub_churn
+    python src/snapshots.py import apiclub results/apiclub_members.csv --taken 2024-05-01
+
+Snapshots are sorted id arrays in data/snapshots/<group_id>/<UTC time>.npy
+(--dir; <group_id>_<filter> for lists fetched with a filter such as friends),
+saved by member fetches with snapshots on or imported from csv, ndjson,
+json or db exports. A snapshot is given by its time, file name or index in
+the list (-1 is the latest); diff compares the last two by default and
+prints joined and left counts, -o also writes the ids to <prefix>_joined.csv
+and <prefix>_left.csv.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from vk_snapshots import SNAPSHOTS_DIR, MemberSnapshots, read_member_ids, write_ids
+
+
+EXIT_OK = 0
+EXIT_USAGE = 2
+
+
+class SnapshotError(Exception):
+    pass
+
+
+# Snapshot file of a group by time, file name or index in the list
+def find_snapshot(snapshots, group_id, name):
+    files = snapshots.list(group_id)
+    if os.path.isfile(name):
+        return name
+    for filename in files:
+        if os.path.basename(filename) in (name, f'{name}.npy'):
+            return filename
+    try:
+        return files[int(name)]
+    except (ValueError, IndexError):
+        raise SnapshotError(f"Нет снимка {name} группы {group_id}")
+
+
+def list_snapshots(snapshots, group_id):
+    files = snapshots.list(group_id)
+    for index, filename in enumerate(files):
+        print(f"{index:>4}  {snapshots.taken(filename):%Y-%m-%d %H:%M:%S}  {len(snapshots.load(filename)):>10}  "
+              f"{filename}")
+    if not files:
+        print(f"Снимков группы {group_id} нет в {snapshots.directory}")
+
+
+def diff_snapshots(snapshots, group_id, old, new, output=None):
+    old_file = find_snapshot(snapshots, group_id, old)
+    new_file = find_snapshot(snapshots, group_id, new)
+    started = time.perf_counter()
+    joined, left = snapshots.diff(old_file, new_file)
+    summary = {
+        'old': old_file,
+        'new': new_file,
+        'old_members': len(snapshots.load(old_file)),
+        'new_members': len(snapshots.load(new_file)),
+        'joined': len(joined),
+        'left': len(left),
+        'milliseconds': round((time.perf_counter() - started) * 1000, 1)
+    }
+    if output:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        summary['joined_file'] = f'{output}_joined.csv'
+        summary['left_file'] = f'{output}_left.csv'
+        write_ids(summary['joined_file'], joined)
+        write_ids(summary['left_file'], left)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Снимки списков участников групп и их сравнение")
+    parser.add_argument('--dir', default=SNAPSHOTS_DIR, help="Папка снимков")
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_parser = commands.add_parser('list', help="Снимки группы")
+    list_parser.add_argument('group_id')
+    diff_parser = commands.add_parser('diff', help="Вступившие и вышедшие между двумя снимками")
+    diff_parser.add_argument('group_id')
+    diff_parser.add_argument('old', nargs='?', default='-2', help="Старый снимок (по умолчанию предпоследний)")
+    diff_parser.add_argument('new', nargs='?', default='-1', help="Новый снимок (по умолчанию последний)")
+    diff_parser.add_argument('-o', '--output', help="Префикс файлов со списками id")
+    import_parser = commands.add_parser('import', help="Снимок из выгрузки участников")
+    import_parser.add_argument('group_id')
+    import_parser.add_argument('filename', help="Файл csv, ndjson, json или db")
+    import_parser.add_argument('--taken', help="Дата выгрузки: YYYY-MM-DD или YYYY-MM-DD HH:MM:SS (UTC)")
+    args = parser.parse_args(argv)
+
+    snapshots = MemberSnapshots(args.dir)
+    try:
+        if args.command == 'list':
+            list_snapshots(snapshots, args.group_id)
+        elif args.command == 'diff':
+            print(json.dumps(diff_snapshots(snapshots, args.group_id, args.old, args.new, args.output),
+                             ensure_ascii=False, indent=2))
+        else:
+            if not os.path.exists(args.filename):
+                raise SnapshotError(f"Нет файла {args.filename}")
+            try:
+                taken = datetime.fromisoformat(args.taken) if args.taken else None
+            except ValueError:
+                raise SnapshotError(f"Неверная дата: {args.taken}")
+            filename = snapshots.save(args.group_id, read_member_ids(args.filename, args.group_id), taken)
+            print(f"{filename}: {len(snapshots.load(filename))} участников")
+    except SnapshotError as e:
+        print(f'[Ошибка] {e}', file=sys.stderr)
+        return EXIT_USAGE
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from vk_records import DATE_FORMAT
+from vk_sinks import RecordSink
+
+
+CHUNK_SIZE = 50000  # Records buffered before they are added to the totals
+TOP_SIZE = 10  # Rows in top lists of the summary
+
+POST_COLUMNS = ['post_id', 'date', 'likes_count', 'reposts_count', 'comments_count', 'views_count',
+                'photo_count', 'video_count', 'keywords']
+COMMENT_COLUMNS = ['reply', 'date', 'user_id', 'post_id', 'parent_comment_id', 'likes_count', 'keywords']
+
+# Columns of the per-post CSV report
+POST_REPORT_FIELDS = [
+    'post_id', 'date', 'likes_count', 'reposts_count', 'comments_count', 'views_count', 'photo_count',
+    'video_count', 'parsed_comments', 'parsed_replies', 'comment_likes', 'engagement', 'engagement_rate'
+]
+
+# Upper bounds of reply thread size buckets
+THREAD_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+# Running total of two Series or DataFrames aligned on their index
+def add(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+# JSON-ready rows of a small DataFrame, NaN as None
+def frame_rows(frame):
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+class Analytics(RecordSink):
+    """Engagement, activity and keyword statistics of parsed records.
+
+    Receives records like a sink while parsing but only buffers a tuple of
+    the numbers it needs. Every chunk_size records the buffer becomes a
+    DataFrame and is added to running totals by vectorized group-bys, so
+    memory stays flat on long crawls and summary() only has the last chunk
+    left to fold. Posts are kept whole for per-post engagement.
+    """
+
+    def __init__(self, keywords=None, chunk_size=CHUNK_SIZE):
+        self.keywords = list(keywords or [])  # Folded keywords reported even without hits
+        self.chunk_size = chunk_size
+        self.counts = np.zeros(3, dtype=np.int64)  # Posts, comments, replies folded so far
+        self._posts = []  # Buffered tuples in POST_COLUMNS order
+        self._comments = []  # Buffered tuples in COMMENT_COLUMNS order
+        self._post_frames = []
+        self._by_day = None  # Comments and replies per day
+        self._by_hour = np.zeros(24, dtype=np.int64)  # Comments and replies per hour of day, UTC
+        self._authors = None  # user_id -> comments, replies, likes
+        self._post_activity = None  # post_id -> parsed_comments, parsed_replies, comment_likes
+        self._threads = None  # Top-level comment id -> replies
+        self._keyword_hits = None  # Keywords of a record as joined by the parser -> records
+
+    def write(self, record):
+        if record['type'] == 'post':
+            self._posts.append((record['post_id'], record['date'], record['likes_count'], record['reposts_count'],
+                                record['comments_count'], record['views_count'], record['photo_count'],
+                                record['video_count'], record.get('keywords')))
+        else:
+            self._comments.append((record['type'] == 'reply', record['date'], int(record['user_id']),
+                                   record['post_id'], record.get('parent_comment_id', 0), record['likes_count'],
+                                   record.get('keywords')))
+        if len(self._posts) + len(self._comments) >= self.chunk_size:
+            self.flush()
+
+    # Fold buffered records into the totals
+    def flush(self):
+        if self._posts:
+            posts = pd.DataFrame.from_records(self._posts, columns=POST_COLUMNS)
+            self._posts = []
+            posts['date'] = pd.to_datetime(posts['date'], format=DATE_FORMAT)
+            self._post_frames.append(posts)
+            self.counts[0] += len(posts)
+            self._add_keywords(posts['keywords'])
+        if self._comments:
+            comments = pd.DataFrame.from_records(self._comments, columns=COMMENT_COLUMNS)
+            self._comments = []
+            self._fold_comments(comments)
+
+    def _fold_comments(self, comments):
+        replies = comments['reply'].to_numpy()
+        reply_count = int(replies.sum())
+        self.counts[1] += len(comments) - reply_count
+        self.counts[2] += reply_count
+
+        dates = pd.to_datetime(comments['date'], format=DATE_FORMAT)
+        self._by_day = add(self._by_day, dates.dt.floor('D').value_counts())
+        self._by_hour += np.bincount(dates.dt.hour.to_numpy(), minlength=24)
+
+        comments['comment'] = ~comments['reply']
+        self._authors = add(self._authors, comments.groupby('user_id').agg(
+            comments=('comment', 'sum'), replies=('reply', 'sum'), likes=('likes_count', 'sum')))
+        self._post_activity = add(self._post_activity, comments.groupby('post_id').agg(
+            parsed_comments=('comment', 'sum'), parsed_replies=('reply', 'sum'),
+            comment_likes=('likes_count', 'sum')))
+        if reply_count:
+            self._threads = add(self._threads, comments.loc[replies, 'parent_comment_id'].value_counts())
+        self._add_keywords(comments['keywords'])
+
+    def _add_keywords(self, keywords):
+        hits = keywords.value_counts()
+        if len(hits):
+            self._keyword_hits = add(self._keyword_hits, hits)
+
+    # One row per parsed post with its engagement: likes, reposts and comments, and their share of views
+    def posts(self):
+        self.flush()
+        if len(self._post_frames) > 1:
+            self._post_frames = [pd.concat(self._post_frames, ignore_index=True)]
+        if self._post_frames:
+            posts = self._post_frames[0].drop(columns='keywords')
+        else:
+            posts = pd.DataFrame({column: pd.Series(dtype=np.int64) for column in POST_COLUMNS[:-1]})
+            posts['date'] = pd.to_datetime(posts['date'])
+        if self._post_activity is not None:
+            posts = posts.join(self._post_activity, on='post_id')
+        posts = posts.reindex(columns=POST_REPORT_FIELDS)
+        activity = ['parsed_comments', 'parsed_replies', 'comment_likes']
+        posts[activity] = posts[activity].fillna(0).astype(np.int64)
+        posts['engagement'] = posts['likes_count'] + posts['reposts_count'] + posts['comments_count']
+        views = posts['views_count'].where(posts['views_count'] > 0)
+        posts['engagement_rate'] = (posts['engagement'] / views).round(4)
+        return posts
+
+    # Statistics of everything written so far; names maps a user id to (first_name, last_name) or None
+    def summary(self, names=None, top=TOP_SIZE):
+        posts = self.posts()
+        total = int(self.counts.sum())
+        return {
+            'records': total,
+            'posts': self._post_summary(posts, top),
+            'comments_by_day': self._day_summary(),
+            'comments_by_hour': self._by_hour.tolist(),
+            'top_commenters': self._author_summary(names, top),
+            'threads': self._thread_summary(),
+            'keywords': self._keyword_summary(total)
+        }
+
+    def _post_summary(self, posts, top):
+        rates = posts['engagement_rate'].dropna()
+        best = posts.nlargest(top, 'engagement').copy()
+        best['date'] = best['date'].dt.strftime(DATE_FORMAT)
+        return {
+            'count': len(posts),
+            'likes': int(posts['likes_count'].sum()),
+            'reposts': int(posts['reposts_count'].sum()),
+            'comments': int(posts['comments_count'].sum()),
+            'views': int(posts['views_count'].sum()),
+            'engagement_mean': round(float(posts['engagement'].mean()), 2) if len(posts) else 0,
+            'engagement_median': float(posts['engagement'].median()) if len(posts) else 0,
+            'engagement_rate_mean': round(float(rates.mean()), 4) if len(rates) else None,
+            'top': frame_rows(best)
+        }
+
+    def _day_summary(self):
+        if self._by_day is None:
+            return {}
+        days = self._by_day.sort_index().astype(np.int64)
+        return dict(zip(days.index.strftime('%Y-%m-%d'), days.tolist()))
+
+    def _author_summary(self, names, top):
+        if self._authors is None:
+            return []
+        authors = self._authors.astype(np.int64)
+        authors['total'] = authors['comments'] + authors['replies']
+        best = authors.nlargest(top, 'total').drop(columns='total').reset_index()
+        rows = frame_rows(best)
+        for row in rows:
+            name = names(row['user_id']) if names else None
+            row['name'] = ' '.join(name).strip() if name else None
+        return rows
+
+    # VK threads are one level deep: replies hang off a top-level comment
+    def _thread_summary(self):
+        comments = int(self.counts[1])
+        if self._threads is None:
+            return {'threads': 0, 'share': 0.0, 'replies_mean': 0, 'replies_max': 0, 'sizes': {}}
+        sizes = self._threads.to_numpy(dtype=np.int64)
+        bounds = np.searchsorted(THREAD_BUCKETS, sizes)
+        buckets = np.bincount(bounds, minlength=len(THREAD_BUCKETS) + 1)
+        labels = [f'<={bound}' for bound in THREAD_BUCKETS] + [f'>{THREAD_BUCKETS[-1]}']
+        return {
+            'threads': len(sizes),
+            'share': round(len(sizes) / comments, 4) if comments else None,
+            'replies_mean': round(float(sizes.mean()), 2),
+            'replies_max': int(sizes.max()),
+            'sizes': dict(zip(labels, buckets.tolist()))
+        }
+
+    # Records with each keyword and their share of all records
+    def _keyword_summary(self, total):
+        hits = pd.Series(0, index=pd.Index(self.keywords, dtype=object), dtype=np.int64)
+        if self._keyword_hits is not None:
+            combinations = pd.DataFrame({'keyword': self._keyword_hits.index.str.split(', '),
+                                         'records': self._keyword_hits.to_numpy(dtype=np.int64)})
+            found = combinations.explode('keyword').groupby('keyword')['records'].sum()
+            hits = found.add(hits, fill_value=0).astype(np.int64)
+        hits = hits.sort_values(ascending=False, kind='stable')
+        return {keyword: {'records': count, 'rate': round(count / total, 4) if total else 0.0}
+                for keyword, count in zip(hits.index, hits.tolist())}
+
+    # Per-post table for *.csv names, the summary as JSON otherwise
+    def write_report(self, filename, names=None):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.splitext(filename)[1].lower() == '.csv':
+            self.posts().to_csv(filename, index=False, date_format=DATE_FORMAT, encoding='utf-8')
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(names), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,98 @@
+import time
+
+import aiohttp
+
+from vk_json import get_decoder
+from vk_metrics import Metrics
+
+
+API_URL = 'https://api.vk.com/method/'
+API_VERSION = '5.131'
+
+
+class VKApi:
+    """Pooled HTTP client for api.vk.com shared by parsers for their whole lifetime."""
+
+    def __init__(self, proxy=None, limit=100, limit_per_host=20, dns_ttl=300, keepalive_timeout=75, timeout=60, api_url=API_URL,
+                 metrics=None, decoder=None):
+        self.api_url = api_url
+        self.proxy = proxy
+        self.limit = limit  # Total simultaneous connections
+        self.limit_per_host = limit_per_host  # Simultaneous connections to api.vk.com
+        self.dns_ttl = dns_ttl  # Seconds to keep resolved addresses
+        self.keepalive_timeout = keepalive_timeout  # Seconds to keep idle connections open
+        self.timeout = timeout
+        self._session = None
+        # Function decoding response bytes; name in vk_json.DECODERS, fastest installed by default
+        self.decode = decoder if callable(decoder) else get_decoder(decoder)
+        self.metrics = metrics or Metrics()  # Per-method traffic, shared with limiter and retry policy
+        self.stats = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0
+        }
+
+    # Connection tracing callbacks
+    async def _on_connection_create(self, session, context, params):
+        self.stats['connections_created'] += 1
+
+    async def _on_connection_reuse(self, session, context, params):
+        self.stats['connections_reused'] += 1
+
+    # Session is created lazily so it binds to the loop of the calling thread
+    async def get_session(self):
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[trace_config],
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    # Call API method and return raw response bytes
+    async def request(self, method, params):
+        session = await self.get_session()
+        data = {'v': API_VERSION}
+        data.update({k: v for k, v in params.items() if v is not None})
+
+        self.stats['requests'] += 1
+        started = time.perf_counter()
+        async with session.post(f'{self.api_url}{method}', data=data, proxy=self.proxy) as response:
+            body = await response.read()
+        self.metrics.observe_request(method, time.perf_counter() - started, len(body))
+        return body
+
+    # Call API method and return decoded JSON result
+    async def call(self, method, params):
+        body = await self.request(method, params)
+        started = time.perf_counter()
+        result = self.decode(body)
+        self.metrics.observe_decode(method, time.perf_counter() - started)
+        return result
+
+    def connection_stats(self):
+        created = self.stats['connections_created']
+        reused = self.stats['connections_reused']
+        total = created + reused
+        return {
+            'requests': self.stats['requests'],
+            'connections_created': created,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / total, 3) if total else 0.0
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
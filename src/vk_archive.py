@@ -0,0 +1,157 @@
+import os
+import struct
+import zlib
+from urllib.parse import parse_qsl, urlencode
+
+from vk_json import encode, get_decoder
+from vk_retry import RETRY_ERROR_CODES, error_code
+
+
+# Frame header: magic, key length, compressed response length
+FRAME = struct.Struct('<4sII')
+MAGIC = b'VKR1'
+
+# Error returned in replay mode for requests the archive has no answer to
+ARCHIVE_MISS = 'archive_miss'
+
+
+# Archive key of a request: method and sorted params without the token
+def request_key(method, params):
+    items = sorted((key, str(value)) for key, value in params.items()
+                   if value is not None and key != 'access_token')
+    return f'{method}?{urlencode(items)}'
+
+
+# Method and params of an archive key, param values as strings
+def parse_key(key):
+    method, _, query = key.partition('?')
+    return method, dict(parse_qsl(query, keep_blank_values=True))
+
+
+# Response stored at a payload position of the index, read from an open archive file
+def read_response(f, offset, length, decode):
+    f.seek(offset)
+    return decode(zlib.decompress(f.read(length)))
+
+
+class ResponseArchive:
+    """Append-only file of raw API responses indexed by method and params.
+
+    Every response is stored as a zlib-compressed frame after a header with
+    its request key. The file is only ever appended to, so a crash leaves
+    at most a partial last frame, which is cut off when the archive is
+    opened again. The key index is rebuilt on open from the headers alone,
+    payloads are skipped; a request archived again shadows its earlier
+    answer. replay() answers requests from the archive without the network.
+    """
+
+    def __init__(self, filename, readonly=False, level=6, decoder=None):
+        self.filename = filename
+        self.readonly = readonly
+        self.level = level  # zlib compression level
+        self.decode = decoder if callable(decoder) else get_decoder(decoder)
+        self.index = {}  # Request key -> (payload offset, payload length)
+        self._users = None  # users.get answers by user id, built on first replay of users.get
+        self.stats = {'appended': 0, 'raw_bytes': 0, 'compressed_bytes': 0, 'hits': 0, 'misses': 0}
+
+        if readonly:
+            self._file = open(filename, 'rb')
+        else:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(filename, 'a+b')
+        self._load()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def _load(self):
+        f = self._file
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        offset = 0
+        f.seek(0)
+        while offset + FRAME.size <= size:
+            magic, key_length, length = FRAME.unpack(f.read(FRAME.size))
+            end = offset + FRAME.size + key_length + length
+            if magic != MAGIC or end > size:
+                break
+            key = f.read(key_length).decode('utf-8')
+            self.index[key] = (offset + FRAME.size + key_length, length)
+            f.seek(length, os.SEEK_CUR)
+            offset = end
+        if offset < size:
+            if self.readonly:
+                print(f'[Архив] {self.filename}: последняя запись обрезана, она пропущена')
+            else:
+                f.truncate(offset)
+        f.seek(0, os.SEEK_END)
+
+    # Store the final answer to a request; answers to retry exhaustion are not worth replaying
+    def append(self, method, params, result):
+        if self.readonly or error_code(result) in RETRY_ERROR_CODES:
+            return
+        key = request_key(method, params).encode('utf-8')
+        raw = encode(result)
+        payload = zlib.compress(raw, self.level)
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(FRAME.pack(MAGIC, len(key), len(payload)) + key + payload)
+        self.index[key.decode('utf-8')] = (offset + FRAME.size + len(key), len(payload))
+        self.stats['appended'] += 1
+        self.stats['raw_bytes'] += len(raw)
+        self.stats['compressed_bytes'] += len(payload)
+
+    def get(self, method, params):
+        return self._read(request_key(method, params))
+
+    def _read(self, key):
+        position = self.index.get(key)
+        if position is None:
+            return None
+        result = read_response(self._file, *position, self.decode)
+        self._file.seek(0, os.SEEK_END)
+        return result
+
+    # (method, params, response) of every archived request, latest answer per key
+    def __iter__(self):
+        for key in list(self.index):
+            yield (*parse_key(key), self._read(key))
+
+    # Answer a request like VKParser.requests_func would, from the archive alone
+    def replay(self, method, params):
+        result = self.get(method, params)
+        if result is None and method == 'users.get':
+            result = self._replay_users(params)
+        if result is None:
+            self.stats['misses'] += 1
+            return {'error': {'error_code': ARCHIVE_MISS,
+                              'error_msg': f'Нет в архиве: {request_key(method, params)}'}}
+        self.stats['hits'] += 1
+        return result
+
+    # users.get ids are batched differently every run, so users are looked up one by one
+    def _replay_users(self, params):
+        if self._users is None:
+            self._users = {}
+            for key in list(self.index):
+                if key.startswith('users.get?'):
+                    for user in self._read(key).get('response', []):
+                        self._users[user['id']] = user
+        ids = [int(user_id) for user_id in str(params.get('user_ids', '')).split(',') if user_id]
+        return {'response': [self._users[user_id] for user_id in ids if user_id in self._users]}
+
+    def flush(self):
+        if not self.readonly:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def summary(self):
+        return dict(self.stats, requests=len(self.index), file_bytes=os.path.getsize(self.filename))
@@ -0,0 +1,49 @@
+import json
+import os
+
+
+class CrawlCheckpoint:
+    """State of the previous crawl of one community for incremental runs.
+
+    Keeps the highest post id seen and, per post, the comment count together
+    with the last top-level comment id and the highest comment/reply id.
+    VK comment ids grow monotonically, so anything above max_comment_id is new.
+    """
+
+    def __init__(self, filename, max_posts=10000):
+        self.filename = filename
+        self.max_posts = max_posts  # Newest posts kept in the file
+        self.max_post_id = 0
+        self.posts = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.max_post_id = data.get('max_post_id', 0)
+        self.posts = {int(post_id): state for post_id, state in data.get('posts', {}).items()}
+
+    def get(self, post_id):
+        return self.posts.get(post_id)
+
+    def update(self, post_id, comments_count, last_comment_id=None, max_comment_id=None):
+        previous = self.posts.get(post_id, {})
+        self.posts[post_id] = {
+            'comments_count': comments_count,
+            'last_comment_id': max(last_comment_id or 0, previous.get('last_comment_id') or 0) or None,
+            'max_comment_id': max(max_comment_id or 0, previous.get('max_comment_id') or 0) or None
+        }
+        self.max_post_id = max(self.max_post_id, post_id)
+
+    def save(self):
+        posts = sorted(self.posts.items(), reverse=True)[:self.max_posts]
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f'{self.filename}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'max_post_id': self.max_post_id, 'posts': {str(k): v for k, v in posts}}, f)
+        os.replace(tmp_file, self.filename)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+
+# Maximum number of API calls VK allows inside one execute request
+MAX_EXECUTE_CALLS = 25
+
+# Methods that are safe to pack into execute
+BATCHED_METHODS = {'wall.get', 'wall.getComments'}
+
+# VKScript runtime error (includes "response size is too big")
+RUNTIME_ERROR_CODE = 13
+
+
+# Build VKScript code returning results of all calls as an array
+def build_execute_code(calls):
+    parts = []
+    for method, params in calls:
+        params = {k: v for k, v in params.items() if v is not None}
+        args = json.dumps(params, ensure_ascii=False, separators=(',', ':'))
+        parts.append(f'API.{method}({args})')
+    return 'return [' + ','.join(parts) + '];'
+
+
+class ExecuteBatcher:
+    """Packs concurrent API calls into execute requests and fans results back out.
+
+    A single runner waits for a rate limiter slot and only then takes up to
+    25 pending calls, so batches fill up while requests are throttled.
+    Every caller gets its own result dict: {'response': ...} or {'error': ...}.
+    """
+
+    def __init__(self, acquire, send, max_calls=MAX_EXECUTE_CALLS, window=0.01):
+        self.acquire = acquire  # Coroutine (method) -> access token for the next request
+        self.send = send  # Coroutine (method, params) -> decoded API result
+        self.max_calls = min(max_calls, MAX_EXECUTE_CALLS)
+        self.window = window  # Seconds to collect calls before sending a partial batch
+        self._pending = []
+        self._runner = None
+        self._tasks = set()
+        self.stats = {
+            'calls': 0,
+            'requests': 0
+        }
+
+    async def call(self, method, params):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((method, params, future))
+        self.stats['calls'] += 1
+        self._schedule()
+        return await future
+
+    def _schedule(self):
+        if self._pending and self._runner is None:
+            self._runner = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            if len(self._pending) < self.max_calls:
+                await asyncio.sleep(self.window)
+            token = await self.acquire('execute')
+        except BaseException as e:
+            self._runner = None
+            self._fail(self._pending, e)
+            self._pending = []
+            raise
+
+        batch = self._pending[:self.max_calls]
+        del self._pending[:self.max_calls]
+        self._runner = None
+        self._schedule()
+
+        task = asyncio.ensure_future(self._send_batch(token, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, token, batch):
+        if len(batch) == 1:
+            await self._send_single(batch[0], token)
+            return
+
+        self.stats['requests'] += 1
+        try:
+            code = build_execute_code([(method, params) for method, params, _ in batch])
+            result = await self.send('execute', {'access_token': token, 'code': code})
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        if 'error' in result:
+            if result['error'].get('error_code') == RUNTIME_ERROR_CODE:
+                # Script failed as a whole, send calls one by one instead
+                await asyncio.gather(*[self._send_single(call) for call in batch])
+                return
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+            return
+
+        self._fan_out(batch, result)
+
+    async def _send_single(self, call, token=None):
+        method, params, future = call
+        self.stats['requests'] += 1
+        try:
+            if token is None:
+                token = await self.acquire(method)
+            result = await self.send(method, {'access_token': token, **params})
+        except Exception as e:
+            self._fail([call], e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    # Distribute execute results between callers
+    def _fan_out(self, batch, result):
+        responses = result.get('response') or []
+        errors = iter(result.get('execute_errors', []))
+        for i, (method, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            item = responses[i] if i < len(responses) else False
+            if item is False:
+                error = next(errors, None) or {'error_code': 0, 'error_msg': 'execute call failed', 'method': method}
+                future.set_result({'error': error})
+            else:
+                future.set_result({'response': item})
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,32 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library decoder is used without it
+    orjson = None
+
+
+# Decoders of JSON response bytes by name
+DECODERS = {
+    'json': json.loads  # Detects UTF-8 in bytes itself, no separate decode to str
+}
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+DEFAULT_DECODER = 'orjson' if orjson is not None else 'json'
+
+
+# JSON bytes of an object, with orjson when installed
+def encode(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# Decoder function for a name, or the fastest one installed for None
+def get_decoder(name=None):
+    name = name or DEFAULT_DECODER
+    try:
+        return DECODERS[name]
+    except KeyError:
+        raise ValueError(f"Декодер JSON недоступен: {name} (есть: {', '.join(DECODERS)})")
@@ -0,0 +1,78 @@
+from collections import deque
+
+
+# Normalize text for matching: full Unicode case folding, ё is matched as е
+def fold(text):
+    return text.casefold().replace('ё', 'е')
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton matching all keywords in one pass over the text."""
+
+    def __init__(self, keywords, whole_words=False):
+        self.whole_words = whole_words  # Keyword must not be a part of a longer word
+        self.keywords = []
+        self._goto = [{}]  # State -> {char: next state}
+        self._fail = [0]
+        self._output = [()]  # State -> indices of keywords ending here
+
+        for keyword in dict.fromkeys(fold(k.strip()) for k in keywords):
+            if keyword:
+                self._add(keyword)
+        self._build()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, keyword):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (len(self.keywords),)
+        self.keywords.append(keyword)
+
+    # Breadth-first pass setting failure links and merging outputs
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def _scan(self, text):
+        text = fold(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                if self.whole_words:
+                    start = end - len(self.keywords[index]) + 1
+                    if (start > 0 and text[start - 1].isalnum()) or (end + 1 < len(text) and text[end + 1].isalnum()):
+                        continue
+                yield index
+
+    # Matched keywords in the order they are listed
+    def find(self, text):
+        found = set(self._scan(text))
+        return [self.keywords[index] for index in sorted(found)]
+
+    # True on the first match
+    def matches(self, text):
+        for _ in self._scan(text):
+            return True
+        return False
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+
+# VK API request limits per access token (requests per second)
+RATE_LIMITS = {
+    'user': 3,
+    'group': 20
+}
+
+
+class TokenBucket:
+    """Async token bucket; waiters reserve a slot and sleep exactly until it comes."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # Tokens per second
+        self.capacity = capacity  # Burst size; 1 keeps requests evenly spaced
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Seconds until the next request could be sent without waiting
+    def next_available(self):
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    # Change the rate, tokens gathered so far are kept
+    def set_rate(self, rate):
+        self._refill()
+        self.rate = rate
+
+    # Take one token, sleeping until the reserved slot; returns time waited
+    async def acquire(self):
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        await asyncio.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """One bucket per access token, rotating requests across tokens.
+
+    A rate limit error halves the rate and caps it just below the rate that
+    failed; successful requests raise it back in small steps up to that cap,
+    so the request rate settles under the real limit of the tokens. After
+    probe_after successes at the cap it is raised a little towards max_rate,
+    so sporadic errors do not keep a long run slow.
+    """
+
+    def __init__(self, tokens, token_type='user', rate=None, window=1.0, metrics=None, probe_after=20):
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        if not tokens:
+            raise ValueError("Нужен хотя бы один токен")
+        self.tokens = list(tokens)
+        self.rate = rate or RATE_LIMITS[token_type]
+        self.buckets = [TokenBucket(self.rate) for _ in self.tokens]
+        self._next = 0
+        self.wait_time = 0.0  # Total time spent waiting for slots
+        self.max_rate = self.rate  # Never exceeded
+        self.ceiling = self.rate  # Highest rate that did not hit the limit
+        self.window = window  # Seconds VK counts requests over
+        self._limited_at = None  # Time of the last slowdown
+        self.rate_limits = 0  # Rate limit errors that slowed requests down
+        self.probe_after = probe_after  # Successes at the ceiling before trying a higher one
+        self._successes = 0  # Successes at the ceiling since it was last changed
+        self.metrics = metrics  # Wait time per method when set
+
+    # Total requests per second across all tokens
+    @property
+    def throughput(self):
+        return self.rate * len(self.tokens)
+
+    # Pick the token that frees up first, starting from the round-robin position
+    def _pick(self):
+        count = len(self.buckets)
+        best = self._next
+        best_wait = self.buckets[best].next_available()
+        for step in range(1, count):
+            if best_wait == 0:
+                break
+            index = (self._next + step) % count
+            wait = self.buckets[index].next_available()
+            if wait < best_wait:
+                best, best_wait = index, wait
+        self._next = (best + 1) % count
+        return best
+
+    # Wait for a request slot and return the token to use for it
+    async def acquire(self, method=None):
+        index = self._pick()
+        waited = await self.buckets[index].acquire()
+        self.wait_time += waited
+        if self.metrics is not None and method:
+            self.metrics.observe_wait(method, waited)
+        return self.tokens[index]
+
+    def _set_rate(self, rate):
+        self.rate = rate
+        for bucket in self.buckets:
+            bucket.set_rate(rate)
+
+    # Multiplicative decrease after a rate limit error of a request started at started_at
+    def rate_limited(self, started_at=None):
+        if started_at is None:
+            started_at = time.monotonic()
+        if self._limited_at is not None and started_at < self._limited_at + self.window:
+            return  # Requests of the old rate are still counted by VK, the slowdown already covers them
+        self._limited_at = time.monotonic()
+        self.rate_limits += 1
+        self._successes = 0
+        self.ceiling = max(self.max_rate * 0.05, self.rate * 0.9)
+        self._set_rate(max(self.max_rate * 0.05, self.rate * 0.5))
+
+    # Additive increase after a successful request
+    def recover(self):
+        if self.rate < self.ceiling:
+            self._set_rate(min(self.ceiling, self.rate + self.ceiling * 0.02))
+        elif self.ceiling < self.max_rate:
+            # No errors for a while at the ceiling, probe a bit higher
+            self._successes += 1
+            if self._successes >= self.probe_after:
+                self._successes = 0
+                self.ceiling = min(self.max_rate, self.ceiling + self.max_rate * 0.05)
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from vk_metrics import Metrics
+from vk_retry import RetryPolicy, NETWORK_ERRORS
+
+
+# Bytes read from a response and written to disk at a time
+CHUNK_SIZE = 64 * 1024
+
+# HTTP statuses worth retrying, anything else but success fails the file
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Failed downloads kept for the summary
+MAX_ERRORS = 100
+
+INDEX_FILE = 'index.ndjson'
+PARTS_DIR = '.parts'
+
+
+class MediaError(Exception):
+    """Media file can not be downloaded, retrying will not help."""
+
+
+class MediaDownloader:
+    """Downloads photos and video previews of parsed posts and comments.
+
+    URLs are queued with add() while the crawl goes on and fetched by a
+    pool of workers sharing one pooled session. Every file is streamed to
+    disk in chunks while its SHA-256 is computed and stored under that
+    hash, so the same picture behind different URLs is kept once and a URL
+    is never queued twice. An interrupted download continues from its
+    .part file with a Range request; finished ones are listed in
+    index.ndjson and skipped by the next run.
+    """
+
+    def __init__(self, directory, workers=16, limit_per_host=8, chunk_size=CHUNK_SIZE, timeout=60, proxy=None,
+                 retry=None, metrics=None):
+        self.directory = directory
+        self.workers = workers  # Files downloaded at once
+        self.limit_per_host = limit_per_host  # Connections to one media server
+        self.chunk_size = chunk_size
+        self.timeout = timeout  # Seconds to connect or wait for the next chunk
+        self.proxy = proxy
+        self.metrics = metrics or Metrics()  # Own by default, media traffic is not API traffic
+        self.retry = retry or RetryPolicy(max_attempts=4, metrics=self.metrics)
+        self._session = None
+        self._queue = asyncio.Queue()
+        self._workers = []
+        self._seen = set()  # URLs downloaded or queued
+        self._hashes = {}  # SHA-256 -> file relative to directory
+        self.errors = []
+        self.stats = {
+            'queued': 0,
+            'downloaded': 0,
+            'resumed': 0,
+            'duplicates': 0,
+            'failed': 0,
+            'bytes': 0
+        }
+
+        os.makedirs(os.path.join(directory, PARTS_DIR), exist_ok=True)
+        self._load_index()
+        self._index = open(os.path.join(directory, INDEX_FILE), 'a', encoding='utf-8')
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut off by a crash
+                    self._seen.add(entry['url'])
+                    self._hashes.setdefault(entry['sha256'], entry['file'])
+        except OSError:
+            pass
+
+    async def get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.workers, limit_per_host=self.limit_per_host,
+                                             use_dns_cache=True, ttl_dns_cache=300)
+            # No total timeout, large files take long as long as data keeps coming
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    # Queue a URL unless it was seen before; info (post_id, comment_id, kind...) goes to the index
+    def add(self, url, **info):
+        if not url or url in self._seen:
+            return False
+        self._seen.add(url)
+        self._queue.put_nowait((url, info))
+        self.stats['queued'] += 1
+        if not self._workers:
+            self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        return True
+
+    async def _worker(self):
+        while True:
+            url, info = await self._queue.get()
+            try:
+                await self.download(url, info)
+            finally:
+                self._queue.task_done()
+
+    # Download one URL, returns its index entry or None if it failed
+    async def download(self, url, info=None):
+        part_file = os.path.join(self.directory, PARTS_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+        try:
+            digest, size = await self.retry.call(lambda: self._fetch(url, part_file), 'media')
+        except (MediaError, OSError, *NETWORK_ERRORS) as e:
+            self.stats['failed'] += 1
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append({'url': url, 'error': str(e) or type(e).__name__})
+            return None
+
+        existing = self._hashes.get(digest)
+        if existing is not None:
+            os.remove(part_file)
+            self.stats['duplicates'] += 1
+            filename = existing
+        else:
+            extension = os.path.splitext(urlsplit(url).path)[1].lower()
+            filename = f'{digest[:2]}/{digest}{extension if len(extension) <= 5 else ""}'
+            path = os.path.join(self.directory, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(part_file, path)
+            self._hashes[digest] = filename
+        entry = {'url': url, 'file': filename, 'sha256': digest, 'size': size, **(info or {})}
+        self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._index.flush()
+        return entry
+
+    # One attempt: continue the .part file, returns (sha256, size) of the whole file
+    async def _fetch(self, url, part_file):
+        session = await self.get_session()
+        offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        started = time.perf_counter()
+        received = 0
+        sha256 = hashlib.sha256()
+        async with session.get(url, headers=headers, proxy=self.proxy) as response:
+            if response.status == 416 and offset:
+                # Whole file is in .part already, the run stopped before moving it in place
+                self._hash_file(part_file, sha256)
+            elif response.status in RETRY_STATUSES:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                  message=response.reason or '')
+            elif response.status not in (200, 206):
+                raise MediaError(f'HTTP {response.status}')
+            else:
+                if response.status == 206 and offset:
+                    self.stats['resumed'] += 1
+                    self._hash_file(part_file, sha256)
+                else:
+                    offset = 0  # Server ignored the range, start over
+                with open(part_file, 'ab' if offset else 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        received += len(chunk)
+        self.metrics.observe_request('media', time.perf_counter() - started, received)
+        self.stats['bytes'] += received
+        self.stats['downloaded'] += 1
+        return sha256.hexdigest(), offset + received
+
+    @staticmethod
+    def _hash_file(filename, sha256):
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+
+    # Wait until every queued URL is downloaded or failed
+    async def join(self):
+        await self._queue.join()
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if not self._index.closed:
+            self._index.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def summary(self):
+        return dict(self.stats, pending=self._queue.qsize(), files=len(self._hashes), errors=self.errors)
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+
+# Upper bounds of latency histogram buckets, seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, cumulative on export like Prometheus."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    # Approximate quantile: upper bound of the bucket holding it
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class MethodMetrics:
+    def __init__(self):
+        self.requests = 0  # HTTP requests
+        self.calls = 0  # API calls, each execute request carries up to 25
+        self.bytes = 0  # Response bytes received
+        self.decode_time = 0.0  # Seconds spent decoding JSON
+        self.limiter_wait = 0.0  # Seconds spent waiting for rate limiter slots
+        self.retries = 0
+        self.errors = defaultdict(int)  # VK error code or 'network' -> count
+        self.request_latency = Histogram()  # Network time of HTTP requests
+        self.call_latency = Histogram()  # Whole call: limiter, batching, network, retries
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'calls': self.calls,
+            'bytes': self.bytes,
+            'decode_seconds': round(self.decode_time, 4),
+            'limiter_wait_seconds': round(self.limiter_wait, 4),
+            'retries': self.retries,
+            'errors': {str(code): count for code, count in self.errors.items()},
+            'request_latency': {
+                'count': self.request_latency.count,
+                'sum': round(self.request_latency.sum, 4),
+                'p50': self.request_latency.quantile(0.5),
+                'p95': self.request_latency.quantile(0.95),
+                'buckets': {str(bound): count for bound, count in self.request_latency.cumulative()}
+            },
+            'call_latency': {
+                'count': self.call_latency.count,
+                'sum': round(self.call_latency.sum, 4),
+                'p50': self.call_latency.quantile(0.5),
+                'p95': self.call_latency.quantile(0.95),
+                'buckets': {str(bound): count for bound, count in self.call_latency.cumulative()}
+            }
+        }
+
+
+class Metrics:
+    """Per-method counters of API traffic, filled by VKApi, RateLimiter and RetryPolicy."""
+
+    def __init__(self):
+        self.methods = defaultdict(MethodMetrics)
+        self.started = time.time()
+
+    def observe_request(self, method, seconds, size):
+        metrics = self.methods[method]
+        metrics.requests += 1
+        metrics.bytes += size
+        metrics.request_latency.observe(seconds)
+
+    def observe_decode(self, method, seconds):
+        self.methods[method].decode_time += seconds
+
+    def observe_wait(self, method, seconds):
+        self.methods[method].limiter_wait += seconds
+
+    def observe_call(self, method, seconds):
+        metrics = self.methods[method]
+        metrics.calls += 1
+        metrics.call_latency.observe(seconds)
+
+    def observe_error(self, method, error):
+        self.methods[method].errors[error] += 1
+
+    def observe_retry(self, method):
+        self.methods[method].retries += 1
+
+    def totals(self):
+        methods = self.methods.values()
+        return {
+            'requests': sum(m.requests for m in methods),
+            'calls': sum(m.calls for m in methods),
+            'bytes': sum(m.bytes for m in methods),
+            'network_seconds': round(sum(m.request_latency.sum for m in methods), 3),
+            'decode_seconds': round(sum(m.decode_time for m in methods), 3),
+            'limiter_wait_seconds': round(sum(m.limiter_wait for m in methods), 3),
+            'retries': sum(m.retries for m in methods),
+            'errors': sum(sum(m.errors.values()) for m in methods)
+        }
+
+    def snapshot(self):
+        return {
+            'started': self.started,
+            'elapsed_seconds': round(time.time() - self.started, 3),
+            'totals': self.totals(),
+            'methods': {method: metrics.to_dict() for method, metrics in sorted(self.methods.items())}
+        }
+
+    # One line for the log: where the time goes so far
+    def format_summary(self):
+        totals = self.totals()
+        return (f"Запросов: {totals['requests']}, вызовов: {totals['calls']}, "
+                f"получено {totals['bytes'] / 1024 / 1024:.1f} МБ; сеть {totals['network_seconds']:.1f} с, "
+                f"ожидание лимита {totals['limiter_wait_seconds']:.1f} с, JSON {totals['decode_seconds']:.2f} с, "
+                f"повторов {totals['retries']}, ошибок {totals['errors']}")
+
+    # Lines per method for the final summary
+    def format_methods(self):
+        lines = []
+        for method, metrics in sorted(self.methods.items()):
+            latency = metrics.request_latency if metrics.requests else metrics.call_latency
+            lines.append(f"{method}: запросов {metrics.requests}, вызовов {metrics.calls}, "
+                         f"{metrics.bytes / 1024:.0f} КБ, p50 {latency.quantile(0.5) * 1000:.0f} мс, "
+                         f"p95 {latency.quantile(0.95) * 1000:.0f} мс, ожидание лимита {metrics.limiter_wait:.1f} с, "
+                         f"повторов {metrics.retries}, ошибок {sum(metrics.errors.values())}")
+        return lines
+
+    def to_prometheus(self, prefix='vk_api'):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f'{prefix}_{name}{{{label_text}}} {value}')
+
+        methods = sorted(self.methods.items())
+        metric('requests_total', 'counter', 'HTTP requests sent.',
+               [((('method', m),), x.requests) for m, x in methods])
+        metric('calls_total', 'counter', 'API calls made, including calls inside execute.',
+               [((('method', m),), x.calls) for m, x in methods])
+        metric('response_bytes_total', 'counter', 'Response bytes received.',
+               [((('method', m),), x.bytes) for m, x in methods])
+        metric('decode_seconds_total', 'counter', 'Seconds spent decoding JSON responses.',
+               [((('method', m),), round(x.decode_time, 6)) for m, x in methods])
+        metric('limiter_wait_seconds_total', 'counter', 'Seconds spent waiting for rate limiter slots.',
+               [((('method', m),), round(x.limiter_wait, 6)) for m, x in methods])
+        metric('retries_total', 'counter', 'Calls retried after transient errors.',
+               [((('method', m),), x.retries) for m, x in methods])
+        metric('errors_total', 'counter', 'Errors by VK error code or network.',
+               [((('method', m), ('code', code)), count) for m, x in methods for code, count in x.errors.items()])
+        for name, attribute, help_text in (
+                ('request_duration_seconds', 'request_latency', 'Network time of HTTP requests.'),
+                ('call_duration_seconds', 'call_latency', 'Time of API calls including waits and retries.')):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for m, x in methods:
+                histogram = getattr(x, attribute)
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f'{prefix}_{name}_bucket{{method="{m}",le="{le}"}} {total}')
+                lines.append(f'{prefix}_{name}_sum{{method="{m}"}} {round(histogram.sum, 6)}')
+                lines.append(f'{prefix}_{name}_count{{method="{m}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    # Prometheus textfile for *.prom files, JSON snapshot otherwise; replaced atomically
+    def write(self, filename):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f'{filename}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            if filename.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, filename)
@@ -0,0 +1,784 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+
+import aiofiles
+
+from vk_api import VKApi
+from vk_limiter import RateLimiter
+from vk_execute import ExecuteBatcher, BATCHED_METHODS, MAX_EXECUTE_CALLS
+from vk_sinks import (open_sink, file_format_of, flatten, CSVSink, JSONArraySink, NDJSONSink, XLSXSink,
+                      APPENDABLE_FORMATS, RECORD_FIELDS)
+from vk_storage import SQLiteStore, is_sqlite_file
+from vk_checkpoint import CrawlCheckpoint
+from vk_analytics import Analytics
+from vk_keywords import KeywordMatcher
+from vk_profiles import ProfileCache
+from vk_records import RecordTable
+from vk_retry import RetryPolicy, VKAPIError
+
+
+# wall.getComments page size and replies returned inline with each comment
+COMMENTS_PAGE_SIZE = 100
+THREAD_ITEMS_COUNT = 10
+
+# Records written between progress callbacks of an export
+EXPORT_PROGRESS_STEP = 10000
+
+
+# Community id records, links and SQLite rows are keyed by: positive, as text.
+# Walls are given as -164992662 or 164992662, the API takes the negative one.
+def community_id(owner_id):
+    return str(abs(int(owner_id)))
+
+
+# Owner ID as typed by a user: numeric id of a community, with or without the minus
+def check_owner_id(owner_id):
+    try:
+        valid = int(str(owner_id).strip()) != 0
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Owner ID должен быть числовым ID сообщества, например -164992662, а не «{owner_id}»")
+    return community_id(owner_id)
+
+
+class VKGroupMembers:
+    def __init__(self, token, group_id, api=None, token_type='user', limiter=None, retry=None, batcher=None):
+        self.token = token  # Single token or list of tokens to rotate
+        self.group_id = group_id
+        self.members_data = []
+        self.api = api or VKApi()  # Shared pooled session
+        self._owns_api = api is None
+        self.metrics = self.api.metrics  # Per-method request metrics
+        self.limiter = limiter or RateLimiter(token, token_type, metrics=self.metrics)
+        self.batcher = batcher or ExecuteBatcher(self.limiter.acquire, self.api.call)
+        # Retry transient errors, rate limit errors slow the limiter down
+        self.retry = retry or RetryPolicy(on_rate_limit=self.limiter.rate_limited, on_success=self.limiter.recover,
+                                          metrics=self.metrics)
+        self.fetched_count = 0  # Members streamed to file by fetch_all_members
+        self.member_ids = array('q')  # Ids of members streamed by this run, for display
+        self.members_count = None  # Members in the group, known after the first page
+
+    async def get_group_members(self, count=1000, offset=0, sort=None, fields=None, filter_param=None):
+        params = {
+            'group_id': self.group_id,
+            'count': count,
+            'offset': offset
+        }
+        if sort:
+            params['sort'] = sort
+        if fields:
+            params['fields'] = fields
+        if filter_param:
+            params['filter'] = filter_param
+
+        result = await self.retry.call(lambda: self._call('groups.getMembers', params), 'groups.getMembers')
+        if "response" in result:
+            self.members_data = result["response"]["items"]
+            return result
+        else:
+            raise VKAPIError(result.get('error') or {'error_msg': str(result)})
+
+    async def _call(self, method, params):
+        token = await self.limiter.acquire(method)
+        return await self.api.call(method, {'access_token': token, **params})
+
+    # Fetch every member of the group and stream them to CSV/NDJSON file or SQLite database.
+    # Up to 25 pages of 1000 are packed into one execute request; progress is
+    # saved next to the file so an interrupted export resumes where it stopped.
+    async def fetch_all_members(self, filename, file_format=None, sort=None, fields=None, filter_param=None,
+                                progress_callback=None, pages_per_step=MAX_EXECUTE_CALLS * 2):
+        if not is_sqlite_file(filename) and file_format_of(filename, file_format) not in APPENDABLE_FORMATS:
+            # JSON arrays and workbooks can not be cut at the last saved step and continued
+            raise ValueError(f"Всех участников можно выгрузить только в CSV, NDJSON или SQLite, не в {filename}")
+        store = SQLiteStore(filename) if is_sqlite_file(filename) else None
+        page_size = 1000
+        state_file = f'{filename}.state.json'
+        job = {'group_id': str(self.group_id), 'sort': sort, 'fields': fields, 'filter': filter_param}
+
+        offset = 0
+        total = None
+        started = int(time.time())  # Rows of a database upserted from then on belong to this fetch
+        state = self._load_state(state_file)
+        if state and state['job'] == job and os.path.exists(filename) and self._same_columns(filename, state):
+            offset, total, started = state['offset'], state['count'], state.get('started', 0)
+            self.members_count = total
+            # Drop rows written after the last saved step
+            if state['size'] is not None:
+                with open(filename, 'r+b') as f:
+                    f.truncate(state['size'])
+            print(f'[{self.group_id}] Продолжение выгрузки с offset={offset}')
+
+        if store:
+            sink = store.members_sink(self.group_id)
+        else:
+            # Written once per step, right before the state, so a CSV widened by new columns matches it
+            sink = open_sink(filename, file_format, append=offset > 0, buffer_size=pages_per_step * page_size)
+        self.fetched_count = offset
+        try:
+            finished = False
+            while not finished:
+                last = offset + pages_per_step * page_size
+                if total is not None:
+                    last = min(last, total)
+                params = {'group_id': self.group_id, 'count': page_size, 'sort': sort, 'fields': fields, 'filter': filter_param}
+                pages = await asyncio.gather(*[
+                    self.retry.call(lambda page_offset=page_offset: self.batcher.call(
+                        'groups.getMembers', {**params, 'offset': page_offset}), 'groups.getMembers')
+                    for page_offset in range(offset, last, page_size)
+                ])
+
+                for result in pages:
+                    if "response" not in result:
+                        raise VKAPIError(result.get('error') or {'error_msg': str(result)})
+                    total = self.members_count = result['response']['count']
+                    items = result['response']['items']
+                    for member in items:
+                        if isinstance(member, dict):
+                            sink.write(member)
+                            self.member_ids.append(member['id'])
+                        else:
+                            sink.write({'id': member})
+                            self.member_ids.append(member)
+                    offset += len(items)
+                    # Short page means the end of the list
+                    if len(items) < page_size:
+                        finished = True
+                        break
+                finished = finished or offset >= total
+                self.fetched_count = offset
+
+                size = sink.tell()
+                self._save_state(state_file, {'job': job, 'offset': offset, 'count': total, 'size': size,
+                                              'columns': getattr(sink, 'fieldnames', None), 'started': started})
+
+                if progress_callback and total:
+                    progress_callback(int(offset / total * 100))
+        finally:
+            sink.close()
+            if store:
+                store.close()
+
+        os.remove(state_file)
+        return {'count': total, 'fetched': self.fetched_count, 'filename': filename, 'started': started}
+
+    @staticmethod
+    def _load_state(state_file):
+        try:
+            with open(state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # A CSV rewritten with new columns after its state was saved can not be cut at the saved size
+    @staticmethod
+    def _same_columns(filename, state):
+        if not state.get('columns'):
+            return True
+        with open(filename, encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), None) == state['columns']
+
+    @staticmethod
+    def _save_state(state_file, state):
+        tmp_file = f'{state_file}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, state_file)
+
+    # Close pooled session if it belongs to this instance
+    async def close(self):
+        if self._owns_api:
+            await self.api.close()
+
+    def export_json(self, filename="group_members.json"):
+        sink = JSONArraySink(filename)
+        for member in self.members_data:
+            sink.write(member)
+        sink.close()
+
+    def export_csv(self, filename="group_members.csv"):
+        members = [member if isinstance(member, dict) else {'id': member} for member in self.members_data]
+        fieldnames = list(dict.fromkeys(key for member in members for key in flatten(member)))
+        sink = CSVSink(filename, fieldnames=fieldnames or ['id'])
+        for member in members:
+            sink.write(member)
+        sink.close()
+
+    def export_excel(self, filename="group_members.xlsx"):
+        members = [member if isinstance(member, dict) else {'id': member} for member in self.members_data]
+        fieldnames = list(dict.fromkeys(key for member in members for key in flatten(member)))
+        sink = XLSXSink(filename, fieldnames=fieldnames or ['id'], sheet_field=None, default_sheet='members')
+        for member in members:
+            sink.write(member)
+        sink.close()
+
+    def print_summary(self):
+        return {
+            'total': len(self.members_data) or self.fetched_count,
+            'connections': self.api.connection_stats(),
+            'retries': dict(self.retry.stats, rate=round(self.limiter.throughput, 2)),
+            'metrics': self.metrics.snapshot()
+        }
+
+
+class PostCrawl:
+    """Comments and replies of one post collected by crawl workers in any order."""
+
+    def __init__(self, post, post_data):
+        self.post = post
+        self.post_data = post_data  # None if post is filtered out
+        self.pages = {}  # offset -> [(comment_data, {thread offset: replies})]
+        self.pending = 0  # Jobs not finished yet
+        self.failed = False  # Some page could not be fetched
+        self.comments_end = None  # Offset after the last comment, known once a page comes back short
+        self.thread_ends = {}  # comment_id -> offset after the last reply of its thread
+        # Incremental mode
+        self.skip_comments = False  # Comment count unchanged since last run
+        self.start_comment_id = None  # Fetch only comments starting from this one
+        self.min_comment_id = 0  # Comments and replies up to this id were already exported
+        self.fetched = 0  # Comments and replies newer than that fetched, before keyword filtering
+
+    # Records in API order: post, then every comment followed by its replies
+    def records(self):
+        if self.post_data is not None:
+            yield self.post_data
+        for offset in sorted(self.pages):
+            for comment_data, replies in self.pages[offset]:
+                if comment_data['comment_id'] > self.min_comment_id:
+                    yield comment_data
+                for thread_offset in sorted(replies):
+                    for reply_data in replies[thread_offset]:
+                        if reply_data['comment_id'] > self.min_comment_id:
+                            yield reply_data
+
+
+class VKParser:
+    def __init__(self, domain, token, owner_id, delay=None, count=10, time_period=60 * 60 * 24 * 30, proxy=None, filter_keywords=False, api=None,
+                 token_type='user', limiter=None, use_execute=True, workers=25, sinks=None, keep_in_memory=True,
+                 checkpoint_file=None, whole_words=False, profile_cache=None, retry=None, batcher=None, media=None,
+                 archive=None, replay=False):
+        # Configuration
+        self.TOKEN = token  # Single token or list of tokens to rotate
+        self.DOMAIN = domain  # Community address
+        self.COUNT = count  # Number of posts to parse
+        self.delay = delay  # Minimal delay in seconds per token, overrides token_type limit
+        self.time_period = time_period  # Only posts newer than this many seconds, None for no limit
+        self.proxy = proxy
+        self.owner_id = community_id(owner_id)
+        self.parsed_data = RecordTable(domain, self.owner_id)  # Parsed records stored column by column
+        self.sinks = list(sinks or [])  # Receive records as soon as they are parsed
+        self.keep_in_memory = keep_in_memory  # Disable to keep memory flat when writing to sinks
+        self.counts = {'post': 0, 'comment': 0, 'reply': 0}
+        self.analytics = Analytics()  # Engagement and activity statistics folded while parsing
+        self.failed_posts = 0  # Posts with comment pages that could not be fetched
+        self.errors = []  # API errors that stopped the wall crawl
+        # Incremental mode: only new posts and new comments since the previous run
+        self.checkpoint = CrawlCheckpoint(checkpoint_file) if checkpoint_file else None
+        self.filter_keywords = filter_keywords  # Enable keyword filtering
+        self.keywords = []  # Keywords for filtering
+        self.whole_words = whole_words  # Match keywords only as separate words
+        self.keyword_matcher = None  # Compiled from keywords by load_keywords
+        self.profiles = profile_cache if profile_cache is not None else ProfileCache()  # Comment author names shared across pages and posts
+        self.api = api or VKApi(proxy=proxy)  # Pooled session kept for the parser lifetime
+        self._owns_api = api is None
+        self.metrics = self.api.metrics  # Per-method request metrics
+        self.limiter = limiter or RateLimiter(token, token_type, rate=1 / delay if delay else None, metrics=self.metrics)
+        # Pack concurrent wall.get/wall.getComments calls into execute requests
+        if use_execute:
+            self.batcher = batcher or ExecuteBatcher(self.limiter.acquire, self.api.call)
+        else:
+            self.batcher = None
+        # Retry transient errors, rate limit errors slow the limiter down
+        self.retry = retry or RetryPolicy(on_rate_limit=self.limiter.rate_limited, on_success=self.limiter.recover,
+                                          metrics=self.metrics)
+        self.workers = workers  # Concurrent comment page/thread requests, 25 fill one execute
+        self.media = media  # MediaDownloader fed with attachment URLs, None to keep only counts
+        self.archive = archive  # ResponseArchive receiving every raw API response
+        self.replay = replay  # Answer requests from the archive only, without the network
+        self.progress_callback = None
+        self.requests_planned = 0
+        self.requests_done = 0
+
+    # Load keywords for filtering
+    async def load_keywords(self):
+        try:
+            async with aiofiles.open('data/words.txt', mode='r', encoding='utf-8') as file:
+                self.keywords = [row.strip() async for row in file if row.strip()]
+        except Exception as e:
+            print(f'[Ошибка] Не удалось загрузить ключевые слова: {e}')
+            self.keywords = []
+        self.keyword_matcher = KeywordMatcher(self.keywords, self.whole_words) if self.keywords else None
+        self.analytics.keywords = self.keyword_matcher.keywords if self.keyword_matcher else []
+
+    # Keywords found in text, None if filtering is disabled or keywords not loaded
+    def match_keywords(self, text):
+        if not self.filter_keywords or self.keyword_matcher is None:
+            return None
+        return self.keyword_matcher.find(text)
+
+    # Check if text matches keywords
+    def check_keywords(self, text):
+        if not self.filter_keywords or self.keyword_matcher is None:
+            return True  # No filtering if keywords not loaded or filtering disabled
+        return self.keyword_matcher.matches(text)
+
+    # API requests, retried on transient errors; archived or replayed from the archive
+    async def requests_func(self, method, params):
+        if self.replay:
+            return self.archive.replay(method, params)
+        result = await self.retry.call(lambda: self._request(method, params), method)
+        if self.archive is not None:
+            self.archive.append(method, params, result)
+        return result
+
+    async def _request(self, method, params):
+        if self.batcher and method in BATCHED_METHODS:
+            return await self.batcher.call(method, params)
+        token = await self.limiter.acquire(method)
+        return await self.api.call(method, {'access_token': token, **params})
+
+    # Close sinks and pooled session if it belongs to this parser
+    async def close(self):
+        for sink in self.sinks:
+            sink.close()
+        if self._owns_api:
+            await self.api.close()
+
+    # Main function to parse data
+    async def parse_data(self, progress_callback=None):
+        print(f'[{self.DOMAIN}] Начало парсинга...')
+        
+        # Load keywords if filtering is enabled
+        if self.filter_keywords:
+            await self.load_keywords()
+            if self.keywords:
+                print(f"Загружено {len(self.keywords)} ключевых слов для фильтрации")
+            else:
+                print("Фильтрация включена, но ключевые слова не найдены")
+        
+        self.progress_callback = progress_callback
+        self.requests_planned = 1
+        self.requests_done = 0
+        self._progress = 0
+
+        # Posts up to this id were exported by the previous run
+        self._known_post_id = self.checkpoint.max_post_id if self.checkpoint else 0
+
+        # Comment pages and reply threads are crawled by a pool of workers
+        self._queue = asyncio.Queue()
+        workers = [asyncio.ensure_future(self._crawl_worker(self._queue)) for _ in range(self.workers)]
+        self._crawls = deque()
+        try:
+            async for posts in self.iter_wall_pages():
+                for post in posts:
+                    crawl = PostCrawl(post, self.parse_post(post))
+                    if self.checkpoint:
+                        self._apply_checkpoint(crawl)
+                    self._crawls.append(crawl)
+
+                    # Parse comments if there are any
+                    self._plan_comments(crawl)
+                    self._flush_crawls()
+                self._job_done()
+
+            await self._queue.join()
+            self._flush_crawls()
+            if self.media is not None:
+                await self.media.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for sink in self.sinks:
+                sink.flush()
+            self.analytics.flush()
+            if self.archive is not None:
+                self.archive.flush()
+            if self.checkpoint:
+                self.checkpoint.save()
+            self.profiles.save()
+
+    # Decide what is new in a post since the previous run
+    def _apply_checkpoint(self, crawl):
+        post_id = crawl.post['id']
+        if post_id <= self._known_post_id:
+            crawl.post_data = None  # Post itself was exported before
+        state = self.checkpoint.get(post_id)
+        if state is None:
+            return
+        crawl.min_comment_id = state['max_comment_id'] or 0
+        if int(crawl.post['comments']['count']) == state['comments_count']:
+            crawl.skip_comments = True
+        elif state['last_comment_id']:
+            crawl.start_comment_id = state['last_comment_id']
+
+    # Queue the first comment page of a post, the rest is planned from its response
+    def _plan_comments(self, crawl):
+        if crawl.skip_comments or not int(crawl.post['comments']['count']):
+            return
+        self._enqueue(self._queue, crawl, ('comments', crawl, 0))
+
+    # Queue the remaining comment pages once the first one is full
+    def _plan_comment_pages(self, crawl, current_level_count):
+        if crawl.start_comment_id:
+            # Only the new tail: new comments at most, plus the start one
+            state = self.checkpoint.get(crawl.post['id'])
+            current_level_count = int(crawl.post['comments']['count']) - state['comments_count'] + 1
+        for offset in range(COMMENTS_PAGE_SIZE, current_level_count, COMMENTS_PAGE_SIZE):
+            self._enqueue(self._queue, crawl, ('comments', crawl, offset))
+
+    # Fall back to a full crawl if the tail missed new replies in older threads
+    def _crawl_complete(self, crawl):
+        if not crawl.start_comment_id or crawl.failed:
+            return
+        state = self.checkpoint.get(crawl.post['id'])
+        expected = int(crawl.post['comments']['count']) - state['comments_count']
+        if crawl.fetched < expected:
+            crawl.start_comment_id = None
+            crawl.fetched = 0
+            crawl.pages = {}
+            crawl.comments_end = None
+            crawl.thread_ends = {}
+            self._plan_comments(crawl)
+
+    # Wall posts page by page, the next page is prefetched while the current one is processed.
+    # Stops at COUNT posts or at the first post older than time_period.
+    async def iter_wall_pages(self):
+        since = int(time.time()) - self.time_period if self.time_period else None
+        remaining = self.COUNT
+        offset = 0
+        next_page = asyncio.ensure_future(self.requests_func("wall.get", {'domain': self.DOMAIN, 'count': min(remaining, 100), 'offset': 0}))
+        try:
+            while next_page is not None:
+                req_posts = await next_page
+                next_page = None
+                try:
+                    items = req_posts['response']['items']
+                    total = req_posts['response']['count']
+                except Exception as e:
+                    self.errors.append(req_posts.get("error", str(e)))
+                    print(f'[Ошибка] {req_posts.get("error", e)}')
+                    return
+                offset += len(items)
+
+                posts = []
+                out_of_period = False
+                for post in items:
+                    if since is not None and post['date'] < since:
+                        # Pinned post stays on top of the wall regardless of its date
+                        if post.get('is_pinned'):
+                            continue
+                        out_of_period = True
+                        break
+                    posts.append(post)
+                posts = posts[:remaining]
+                remaining -= len(posts)
+
+                if items and remaining > 0 and offset < total and not out_of_period:
+                    self.requests_planned += 1
+                    next_page = asyncio.ensure_future(self.requests_func("wall.get", {'domain': self.DOMAIN, 'count': min(remaining, 100), 'offset': offset}))
+                yield posts
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    def _enqueue(self, queue, crawl, job):
+        crawl.pending += 1
+        self.requests_planned += 1
+        queue.put_nowait(job)
+
+    # Take comment page and thread jobs from the queue until cancelled
+    async def _crawl_worker(self, queue):
+        while True:
+            job = await queue.get()
+            crawl = job[1]
+            try:
+                if job[0] == 'comments':
+                    _, _, offset = job
+                    if crawl.comments_end is not None and offset >= crawl.comments_end:
+                        continue  # Past a short page, nothing left to fetch
+                    result = await self.parse_comments(crawl.post, offset, crawl.start_comment_id,
+                                                       crawl.min_comment_id)
+                    if result is None:
+                        crawl.failed = True
+                        continue
+                    comments_data, size, current_level_count, fetched = result
+                    crawl.fetched += fetched
+                    if size < COMMENTS_PAGE_SIZE:
+                        if crawl.comments_end is None or offset + size < crawl.comments_end:
+                            crawl.comments_end = offset + size
+                    elif offset == 0:
+                        self._plan_comment_pages(crawl, current_level_count)
+                    page = crawl.pages[offset] = []
+
+                    # Replies came inline, only longer threads are paged past them
+                    for comment_data, thread_count, inline_count, inline_replies in comments_data:
+                        replies = {0: inline_replies}
+                        page.append((comment_data, replies))
+                        for thread_offset in range(inline_count, thread_count, COMMENTS_PAGE_SIZE):
+                            self._enqueue(queue, crawl, ('thread', crawl, comment_data, replies, thread_offset))
+                else:
+                    _, _, comment_data, replies, offset = job
+                    comment_id = comment_data['comment_id']
+                    if offset >= crawl.thread_ends.get(comment_id, offset + 1):
+                        continue  # Past a short page of this thread
+                    result = await self.parse_comment_thread(crawl.post, comment_id, offset, crawl.min_comment_id)
+                    if result is None:
+                        crawl.failed = True
+                        continue
+                    replies[offset], size, fetched = result
+                    crawl.fetched += fetched
+                    if size < COMMENTS_PAGE_SIZE:
+                        crawl.thread_ends[comment_id] = min(crawl.thread_ends.get(comment_id, offset + size), offset + size)
+            except Exception as e:
+                crawl.failed = True
+                print(f'[Ошибка] {e}')
+            finally:
+                crawl.pending -= 1
+                if crawl.pending == 0 and self.checkpoint:
+                    self._crawl_complete(crawl)
+                self._job_done()
+                self._flush_crawls()
+                queue.task_done()
+
+    # Report progress as completed requests out of planned ones
+    def _job_done(self):
+        self.requests_done += 1
+        progress = int(self.requests_done / self.requests_planned * 100)
+        if progress > self._progress:
+            self._progress = progress
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+    # Output finished posts in wall order
+    def _flush_crawls(self):
+        while self._crawls and self._crawls[0].pending == 0:
+            crawl = self._crawls.popleft()
+            last_comment_id = max_comment_id = None
+            for record in crawl.records():
+                self.emit(record)
+                if record['type'] != 'post':
+                    max_comment_id = max(max_comment_id or 0, record['comment_id'])
+                if record['type'] == 'comment':
+                    last_comment_id = max(last_comment_id or 0, record['comment_id'])
+            if crawl.failed:
+                self.failed_posts += 1
+            # Posts with missing pages are crawled in full next time
+            if self.checkpoint and not crawl.failed:
+                self.checkpoint.update(crawl.post['id'], int(crawl.post['comments']['count']),
+                                       last_comment_id, max_comment_id)
+
+    # Store record and pass it to sinks
+    def emit(self, record):
+        self.counts[record['type']] += 1
+        self.analytics.write(record)
+        if self.keep_in_memory:
+            self.parsed_data.append(record)
+        for sink in self.sinks:
+            sink.write(record)
+
+    # Parse posts
+    def parse_post(self, post):
+        # Check keywords if filtering is enabled
+        keywords = self.match_keywords(post['text'])
+        if keywords == []:
+            return None  # Skip post if it doesn't match keywords
+        
+        # Collect photo and video information
+        photo, video = self.collect_media(post)
+        self.queue_media(photo, video, post_id=post['id'])
+
+        # Collect general post information
+        post_data = {
+            'type': 'post',
+            'date': datetime.utcfromtimestamp(int(post['date'])).strftime('%Y-%m-%d %H:%M:%S'),
+            'user_id': post['owner_id'],
+            'text': str(post['text'].replace("'", "").replace("\n\n", "\n")),
+            'photo_count': len(photo),
+            'video_count': len(video),
+            'comments_count': int(post['comments']['count']),
+            'likes_count': int(post['likes']['count']) if 'likes' in post else 0,
+            'reposts_count': int(post['reposts']['count']) if 'reposts' in post else 0,
+            'views_count': int(post['views']['count']) if 'views' in post else 0,
+            'link': f'https://vk.com/{self.DOMAIN}?w=wall-{self.owner_id}_{post["id"]}',
+            'post_id': post['id']
+        }
+        if keywords:
+            post_data['keywords'] = ', '.join(keywords)
+
+        return post_data
+
+    # Collect photo and video URLs of attachments
+    @staticmethod
+    def collect_media(item):
+        photo = {}
+        video = {}
+        for attachment in item.get('attachments', []):
+            if 'video' in attachment:
+                video[len(video)] = attachment['video']['image'][-1]['url']
+            elif 'photo' in attachment:
+                photo[len(photo)] = attachment['photo']['sizes'][-1]['url']
+        return photo, video
+
+    # Pass attachment URLs to the media downloader
+    def queue_media(self, photo, video, **info):
+        if self.media is None:
+            return
+        for url in photo.values():
+            self.media.add(url, kind='photo', owner_id=self.owner_id, **info)
+        for url in video.values():
+            self.media.add(url, kind='video_preview', owner_id=self.owner_id, **info)
+
+    # Build comment or reply record
+    def parse_comment(self, comment, post_id, parent_comment_id=None, keywords=None):
+        # Get user info
+        first_name, last_name = self.profiles.get(comment['from_id']) or ("", "")
+
+        # Collect photo and video information
+        photo, video = self.collect_media(comment)
+        self.queue_media(photo, video, post_id=post_id, comment_id=comment['id'])
+
+        # Collect general comment information
+        date = datetime.utcfromtimestamp(int(comment['date'])).strftime('%Y-%m-%d %H:%M:%S')
+        comment_data = {
+            'type': 'comment' if parent_comment_id is None else 'reply',
+            'date': date,
+            'user_id': str(comment['from_id']),
+            'first_name': first_name,
+            'last_name': last_name,
+            'text': str(comment['text']),
+            'photo_count': len(photo),
+            'video_count': len(video),
+            'likes_count': int(comment['likes']['count']) if 'likes' in comment else 0,
+            'post_link': f'https://vk.com/{self.DOMAIN}?w=wall-{self.owner_id}_{post_id}',
+            'post_id': post_id
+        }
+        if parent_comment_id is not None:
+            comment_data['parent_comment_id'] = parent_comment_id
+        comment_data['comment_id'] = comment['id']
+        if keywords:
+            comment_data['keywords'] = ', '.join(keywords)
+
+        return comment_data
+
+    # Parse one page of comments with the first replies of every thread inline.
+    # Returns (comments, items on the page, top-level comment count, comments and
+    # inline replies newer than min_comment_id before keyword filtering) or None
+    # on error, each comment as (record, reply count, inline reply count, inline reply records).
+    async def parse_comments(self, post, offset=0, start_comment_id=None, min_comment_id=0):
+        url = ["wall.getComments", {'owner_id': f'-{self.owner_id}', 'post_id': post['id'], 'count': COMMENTS_PAGE_SIZE, 'offset': offset, 'extended': 1,
+                                    'thread_items_count': THREAD_ITEMS_COUNT, 'start_comment_id': start_comment_id}]
+
+        comments_full = await self.requests_func(*url)
+        if 'response' not in comments_full.keys():
+            return None
+
+        response = comments_full['response']
+        comments = self.filter_comments(response['items'])
+        threads = [comment.get('thread', {}) for comment, _ in comments]
+        inline_replies = [self.filter_comments(thread.get('items', [])) for thread in threads]
+        await self.resolve_authors(response, comments + [reply for replies in inline_replies for reply in replies])
+        comments_data = []
+
+        for (comment, keywords), thread, replies in zip(comments, threads, inline_replies):
+            comments_data.append((
+                self.parse_comment(comment, post['id'], keywords=keywords),
+                thread.get('count', 0),
+                len(thread.get('items', [])),
+                [self.parse_comment(reply, post['id'], comment['id'], reply_keywords) for reply, reply_keywords in replies]
+            ))
+
+        fetched = sum(1 for item in response['items'] if item['id'] > min_comment_id)
+        fetched += sum(1 for item in response['items'] for reply in item.get('thread', {}).get('items', [])
+                       if reply['id'] > min_comment_id)
+        return comments_data, len(response['items']), response.get('current_level_count', response['count']), fetched
+
+    # Parse one page of comment thread, returns (replies, items on the page, items newer than
+    # min_comment_id before keyword filtering) or None on error
+    async def parse_comment_thread(self, post, comment_id, offset=0, min_comment_id=0):
+        url = ["wall.getComments", {'owner_id': f'-{self.owner_id}', 'post_id': post['id'], 'comment_id': comment_id, 'count': COMMENTS_PAGE_SIZE, 'offset': offset, 'extended': 1}]
+
+        comments_thread_full = await self.requests_func(*url)
+        if 'response' not in comments_thread_full.keys():
+            return None
+
+        comments_thread = self.filter_comments(comments_thread_full['response']['items'])
+        await self.resolve_authors(comments_thread_full['response'], comments_thread)
+        replies = []
+
+        for comment_thread, keywords in comments_thread:
+            replies.append(self.parse_comment(comment_thread, post['id'], comment_id, keywords))
+
+        items = comments_thread_full['response']['items']
+        return replies, len(items), sum(1 for item in items if item['id'] > min_comment_id)
+
+    # Comments matching keywords together with the keywords found
+    def filter_comments(self, comments):
+        matched = []
+        for comment in comments:
+            # Check keywords if filtering is enabled
+            keywords = self.match_keywords(comment['text'])
+            if keywords == []:
+                continue  # Skip comment if it doesn't match keywords
+            matched.append((comment, keywords))
+        return matched
+
+    # Cache profiles of the page and look up authors missing from it
+    async def resolve_authors(self, response, comments):
+        self.profiles.add_response(response)
+        await self.profiles.resolve([comment['from_id'] for comment, _ in comments], self.users_get)
+
+    async def users_get(self, user_ids):
+        return await self.requests_func('users.get', {'user_ids': ','.join(map(str, user_ids))})
+
+    # Export data to JSON
+    def export_to_json(self, filename='vk_data.json', progress_callback=None):
+        self._export(JSONArraySink(filename), progress_callback)
+        print(f"Данные экспортированы в {filename}")
+
+    # Export data to NDJSON
+    def export_to_ndjson(self, filename='vk_data.ndjson', progress_callback=None):
+        self._export(NDJSONSink(filename), progress_callback)
+        print(f"Данные экспортированы в {filename}")
+
+    # Export data to Excel, posts, comments and replies on their own sheets
+    def export_to_excel(self, filename='vk_data.xlsx', progress_callback=None):
+        self._export(XLSXSink(filename, fieldnames=RECORD_FIELDS), progress_callback)
+        print(f"Данные экспортированы в {filename}")
+
+    # Export data to CSV
+    def export_to_csv(self, filename='vk_data.csv', progress_callback=None):
+        self._export(CSVSink(filename, fieldnames=RECORD_FIELDS), progress_callback)
+        print(f"Данные экспортированы в {filename}")
+
+    # progress_callback gets the number of records written every EXPORT_PROGRESS_STEP of them
+    def _export(self, sink, progress_callback=None):
+        try:
+            for written, record in enumerate(self.parsed_data, 1):
+                sink.write(record)
+                if progress_callback and written % EXPORT_PROGRESS_STEP == 0:
+                    progress_callback(written)
+        finally:
+            sink.close()
+
+    # Print summary in Russian
+    def print_summary(self):
+        return {
+            'total': sum(self.counts.values()),
+            'posts': self.counts['post'],
+            'comments': self.counts['comment'],
+            'replies': self.counts['reply'],
+            'failed_posts': self.failed_posts,
+            'errors': self.errors,
+            'connections': self.api.connection_stats(),
+            'retries': dict(self.retry.stats, rate=round(self.limiter.throughput, 2)),
+            'metrics': self.metrics.snapshot(),
+            'media': self.media.summary() if self.media is not None else None,
+            'analytics': self.analytics.summary(self.profiles.get)
+        }
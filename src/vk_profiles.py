@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+
+
+# users.get accepts up to 1000 ids per call
+USERS_GET_LIMIT = 1000
+
+
+class ProfileCache:
+    """Names of comment authors shared across the whole crawl.
+
+    Users are keyed by id, communities by negative id. The least recently
+    used entries are dropped above max_size. Ids missing from a page are
+    collected from all concurrent callers and resolved with users.get.
+    """
+
+    def __init__(self, filename=None, max_size=200000, window=0.05):
+        self.filename = filename  # Optional JSON file kept between runs, nothing is written without it
+        self.max_size = max_size
+        self.window = window  # Seconds to collect ids before calling users.get
+        self._profiles = OrderedDict()  # id -> (first_name, last_name)
+        self._unknown = set()  # Ids users.get returned nothing for
+        self._wanted = set()
+        self._flush = None
+        self.stats = {'hits': 0, 'misses': 0, 'resolved': 0}
+        if filename:
+            self.load()
+
+    def __contains__(self, owner_id):
+        return owner_id in self._profiles
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def get(self, owner_id):
+        names = self._profiles.get(owner_id)
+        if names is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self._profiles.move_to_end(owner_id)
+        return names
+
+    def put(self, owner_id, first_name, last_name):
+        self._profiles[owner_id] = (first_name, last_name)
+        self._profiles.move_to_end(owner_id)
+        if len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    # Add profiles and groups of an extended API response
+    def add_response(self, response):
+        for profile in response.get('profiles', []):
+            self.put(profile['id'], profile.get('first_name', ''), profile.get('last_name', ''))
+        for group in response.get('groups', []):
+            self.put(-group['id'], group.get('name', ''), '')
+
+    # Resolve users that are not cached; fetch(ids) returns users.get result
+    async def resolve(self, user_ids, fetch):
+        missing = {user_id for user_id in user_ids if user_id > 0 and user_id not in self._profiles}
+        missing -= self._unknown
+        if not missing:
+            return
+        self._wanted |= missing
+        if self._flush is None:
+            self._flush = asyncio.ensure_future(self._fetch_wanted(fetch))
+        await asyncio.shield(self._flush)
+
+    async def _fetch_wanted(self, fetch):
+        await asyncio.sleep(self.window)
+        wanted = sorted(self._wanted)
+        self._wanted = set()
+        self._flush = None  # Ids requested from now on go to the next call
+
+        for start in range(0, len(wanted), USERS_GET_LIMIT):
+            chunk = wanted[start:start + USERS_GET_LIMIT]
+            result = await fetch(chunk)
+            if 'response' not in result:
+                print(f'[Ошибка] users.get: {result.get("error")}')
+                continue
+            found = set()
+            for user in result['response']:
+                self.put(user['id'], user.get('first_name', ''), user.get('last_name', ''))
+                found.add(user['id'])
+            self._unknown.update(set(chunk) - found)
+            self.stats['resolved'] += len(found)
+
+    # Keep names in filename between runs, None for memory only; a new file is loaded
+    def use_file(self, filename):
+        changed = filename and filename != self.filename
+        self.filename = filename
+        if changed:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for owner_id, (first_name, last_name) in data.items():
+            self.put(int(owner_id), first_name, last_name)
+
+    def save(self):
+        if not self.filename:
+            return
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f'{self.filename}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({str(k): list(v) for k, v in self._profiles.items()}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.filename)
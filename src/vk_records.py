@@ -0,0 +1,263 @@
+import zlib
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+
+import numpy as np
+
+
+RECORD_TYPES = ('post', 'comment', 'reply')
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+EPOCH = datetime(1970, 1, 1)
+TEXT_BLOCK_SIZE = 1 << 18  # Bytes of text compressed together
+
+
+# Epoch seconds of a UTC date string in DATE_FORMAT
+def parse_date(date):
+    return int((datetime.fromisoformat(date) - EPOCH).total_seconds())
+
+
+def format_date(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime(DATE_FORMAT)
+
+
+class RecordTable:
+    """Parsed posts, comments and replies stored column by column.
+
+    Numbers are kept in typed arrays, dates as epoch seconds, texts as
+    zlib-compressed blocks of UTF-8 and author names interned, so a record
+    costs tens of bytes instead of a dict with a dozen string values. Links are
+    built from domain and owner_id when a record is read back. Iterating
+    yields the same dicts the parser produced.
+    """
+
+    def __init__(self, domain, owner_id):
+        self.domain = domain
+        self.owner_id = owner_id
+        self.types = array('b')  # Index in RECORD_TYPES
+        self.dates = array('I')  # Epoch seconds
+        self.user_ids = array('q')
+        self.post_ids = array('I')
+        self.comment_ids = array('I')  # 0 for posts
+        self.parent_ids = array('I')  # 0 unless reply
+        self.photo_counts = array('H')
+        self.video_counts = array('H')
+        self.likes_counts = array('I')
+        self.names = array('i')  # Index in _names, -1 for posts
+        self._text = bytearray()  # Texts not compressed yet
+        self._text_ends = array('q')  # End of each text in all texts joined
+        self._blocks = []  # Compressed texts
+        self._block_starts = array('q', [0])  # Offset of each block and of _text
+        self._cached_block = (None, b'')
+        self._names = []  # (first_name, last_name)
+        self._name_index = {}
+        self._post_counts = {}  # Row -> (comments_count, reposts_count, views_count)
+        self._keywords = {}  # Row -> matched keywords
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.record(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('record index out of range')
+        return self.record(index)
+
+    def append(self, record):
+        index = len(self.types)
+        record_type = RECORD_TYPES.index(record['type'])
+        self.types.append(record_type)
+        self.dates.append(parse_date(record['date']))
+        self.user_ids.append(int(record['user_id']))
+        self.post_ids.append(record['post_id'])
+        self.comment_ids.append(record.get('comment_id', 0))
+        self.parent_ids.append(record.get('parent_comment_id', 0))
+        self.photo_counts.append(record['photo_count'])
+        self.video_counts.append(record['video_count'])
+        self.likes_counts.append(record['likes_count'])
+        self._text += record['text'].encode('utf-8')
+        self._text_ends.append(self._block_starts[-1] + len(self._text))
+        if len(self._text) >= TEXT_BLOCK_SIZE:
+            self._blocks.append(zlib.compress(self._text, 1))
+            self._block_starts.append(self._block_starts[-1] + len(self._text))
+            self._text = bytearray()
+        if record_type == 0:
+            self.names.append(-1)
+            self._post_counts[index] = (record['comments_count'], record['reposts_count'], record['views_count'])
+        else:
+            self.names.append(self._intern_name(record['first_name'], record['last_name']))
+        if record.get('keywords'):
+            self._keywords[index] = record['keywords']
+
+    def _intern_name(self, first_name, last_name):
+        name = (first_name, last_name)
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self._names)
+            self._names.append(name)
+        return index
+
+    # Blocks end on a record boundary, so a text never spans two of them
+    def text(self, index):
+        start = self._text_ends[index - 1] if index else 0
+        block = bisect_right(self._block_starts, start) - 1
+        offset = self._block_starts[block]
+        return self._block(block)[start - offset:self._text_ends[index] - offset].decode('utf-8')
+
+    # Uncompressed block, the last one decompressed is kept for sequential reads
+    def _block(self, block):
+        if block == len(self._blocks):
+            return self._text
+        if self._cached_block[0] != block:
+            self._cached_block = (block, zlib.decompress(self._blocks[block]))
+        return self._cached_block[1]
+
+    # Rows from start to stop whose text contains needle, ignoring case. Each
+    # block is decoded and searched as a whole, matches are mapped to rows
+    # by their end offsets.
+    def find_text(self, needle, start=0, stop=None):
+        stop = len(self) if stop is None else stop
+        needle = needle.lower()
+        rows = []
+        row = start
+        while row < stop:
+            text_start = self._text_ends[row - 1] if row else 0
+            block = bisect_right(self._block_starts, text_start) - 1
+            offset = self._block_starts[block]
+            block_end = offset + len(self._block(block))
+            last = max(row + 1, min(stop, bisect_right(self._text_ends, block_end, row)))
+            data = bytes(self._block(block)[text_start - offset:self._text_ends[last - 1] - offset])
+            text = data.decode('utf-8')
+            lowered = text.lower()
+            position = lowered.find(needle)
+            if position >= 0 and len(lowered) == len(text):
+                # Character offset of every byte offset: UTF-8 continuation bytes are 10xxxxxx
+                first_bytes = (np.frombuffer(data, dtype=np.uint8) & 0xC0) != 0x80
+                char_offsets = np.concatenate(([0], np.cumsum(first_bytes)))
+                ends = char_offsets[np.array(self._text_ends[row:last]) - text_start].tolist()
+                while position >= 0:
+                    index = bisect_right(ends, position)
+                    if position + len(needle) <= ends[index]:
+                        rows.append(row + index)
+                        position = lowered.find(needle, ends[index])
+                    else:
+                        position = lowered.find(needle, position + 1)
+            elif position >= 0:
+                # Lowercase changed lengths, offsets do not line up
+                rows.extend(index for index in range(row, last) if needle in self.text(index).lower())
+            row = last
+        return rows
+
+    # Texts of rows from start to stop, each block decompressed once
+    def texts(self, start=0, stop=None):
+        stop = len(self) if stop is None else stop
+        texts = []
+        row = start
+        while row < stop:
+            text_start = self._text_ends[row - 1] if row else 0
+            block = bisect_right(self._block_starts, text_start) - 1
+            offset = self._block_starts[block]
+            data = self._block(block)
+            last = max(row + 1, min(stop, bisect_right(self._text_ends, offset + len(data), row)))
+            for text_end in self._text_ends[row:last]:
+                texts.append(data[text_start - offset:text_end - offset].decode('utf-8'))
+                text_start = text_end
+            row = last
+        return texts
+
+    # comments_count of rows from start to stop, missing for comments and replies
+    def comments_counts(self, start=0, stop=None, missing=-1):
+        stop = len(self) if stop is None else stop
+        counts = np.full(stop - start, missing, dtype=np.int64)
+        posts = np.flatnonzero(np.array(self.types[start:stop]) == 0) + start
+        counts[posts - start] = [self._post_counts[row][0] for row in posts.tolist()]
+        return counts
+
+    # "First Last" of every author, indexed by the names column
+    def author_names(self):
+        return [f'{first_name} {last_name}' for first_name, last_name in self._names]
+
+    def link(self, index):
+        return f'https://vk.com/{self.domain}?w=wall-{self.owner_id}_{self.post_ids[index]}'
+
+    def type(self, index):
+        return RECORD_TYPES[self.types[index]]
+
+    # Number of records of each type
+    def counts(self):
+        return {record_type: self.types.count(code) for code, record_type in enumerate(RECORD_TYPES)}
+
+    # Record as a dict with the keys and key order of VKParser.parse_post/parse_comment
+    def record(self, index):
+        record_type = self.types[index]
+        if record_type == 0:
+            comments_count, reposts_count, views_count = self._post_counts[index]
+            record = {
+                'type': 'post',
+                'date': format_date(self.dates[index]),
+                'user_id': self.user_ids[index],
+                'text': self.text(index),
+                'photo_count': self.photo_counts[index],
+                'video_count': self.video_counts[index],
+                'comments_count': comments_count,
+                'likes_count': self.likes_counts[index],
+                'reposts_count': reposts_count,
+                'views_count': views_count,
+                'link': self.link(index),
+                'post_id': self.post_ids[index]
+            }
+        else:
+            first_name, last_name = self._names[self.names[index]]
+            record = {
+                'type': RECORD_TYPES[record_type],
+                'date': format_date(self.dates[index]),
+                'user_id': str(self.user_ids[index]),
+                'first_name': first_name,
+                'last_name': last_name,
+                'text': self.text(index),
+                'photo_count': self.photo_counts[index],
+                'video_count': self.video_counts[index],
+                'likes_count': self.likes_counts[index],
+                'post_link': self.link(index),
+                'post_id': self.post_ids[index]
+            }
+            if record_type == 2:
+                record['parent_comment_id'] = self.parent_ids[index]
+            record['comment_id'] = self.comment_ids[index]
+        if index in self._keywords:
+            record['keywords'] = self._keywords[index]
+        return record
+
+    # Columns keyed by field name for building a DataFrame without per-record dicts
+    def columns(self, fields):
+        size = len(self)
+        types = self.types
+        is_post = [code == 0 for code in types]
+        values = {
+            'type': [RECORD_TYPES[code] for code in types],
+            'date': [format_date(timestamp) for timestamp in self.dates],
+            'user_id': [user_id if post else str(user_id) for user_id, post in zip(self.user_ids, is_post)],
+            'text': [self.text(index) for index in range(size)],
+            'photo_count': list(self.photo_counts),
+            'video_count': list(self.video_counts),
+            'likes_count': list(self.likes_counts),
+            'post_id': list(self.post_ids),
+            'first_name': [None if name < 0 else self._names[name][0] for name in self.names],
+            'last_name': [None if name < 0 else self._names[name][1] for name in self.names],
+            'comment_id': [None if post else comment_id for comment_id, post in zip(self.comment_ids, is_post)],
+            'parent_comment_id': [parent_id if code == 2 else None for parent_id, code in zip(self.parent_ids, types)]
+        }
+        if self._keywords:
+            values['keywords'] = [self._keywords.get(index) for index in range(size)]
+        for position, field in enumerate(('comments_count', 'reposts_count', 'views_count')):
+            values[field] = [self._post_counts[index][position] if post else None for index, post in enumerate(is_post)]
+        values['link'] = [self.link(index) if post else None for index, post in enumerate(is_post)]
+        values['post_link'] = [None if post else self.link(index) for index, post in enumerate(is_post)]
+        return {field: values[field] for field in fields if field in values}
@@ -0,0 +1,122 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+
+
+# VK error codes worth retrying
+RETRY_ERROR_CODES = {
+    6: 'Too many requests per second',
+    9: 'Flood control',
+    10: 'Internal server error'
+}
+
+# Codes meaning requests are sent faster than VK accepts them
+RATE_LIMIT_ERROR_CODES = {6, 9}
+
+# Connection failures, timeouts and non-JSON bodies of gateway errors
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+
+class VKAPIError(Exception):
+    """VK API returned an error that was not resolved by retrying."""
+
+    def __init__(self, error):
+        self.error = error
+        self.code = error.get('error_code')
+        super().__init__(f"Ошибка VK API {self.code}: {error.get('error_msg', '')}")
+
+
+def error_code(result):
+    if isinstance(result, dict) and isinstance(result.get('error'), dict):
+        return result['error'].get('error_code')
+    return None
+
+
+class RetryPolicy:
+    """Retries API calls on transient VK errors and network failures.
+
+    Delays grow exponentially with full jitter, so callers that failed
+    together do not come back together. Rate limit errors are reported to
+    on_rate_limit(started_at), successful calls to on_success, which lets
+    the rate limiter slow down and recover. They get a larger retry budget
+    since the slowed down limiter makes them pass sooner or later.
+    Calls made with a method name are timed and counted in metrics.
+    """
+
+    def __init__(self, max_attempts=6, max_rate_limit_attempts=30, base_delay=0.5, max_delay=30.0,
+                 on_rate_limit=None, on_success=None, metrics=None):
+        self.max_attempts = max_attempts
+        self.max_rate_limit_attempts = max_rate_limit_attempts
+        self.base_delay = base_delay  # Seconds before the first retry at most
+        self.max_delay = max_delay
+        self.on_rate_limit = on_rate_limit
+        self.on_success = on_success
+        self.metrics = metrics
+        self.stats = {
+            'retries': 0,
+            'rate_limited': 0,
+            'server_errors': 0,
+            'network_errors': 0,
+            'failed': 0
+        }
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # Await request() until it succeeds or attempts run out. Returns the last
+    # result, which may hold a VK error; raises the last network error.
+    async def call(self, request, method=None):
+        metrics = self.metrics if method else None
+        started = time.perf_counter()
+        try:
+            return await self._call(request, method, metrics)
+        finally:
+            if metrics is not None:
+                metrics.observe_call(method, time.perf_counter() - started)
+
+    async def _call(self, request, method, metrics):
+        attempts = 0  # Failures other than rate limit errors
+        rate_limit_attempts = 0
+        while True:
+            started_at = time.monotonic()
+            try:
+                result = await request()
+            except NETWORK_ERRORS as e:
+                self.stats['network_errors'] += 1
+                if metrics is not None:
+                    metrics.observe_error(method, 'network')
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    self.stats['failed'] += 1
+                    raise e
+                delay = self.backoff(attempts - 1)
+            else:
+                code = error_code(result)
+                if code is not None and metrics is not None:
+                    metrics.observe_error(method, code)
+                if code not in RETRY_ERROR_CODES:
+                    if code is None and self.on_success:
+                        self.on_success()
+                    return result
+                if code in RATE_LIMIT_ERROR_CODES:
+                    # The limiter spaces requests out, the delay only spreads retries
+                    self.stats['rate_limited'] += 1
+                    if self.on_rate_limit:
+                        self.on_rate_limit(started_at)
+                    rate_limit_attempts += 1
+                    exhausted = rate_limit_attempts >= self.max_rate_limit_attempts
+                    delay = self.backoff(min(rate_limit_attempts - 1, 3))
+                else:
+                    self.stats['server_errors'] += 1
+                    attempts += 1
+                    exhausted = attempts >= self.max_attempts
+                    delay = self.backoff(attempts - 1)
+                if exhausted:
+                    self.stats['failed'] += 1
+                    return result
+            self.stats['retries'] += 1
+            if metrics is not None:
+                metrics.observe_retry(method)
+            await asyncio.sleep(delay)
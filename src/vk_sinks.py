@@ -0,0 +1,307 @@
+import csv
+import json
+import os
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:  # Only needed for XLSX files
+    Workbook = None
+
+
+# Column order of parsed posts, comments and replies in CSV exports
+RECORD_FIELDS = [
+    'type', 'date', 'user_id', 'text', 'photo_count', 'video_count', 'comments_count',
+    'likes_count', 'reposts_count', 'views_count', 'link', 'post_id',
+    'first_name', 'last_name', 'post_link', 'comment_id', 'parent_comment_id', 'keywords'
+]
+
+# Rows per Excel sheet including the header
+EXCEL_MAX_ROWS = 1048576
+
+# Characters per Excel cell
+EXCEL_MAX_CELL = 32767
+
+# Formats written line by line, a partial tail can be cut off and the file appended to
+APPENDABLE_FORMATS = ('ndjson', 'jsonl', 'csv')
+
+# XLSX sheet of each record type
+RECORD_SHEETS = {
+    'post': 'posts',
+    'comment': 'comments',
+    'reply': 'replies'
+}
+
+
+# Flatten nested dicts into dotted keys like pandas.json_normalize
+def flatten(record, prefix=''):
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+class RecordSink:
+    """Receives records one by one while they are produced."""
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class NDJSONSink(RecordSink):
+    """Buffered writer of one JSON object per line."""
+
+    def __init__(self, filename, append=False, buffer_size=1000):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8')
+        self.written = 0
+
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    # Size of data written so far, used to cut off a partial tail on resume
+    def tell(self):
+        self.flush()
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class JSONArraySink(RecordSink):
+    """Buffered writer of a JSON array, one record per line."""
+
+    def __init__(self, filename, buffer_size=1000):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._file = open(filename, 'w', encoding='utf-8')
+        self._file.write('[')
+        self.written = 0
+
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            separator = ',\n' if self.written else '\n'
+            self._file.write(separator + ',\n'.join(self._buffer))
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.write('\n]\n')
+            self._file.close()
+
+
+class CSVSink(RecordSink):
+    """Buffered CSV writer; columns are fixed or grow with the keys of the records.
+
+    Without fixed fieldnames a key first seen after rows were written adds a
+    column: the file is rewritten once with the wider header and the earlier
+    rows get the new columns empty.
+    """
+
+    def __init__(self, filename, fieldnames=None, append=False, buffer_size=1000):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.extend_columns = not fieldnames  # New keys of later records add columns
+        self._buffer = []
+        self._writer = None
+        self.written = 0
+
+        if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with open(filename, encoding='utf-8-sig', newline='') as f:
+                self.fieldnames = next(csv.reader(f))
+            self._file = open(filename, 'a', encoding='utf-8', newline='')
+            self._make_writer(write_header=False)
+        else:
+            self._file = open(filename, 'w', encoding='utf-8-sig', newline='')
+            if self.fieldnames:
+                self._make_writer()
+
+    def _make_writer(self, write_header=True):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, record):
+        self._buffer.append(flatten(record))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            if self.extend_columns:
+                # Union of keys in order of appearance
+                known = set(self.fieldnames or ())
+                columns = [key for key in dict.fromkeys(key for row in self._buffer for key in row) if key not in known]
+                if columns:
+                    self._add_columns(columns)
+            if self._writer is None:
+                self._make_writer()
+            self._writer.writerows(self._buffer)
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    # Widen the header, rows already in the file get the new columns empty
+    def _add_columns(self, columns):
+        self.fieldnames = (self.fieldnames or []) + columns
+        if self._writer is None:
+            return
+        self._file.close()
+        tmp_file = f'{self.filename}.tmp'
+        with open(self.filename, encoding='utf-8-sig', newline='') as old, \
+                open(tmp_file, 'w', encoding='utf-8-sig', newline='') as new:
+            rows = csv.reader(old)
+            next(rows, None)
+            writer = csv.writer(new)
+            writer.writerow(self.fieldnames)
+            padding = [''] * len(columns)
+            writer.writerows(row + padding for row in rows)
+        os.replace(tmp_file, self.filename)
+        self._file = open(self.filename, 'a', encoding='utf-8', newline='')
+        self._make_writer(write_header=False)
+
+    def tell(self):
+        self.flush()
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class XLSXSink(RecordSink):
+    """Streaming XLSX writer on openpyxl write-only sheets.
+
+    Rows are buffered and appended in chunks, the workbook is assembled when
+    the sink is closed. Records go to a sheet per value of sheet_field
+    (posts, comments, replies); a sheet that reaches the Excel row limit is
+    continued on an overflow sheet like "comments (2)".
+    """
+
+    def __init__(self, filename, fieldnames=None, sheet_field='type', sheet_names=None, default_sheet='data',
+                 max_rows=EXCEL_MAX_ROWS, buffer_size=1000):
+        if Workbook is None:
+            raise ValueError("Для записи XLSX нужен пакет openpyxl")
+        self.filename = filename
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.sheet_field = sheet_field  # None to write every record to default_sheet
+        self.sheet_names = RECORD_SHEETS if sheet_names is None else sheet_names
+        self.default_sheet = default_sheet
+        self.max_rows = max_rows
+        self.buffer_size = buffer_size
+        self._workbook = Workbook(write_only=True)
+        self._buffers = {}  # Sheet name -> flattened records not written yet
+        self._buffered = 0
+        self._worksheets = {}  # Sheet name -> worksheet rows are appended to
+        self._columns = {}  # Sheet name -> column names
+        self._rows = {}  # Sheet name -> rows in its current worksheet
+        self._parts = {}  # Sheet name -> worksheets it is split into
+        self.written = 0
+
+    def write(self, record):
+        name = self.default_sheet
+        if self.sheet_field and record.get(self.sheet_field) is not None:
+            key = record[self.sheet_field]
+            name = self.sheet_names.get(key, key)
+        self._buffers.setdefault(str(name), []).append(flatten(record))
+        self._buffered += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(map(str, value))
+        if isinstance(value, str):
+            value = ILLEGAL_CHARACTERS_RE.sub('', value)[:EXCEL_MAX_CELL]
+        return value
+
+    # Start the sheet or its next overflow part with the header row
+    def _add_worksheet(self, name):
+        part = self._parts.get(name, 0) + 1
+        self._parts[name] = part
+        suffix = f' ({part})' if part > 1 else ''
+        worksheet = self._worksheets[name] = self._workbook.create_sheet(name[:31 - len(suffix)] + suffix)
+        worksheet.append(self._columns[name])
+        self._rows[name] = 1
+
+    def flush(self):
+        for name, rows in self._buffers.items():
+            if not rows:
+                continue
+            if name not in self._columns:
+                # Union of keys in order of appearance unless columns are fixed
+                self._columns[name] = self.fieldnames or list(dict.fromkeys(key for row in rows for key in row))
+                self._add_worksheet(name)
+            columns = self._columns[name]
+            for row in rows:
+                if self._rows[name] >= self.max_rows:
+                    self._add_worksheet(name)
+                self._worksheets[name].append([self._cell(row.get(column)) for column in columns])
+                self._rows[name] += 1
+            self.written += len(rows)
+            rows.clear()
+        self._buffered = 0
+
+    def close(self):
+        if self._workbook is None:
+            return
+        self.flush()
+        if not self._worksheets:
+            self._workbook.create_sheet(self.default_sheet).append(self.fieldnames or [])
+        self._workbook.save(self.filename)
+        self._workbook = None
+
+
+# Format of a file by its extension unless given
+def file_format_of(filename, file_format=None):
+    return (file_format or os.path.splitext(filename)[1].lstrip('.')).lower()
+
+
+# Create sink by file extension or explicit format
+def open_sink(filename, file_format=None, **kwargs):
+    file_format = file_format_of(filename, file_format)
+    if kwargs.get('append') and file_format not in APPENDABLE_FORMATS:
+        raise ValueError(f"Формат {file_format} не поддерживает дозапись в файл")
+    if file_format in ('ndjson', 'jsonl'):
+        return NDJSONSink(filename, **{k: v for k, v in kwargs.items() if k != 'fieldnames'})
+    if file_format == 'json':
+        return JSONArraySink(filename, **{k: v for k, v in kwargs.items() if k == 'buffer_size'})
+    if file_format == 'csv':
+        return CSVSink(filename, **kwargs)
+    if file_format == 'xlsx':
+        return XLSXSink(filename, **{k: v for k, v in kwargs.items() if k != 'append'})
+    raise ValueError(f"Неизвестный формат файла: {file_format}")
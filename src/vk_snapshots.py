@@ -0,0 +1,141 @@
+import json
+import os
+import re
+from array import array
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from vk_storage import SQLiteStore, is_sqlite_file
+
+
+SNAPSHOTS_DIR = os.path.join('data', 'snapshots')
+TIME_FORMAT = '%Y%m%d-%H%M%S'  # Snapshot file name without .npy, UTC
+SNAPSHOT_RE = re.compile(r'^\d{8}-\d{6}\.npy$')
+
+
+# Sorted ids without duplicates; np.unique hashes and is slower on millions of ints
+def sorted_ids(ids):
+    if isinstance(ids, array):
+        ids = np.frombuffer(ids, dtype=np.int64) if ids.typecode == 'q' else np.array(ids, dtype=np.int64)
+    elif not isinstance(ids, np.ndarray):
+        ids = np.fromiter(ids, dtype=np.int64)
+    ids = np.sort(ids.astype(np.int64, copy=False))
+    if len(ids) > 1:
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+    return ids
+
+
+# (joined, left) between two sorted id arrays. A stable sort of both merges
+# the sorted runs in one linear pass; ids seen once changed, and the ones in
+# old left.
+def diff_ids(old, new):
+    if not len(old):
+        return np.array(new, dtype=np.int64), np.empty(0, dtype=np.int64)
+    ids = np.sort(np.concatenate((old, new)), kind='stable')
+    once = np.ones(len(ids), dtype=bool)
+    repeated = ids[1:] == ids[:-1]
+    once[1:] &= ~repeated
+    once[:-1] &= ~repeated
+    changed = ids[once]
+    position = np.minimum(np.searchsorted(old, changed), len(old) - 1)
+    was_member = old[position] == changed
+    return changed[~was_member], changed[was_member]
+
+
+# Member ids of a fetch_all_members output file: csv, ndjson, json or db.
+# A database keeps members of earlier fetches too, members who left included;
+# since (Unix time) keeps the ones written by a fetch started then.
+def read_member_ids(filename, group_id=None, since=None):
+    if is_sqlite_file(filename):
+        store = SQLiteStore(filename)
+        try:
+            return sorted_ids(store.group_members(group_id, since))
+        finally:
+            store.close()
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return sorted_ids(pd.read_csv(filename, usecols=['id'], dtype={'id': np.int64})['id'].to_numpy())
+    with open(filename, encoding='utf-8') as f:
+        if extension == '.json':
+            members = json.load(f)
+        else:
+            members = (json.loads(line) for line in f if line.strip())
+        return sorted_ids(member['id'] if isinstance(member, dict) else int(member) for member in members)
+
+
+# Ids of a finished VKGroupMembers.fetch_all_members run, read back from its
+# file when the run resumed an earlier one
+def fetched_member_ids(members, result):
+    if len(members.member_ids) < result['fetched']:
+        return read_member_ids(result['filename'], members.group_id, result['started'])
+    return members.member_ids
+
+
+# Snapshot directory name of a member list; filtered lists (friends, managers,
+# donut) are compared with earlier ones of the same filter, not the full list
+def snapshot_key(group_id, filter_param=None):
+    return f'{group_id}_{filter_param}' if filter_param else str(group_id)
+
+
+class MemberSnapshots:
+    """Member lists of groups as sorted int64 arrays, one .npy file per fetch.
+
+    A snapshot of 2M members is a 16 MB file opened memory-mapped, so only
+    the pages a comparison touches are read. Files are named by UTC time of
+    the fetch and live in one directory per group.
+    """
+
+    def __init__(self, directory=SNAPSHOTS_DIR):
+        self.directory = directory
+
+    def group_dir(self, group_id):
+        return os.path.join(self.directory, str(group_id))
+
+    # Snapshot files of a group, oldest first
+    def list(self, group_id):
+        directory = self.group_dir(group_id)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if SNAPSHOT_RE.match(name)]
+
+    def save(self, group_id, ids, taken=None):
+        directory = self.group_dir(group_id)
+        os.makedirs(directory, exist_ok=True)
+        taken = taken or datetime.utcnow()
+        filename = os.path.join(directory, f'{taken.strftime(TIME_FORMAT)}.npy')
+        tmp_file = f'{filename}.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.save(f, sorted_ids(ids))
+        os.replace(tmp_file, filename)
+        return filename
+
+    @staticmethod
+    def load(filename):
+        return np.load(filename, mmap_mode='r')
+
+    # Time a snapshot was taken, from its file name
+    @staticmethod
+    def taken(filename):
+        return datetime.strptime(os.path.basename(filename)[:-4], TIME_FORMAT)
+
+    # Joined and left ids between two snapshot files
+    def diff(self, old_file, new_file):
+        return diff_ids(self.load(old_file), self.load(new_file))
+
+    # Save a new snapshot and compare it with the previous one of the group
+    def take(self, group_id, ids, taken=None):
+        filename = self.save(group_id, ids, taken)
+        previous = [name for name in self.list(group_id) if name < filename]
+        report = {'snapshot': filename, 'members': len(self.load(filename)), 'previous': None}
+        if previous:
+            joined, left = self.diff(previous[-1], filename)
+            report.update(previous=previous[-1], joined=len(joined), left=len(left),
+                          joined_ids=joined, left_ids=left)
+        return report
+
+
+# One id per line under an id header, like a members CSV export
+def write_ids(filename, ids):
+    np.savetxt(filename, ids, fmt='%d', header='id', comments='')
@@ -0,0 +1,246 @@
+import json
+import os
+import sqlite3
+import time
+
+from vk_sinks import RecordSink
+
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    owner_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    user_id INTEGER,
+    text TEXT,
+    photo_count INTEGER,
+    video_count INTEGER,
+    comments_count INTEGER,
+    likes_count INTEGER,
+    reposts_count INTEGER,
+    views_count INTEGER,
+    link TEXT,
+    PRIMARY KEY (owner_id, post_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS comments (
+    owner_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    comment_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    user_id INTEGER,
+    text TEXT,
+    photo_count INTEGER,
+    video_count INTEGER,
+    likes_count INTEGER,
+    PRIMARY KEY (owner_id, post_id, comment_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS replies (
+    owner_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    comment_id INTEGER NOT NULL,
+    parent_comment_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    user_id INTEGER,
+    text TEXT,
+    photo_count INTEGER,
+    video_count INTEGER,
+    likes_count INTEGER,
+    PRIMARY KEY (owner_id, post_id, comment_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id INTEGER PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    updated INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS members (
+    group_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    data TEXT,
+    updated INTEGER,
+    PRIMARY KEY (group_id, user_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+CREATE INDEX IF NOT EXISTS comments_date ON comments (date);
+CREATE INDEX IF NOT EXISTS comments_user ON comments (user_id);
+CREATE INDEX IF NOT EXISTS replies_date ON replies (date);
+CREATE INDEX IF NOT EXISTS replies_user ON replies (user_id);
+CREATE INDEX IF NOT EXISTS replies_parent ON replies (owner_id, post_id, parent_comment_id);
+CREATE INDEX IF NOT EXISTS members_user ON members (user_id);
+"""
+
+# Columns filled from parsed records for each record type
+TABLE_COLUMNS = {
+    'post': ('posts', ['owner_id', 'post_id', 'date', 'user_id', 'text', 'photo_count', 'video_count',
+                       'comments_count', 'likes_count', 'reposts_count', 'views_count', 'link'], 2),
+    'comment': ('comments', ['owner_id', 'post_id', 'comment_id', 'date', 'user_id', 'text',
+                             'photo_count', 'video_count', 'likes_count'], 3),
+    'reply': ('replies', ['owner_id', 'post_id', 'comment_id', 'parent_comment_id', 'date', 'user_id', 'text',
+                          'photo_count', 'video_count', 'likes_count'], 3)
+}
+
+
+def is_sqlite_file(filename):
+    return os.path.splitext(filename)[1].lower() in SQLITE_EXTENSIONS
+
+
+# Numeric group id as int, screen name as is
+def group_key(group_id):
+    return int(group_id) if str(group_id).lstrip('-').isdigit() else str(group_id)
+
+
+# INSERT that updates the existing row on primary key conflict
+def upsert_sql(table, columns, key_size):
+    keys = ', '.join(columns[:key_size])
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns[key_size:])
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({keys}) DO UPDATE SET {updates}")
+
+
+class SQLiteStore:
+    """SQLite database of crawled posts, comments, replies, profiles and members."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    # Sink for records of one community
+    def sink(self, owner_id, batch_size=1000):
+        return SQLiteSink(self, owner_id, batch_size)
+
+    # Sink for members of one group
+    def members_sink(self, group_id, batch_size=1000):
+        return SQLiteMembersSink(self, group_id, batch_size)
+
+    def executemany(self, sql, rows):
+        with self.connection:
+            self.connection.executemany(sql, rows)
+
+    # Analysis queries, all backed by indexes
+
+    def post(self, owner_id, post_id):
+        return self.connection.execute(
+            'SELECT * FROM posts WHERE owner_id = ? AND post_id = ?', (int(owner_id), post_id)).fetchone()
+
+    def post_comments(self, owner_id, post_id):
+        return self.connection.execute(
+            'SELECT * FROM comments WHERE owner_id = ? AND post_id = ? ORDER BY comment_id',
+            (int(owner_id), post_id)).fetchall()
+
+    def comment_replies(self, owner_id, post_id, comment_id):
+        return self.connection.execute(
+            'SELECT * FROM replies WHERE owner_id = ? AND post_id = ? AND parent_comment_id = ? ORDER BY comment_id',
+            (int(owner_id), post_id, comment_id)).fetchall()
+
+    # Comments and replies written by user, newest first
+    def user_activity(self, user_id):
+        return self.connection.execute(
+            "SELECT 'comment' AS type, owner_id, post_id, comment_id, NULL AS parent_comment_id, date, text "
+            "FROM comments WHERE user_id = ? "
+            "UNION ALL "
+            "SELECT 'reply', owner_id, post_id, comment_id, parent_comment_id, date, text "
+            "FROM replies WHERE user_id = ? ORDER BY date DESC",
+            (int(user_id), int(user_id))).fetchall()
+
+    # Rows of table ('posts', 'comments' or 'replies') with date in [date_from, date_to)
+    def between(self, table, date_from, date_to):
+        if table not in ('posts', 'comments', 'replies'):
+            raise ValueError(f"Неизвестная таблица: {table}")
+        return self.connection.execute(
+            f'SELECT * FROM {table} WHERE date >= ? AND date < ? ORDER BY date', (date_from, date_to)).fetchall()
+
+    def profile(self, user_id):
+        return self.connection.execute('SELECT * FROM profiles WHERE user_id = ?', (int(user_id),)).fetchone()
+
+    # Member ids of a group, only those upserted at since or later when given
+    def group_members(self, group_id, since=None):
+        return [row[0] for row in self.connection.execute(
+            'SELECT user_id FROM members WHERE group_id = ? AND updated >= ? ORDER BY user_id',
+            (group_key(group_id), since or 0))]
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteSink(RecordSink):
+    """Buffers parsed records and upserts them in batches."""
+
+    def __init__(self, store, owner_id, batch_size=1000):
+        self.store = store
+        self.owner_id = int(owner_id)
+        self.batch_size = batch_size
+        self._rows = {record_type: [] for record_type in TABLE_COLUMNS}
+        self._profiles = {}
+        self._size = 0
+
+    def write(self, record):
+        record_type = record['type']
+        _, columns, _ = TABLE_COLUMNS[record_type]
+        row = dict(record, owner_id=self.owner_id, user_id=int(record['user_id']))
+        self._rows[record_type].append([row.get(column) for column in columns])
+        if record.get('first_name') or record.get('last_name'):
+            self._profiles[row['user_id']] = (row['user_id'], record['first_name'], record['last_name'])
+        self._size += 1
+        if self._size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._size:
+            return
+        for record_type, rows in self._rows.items():
+            if rows:
+                table, columns, key_size = TABLE_COLUMNS[record_type]
+                self.store.executemany(upsert_sql(table, columns, key_size), rows)
+                rows.clear()
+        if self._profiles:
+            now = int(time.time())
+            self.store.executemany(
+                upsert_sql('profiles', ['user_id', 'first_name', 'last_name', 'updated'], 1),
+                [profile + (now,) for profile in self._profiles.values()])
+            self._profiles.clear()
+        self._size = 0
+
+
+class SQLiteMembersSink(RecordSink):
+    """Buffers group members and upserts them in batches."""
+
+    COLUMNS = ['group_id', 'user_id', 'first_name', 'last_name', 'data', 'updated']
+
+    def __init__(self, store, group_id, batch_size=1000):
+        self.store = store
+        self.group_id = group_key(group_id)
+        self.batch_size = batch_size
+        self._rows = []
+        self.written = 0
+
+    def write(self, member):
+        if not isinstance(member, dict):
+            member = {'id': member}
+        self._rows.append((self.group_id, member['id'], member.get('first_name'), member.get('last_name'),
+                           json.dumps(member, ensure_ascii=False), int(time.time())))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.store.executemany(upsert_sql('members', self.COLUMNS, 2), self._rows)
+            self.written += len(self._rows)
+            self._rows = []
+
+    # Rows are upserted, so a resumed export needs no truncation
+    def tell(self):
+        self.flush()
+        return None
@@ -0,0 +1,350 @@
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from vk_records import RECORD_TYPES
+from vk_sinks import flatten
+
+
+# Characters of a cell shown in the table, the whole value goes to the tooltip
+DISPLAY_LIMIT = 200
+
+RECORD_TYPE_LABELS = {'post': 'Пост', 'comment': 'Комментарий', 'reply': 'Ответ'}
+
+
+# Key ordering numbers before strings before missing values
+def sort_value(value):
+    if value is None:
+        return 2, ''
+    if isinstance(value, (int, float)):
+        return 0, value
+    return 1, str(value).lower()
+
+
+# Rank of every value in sort order, equal values ranked by position
+def sort_ranks(values):
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[sorted(range(len(values)), key=values.__getitem__)] = np.arange(len(values))
+    return ranks
+
+
+class LiveTableModel(QAbstractTableModel):
+    """Read-only table over rows a worker thread keeps appending.
+
+    The worker publishes how many rows are complete with set_count, at most
+    a few times a second. Only rows the view asks for are read, so the
+    table stays responsive with millions of them. Without sorting new rows
+    are inserted at the end, the text filter and restrictions only look at
+    rows they have not seen yet. Sorting builds the row order with numpy
+    once; new rows are then merged into it when their keys compare with the
+    earlier ones, otherwise they are shown at the end until finish() or the
+    next sort.
+    """
+
+    columns = ()  # (field, header)
+    row_cache_size = 1024  # Rows kept as dicts for repainting
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._count = 0  # Rows published by the worker
+        self._rows = None  # Source rows in view order while sorted or filtered
+        self._sort_field = None
+        self._descending = False
+        self._ascending = None  # Sorted rows in ascending order, _rows is a view of it
+        self._keys = None  # Sort keys of _ascending while new rows are merged into it
+        self._unsorted = False  # Rows were appended outside the sort order
+        self._filter = ''
+        self._matches = array('q')  # Rows among the first _scanned matching the filter
+        self._scanned = 0
+        self._cache = {}
+
+    # Values of a source row keyed by field
+    def _row(self, row):
+        raise NotImplementedError
+
+    # Rows from start to stop whose values contain the lowercase filter text
+    def _scan(self, start, stop):
+        return [row for row in range(start, stop)
+                if self._filter in ' '.join(str(value) for value in self._row(row).values()).lower()]
+
+    # numpy array of sort keys of rows from start to stop. Reads every row,
+    # only meant for small tables like one page of members.
+    def _sort_keys(self, field, start, stop):
+        return sort_ranks([sort_value(self._row(row).get(field)) for row in range(start, stop)])
+
+    # Keys of new rows compare with keys of earlier ones, unlike ranks
+    def _mergeable(self, field):
+        return False
+
+    # Rows left after restrictions other than the text filter; all of them are from start to stop
+    def _restrict(self, rows, start, stop):
+        return rows
+
+    def _is_view(self):
+        return bool(self._filter) or self._sort_field is not None
+
+    # Rows published, before filtering
+    @property
+    def source_count(self):
+        return self._count
+
+    def source_row(self, row):
+        return row if self._rows is None else int(self._rows[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._count if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][1]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        row = self.source_row(index.row())
+        values = self._cache.get(row)
+        if values is None:
+            if len(self._cache) >= self.row_cache_size:
+                self._cache.clear()
+            values = self._cache[row] = self._row(row)
+        value = values.get(self.columns[index.column()][0])
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            return str(value) if role == Qt.ItemDataRole.DisplayRole else None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return value if len(value) > DISPLAY_LIMIT or '\n' in value else None
+        value = value.replace('\n', ' ')
+        return value if len(value) <= DISPLAY_LIMIT else value[:DISPLAY_LIMIT] + '…'
+
+    # Rows below count are complete and may be shown
+    def set_count(self, count):
+        if count <= self._count:
+            return
+        start = self._count
+        if self._rows is None and not self._is_view():
+            self.beginInsertRows(QModelIndex(), start, count - 1)
+            self._count = count
+            self.endInsertRows()
+            return
+        self._count = count
+        rows = self._restrict(self._filtered(start, count), start, count)
+        if not len(rows):
+            return
+        if self._sort_field is not None and self._keys is not None:
+            self._merge(rows)
+            return
+        if self._sort_field is not None:
+            # Ranks of all rows change with new ones, they are sorted on finish()
+            self._unsorted = True
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+        self._rows = np.concatenate((self._rows, rows))
+        self.endInsertRows()
+
+    # Put new rows of a sorted view in place by their keys
+    def _merge(self, rows):
+        start = int(rows[0])
+        keys = self._sort_keys(self._sort_field, start, self._count)[rows - start]
+        order = np.argsort(keys, kind='stable')
+        rows, keys = rows[order], keys[order]
+        # Equal keys keep source order, new rows come after earlier ones
+        positions = np.searchsorted(self._keys, keys, side='right')
+        # A layout change instead of a reset keeps selection, current index and scroll position
+        self.layoutAboutToBeChanged.emit()
+        old_count = len(self._ascending)
+        self._ascending = np.insert(self._ascending, positions, rows)
+        self._keys = np.insert(self._keys, positions, keys)
+        self._rows = self._ascending[::-1] if self._descending else self._ascending
+        persistent = self.persistentIndexList()
+        if persistent:
+            moved = np.array([index.row() for index in persistent], dtype=np.int64)
+            if self._descending:
+                moved = old_count - 1 - moved
+            moved += np.searchsorted(positions, moved, side='right')
+            if self._descending:
+                moved = len(self._ascending) - 1 - moved
+            self.changePersistentIndexList(persistent, [self.index(int(row), index.column())
+                                                        for row, index in zip(moved, persistent)])
+        self.layoutChanged.emit()
+
+    # Rows from start to stop matching the filter
+    def _filtered(self, start, stop):
+        if not self._filter:
+            return np.arange(start, stop, dtype=np.int64)
+        first = bisect_left(self._matches, start)
+        if self._scanned < stop:
+            self._matches.extend(self._scan(max(start, self._scanned), stop))
+            self._scanned = stop
+        return np.array(self._matches[first:], dtype=np.int64)
+
+    # Workers are done: sort the rows appended while they ran
+    def finish(self):
+        if self._unsorted:
+            self._rebuild()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_field = self.columns[column][0] if 0 <= column < len(self.columns) else None
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self._rebuild()
+
+    def set_filter(self, text):
+        text = text.strip().lower()
+        if text == self._filter:
+            return
+        self._filter = text
+        self._matches = array('q')
+        self._scanned = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.beginResetModel()
+        count = self._count
+        rows = self._restrict(self._filtered(0, count), 0, count)
+        self._ascending = self._keys = None
+        self._unsorted = False
+        if self._sort_field is not None:
+            keys = self._sort_keys(self._sort_field, 0, count)[rows]
+            order = np.argsort(keys, kind='stable')
+            self._ascending = rows[order]
+            if self._mergeable(self._sort_field):
+                self._keys = keys[order]
+            rows = self._ascending[::-1] if self._descending else self._ascending
+        self._rows = rows if self._is_view() else None
+        self.endResetModel()
+
+
+class RecordTableModel(LiveTableModel):
+    """Posts, comments and replies of a RecordTable filled by a running VKParser."""
+
+    columns = (
+        ('type', 'Тип'),
+        ('date', 'Дата'),
+        ('author', 'Автор'),
+        ('text', 'Текст'),
+        ('likes_count', 'Лайки'),
+        ('comments_count', 'Комментарии'),
+        ('post_id', 'Пост'),
+        ('comment_id', 'Комментарий'),
+        ('link', 'Ссылка')
+    )
+
+    # Sort keys read straight from the table columns
+    array_columns = {
+        'type': 'types',
+        'date': 'dates',
+        'likes_count': 'likes_counts',
+        'post_id': 'post_ids',
+        'comment_id': 'comment_ids'
+    }
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self._record_type = None  # Index in RECORD_TYPES to show only that type
+
+    def _row(self, row):
+        record = self.table.record(row)
+        if record['type'] == 'post':
+            author = str(record['user_id'])
+        else:
+            author = f"{record['first_name']} {record['last_name']}".strip() or record['user_id']
+        return {
+            'type': RECORD_TYPE_LABELS[record['type']],
+            'date': record['date'],
+            'author': author,
+            'text': record['text'],
+            'likes_count': record['likes_count'],
+            'comments_count': record.get('comments_count'),
+            'post_id': record['post_id'],
+            'comment_id': record.get('comment_id'),
+            'link': record.get('link') or record.get('post_link')
+        }
+
+    # Text and author name, each name is checked once instead of on every row
+    def _scan(self, start, stop):
+        names = np.array(self.table.names[start:stop])
+        found = [index for index, label in enumerate(self.table.author_names()) if self._filter in label.lower()]
+        matched = np.isin(names, found)
+        matched[np.array(self.table.find_text(self._filter, start, stop), dtype=np.int64) - start] = True
+        return (np.flatnonzero(matched) + start).tolist()
+
+    def _sort_keys(self, field, start, stop):
+        if field in self.array_columns:
+            # Slicing copies the column, the worker may append to it meanwhile
+            return np.array(getattr(self.table, self.array_columns[field])[start:stop])
+        if field == 'link':
+            # Links of one wall differ by post id
+            return np.array(self.table.post_ids[start:stop])
+        if field == 'comments_count':
+            # Only posts have it, the rest go last
+            return self.table.comments_counts(start, stop, missing=np.iinfo(np.int64).max)
+        if field == 'text':
+            return sort_ranks([text.lower() for text in self.table.texts(start, stop)])
+        if field == 'author':
+            # Rank distinct labels once; posts are shown with the id of their author
+            names = np.array(self.table.names[start:stop], dtype=np.int64)
+            labels = [label.lower() for label in self.table.author_names()]
+            posts = np.flatnonzero(names < 0)
+            post_authors, names[posts] = np.unique(np.array(self.table.user_ids[start:stop])[posts],
+                                                   return_inverse=True)
+            names[posts] += len(labels)
+            labels += [str(user_id) for user_id in post_authors.tolist()]
+            return sort_ranks(labels)[names]
+        return super()._sort_keys(field, start, stop)
+
+    # Author and text keys are ranks among the rows sorted so far
+    def _mergeable(self, field):
+        return field not in ('author', 'text')
+
+    def _restrict(self, rows, start, stop):
+        if self._record_type is None:
+            return rows
+        types = np.array(self.table.types[start:stop])
+        return rows[types[rows - start] == self._record_type]
+
+    def _is_view(self):
+        return super()._is_view() or self._record_type is not None
+
+    # Show only posts, comments or replies; None for all
+    def set_record_type(self, record_type):
+        record_type = None if record_type is None else RECORD_TYPES.index(record_type)
+        if record_type != self._record_type:
+            self._record_type = record_type
+            self._rebuild()
+
+
+class MembersTableModel(LiveTableModel):
+    """Group members: one page of dicts or ids, or ids streamed by fetch_all_members."""
+
+    def __init__(self, members, parent=None):
+        super().__init__(parent)
+        self.members = members  # List of ids or member dicts, or array of ids
+        fields = ['id']
+        for member in members[:100]:
+            if isinstance(member, dict):
+                fields.extend(key for key in flatten(member) if key not in fields)
+        self.columns = tuple((field, field) for field in fields) + (('link', 'Ссылка'),)
+
+    def _row(self, row):
+        member = self.members[row]
+        values = flatten(member) if isinstance(member, dict) else {'id': member}
+        values['link'] = f"https://vk.com/id{values.get('id')}"
+        return values
+
+    def _sort_keys(self, field, start, stop):
+        if field == 'id' and isinstance(self.members, array):
+            return np.array(self.members[start:stop])
+        return super()._sort_keys(field, start, stop)
+
+    def _mergeable(self, field):
+        return field == 'id' and isinstance(self.members, array)
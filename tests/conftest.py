@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_vk_server import FakeVKServer  # noqa: E402
+from run_benchmarks import free_port  # noqa: E402
+
+
+class FakeVK:
+    """FakeVKServer on a free port, served by an event loop of its own thread."""
+
+    def __init__(self, **config):
+        self.server = FakeVKServer(**config)
+        self.port = free_port()
+        self.api_url = f'http://127.0.0.1:{self.port}/method/'
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.runner = self._run(self.server.start(host='127.0.0.1', port=self.port))
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    @property
+    def data(self):
+        return self.server.data
+
+    @property
+    def stats(self):
+        return self.server.stats
+
+    def stop(self):
+        self._run(self.runner.cleanup())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+# Factory of fake servers, each stopped after the test
+@pytest.fixture
+def fake_vk():
+    servers = []
+
+    def start(**config):
+        servers.append(FakeVK(**config))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
@@ -0,0 +1,60 @@
+import random
+
+import pandas as pd
+
+from vk_analytics import Analytics
+from vk_records import format_date
+
+KEYWORDS = ['кот', 'пес', 'мышь']
+
+
+def records(count, seed=1):
+    rng = random.Random(seed)
+    post_id = 0
+    for index in range(count):
+        date = format_date(1700000000 + rng.randrange(30 * 24 * 3600))
+        keywords = ', '.join(rng.sample(KEYWORDS, rng.randint(0, 2))) or None
+        if index % 25 == 0:
+            post_id += 1
+            yield {'type': 'post', 'post_id': post_id, 'date': date, 'likes_count': rng.randrange(50),
+                   'reposts_count': rng.randrange(5), 'comments_count': rng.randrange(30),
+                   'views_count': rng.choice([0, rng.randrange(1, 1000)]), 'photo_count': 0, 'video_count': 0,
+                   'keywords': keywords}
+        elif rng.random() < 0.6:
+            yield {'type': 'comment', 'post_id': post_id, 'date': date, 'user_id': str(rng.randrange(1, 20)),
+                   'likes_count': rng.randrange(5), 'keywords': keywords}
+        else:
+            # Replies to a few comments, so threads span chunks
+            yield {'type': 'reply', 'post_id': post_id, 'date': date, 'user_id': str(rng.randrange(1, 20)),
+                   'parent_comment_id': rng.randrange(1, 6), 'likes_count': rng.randrange(5), 'keywords': keywords}
+
+
+def fold(chunk_size, count=500):
+    analytics = Analytics(KEYWORDS + ['сова'], chunk_size=chunk_size)
+    for record in records(count):
+        analytics.write(record)
+    return analytics
+
+
+def test_chunks_add_up_to_one_fold():
+    whole = fold(10 ** 6)
+    names = {user_id: ('Имя', str(user_id)) for user_id in range(20)}
+    expected = whole.summary(names.get)
+    assert expected['threads']['threads'] == 5 and expected['top_commenters'][0]['name'].startswith('Имя')
+    for chunk_size in (7, 64):
+        chunked = fold(chunk_size)
+        assert chunked.summary(names.get) == expected
+        pd.testing.assert_frame_equal(chunked.posts(), whole.posts())
+
+
+def test_keyword_hits_split_from_combinations():
+    analytics = fold(7)
+    hits = {keyword: 0 for keyword in KEYWORDS}
+    for record in records(500):
+        for keyword in (record['keywords'] or '').split(', '):
+            if keyword:
+                hits[keyword] += 1
+    summary = analytics.summary()
+    assert {keyword: value['records'] for keyword, value in summary['keywords'].items()} == dict(hits, сова=0)
+    assert summary['records'] == 500
+    assert sum(summary['comments_by_hour']) == 500 - summary['posts']['count']
@@ -0,0 +1,52 @@
+import os
+
+from vk_archive import ARCHIVE_MISS, ResponseArchive, request_key
+
+
+def test_key_ignores_token_and_order():
+    assert request_key('wall.get', {'offset': 0, 'domain': 'dom', 'access_token': 'x', 'filter': None}) == \
+        request_key('wall.get', {'domain': 'dom', 'offset': '0'})
+
+
+def test_round_trip_and_reopen(tmp_path):
+    filename = str(tmp_path / 'dom.vka')
+    archive = ResponseArchive(filename)
+    first = {'response': {'count': 2, 'items': [{'id': 1, 'text': 'Пост'}]}}
+    archive.append('wall.get', {'domain': 'dom', 'offset': 0}, first)
+    archive.append('wall.get', {'domain': 'dom', 'offset': 100}, {'response': {'count': 2, 'items': []}})
+    archive.append('wall.get', {'domain': 'dom', 'offset': 200}, {'error': {'error_code': 6}})  # Not worth replaying
+    archive.close()
+
+    archive = ResponseArchive(filename, readonly=True)
+    assert len(archive) == 2
+    assert archive.replay('wall.get', {'domain': 'dom', 'offset': 0, 'access_token': 't'}) == first
+    assert archive.replay('wall.get', {'domain': 'dom', 'offset': 200})['error']['error_code'] == ARCHIVE_MISS
+    assert archive.stats['hits'] == 1 and archive.stats['misses'] == 1
+    assert [(method, params['offset']) for method, params, _ in archive] == [('wall.get', '0'), ('wall.get', '100')]
+    archive.close()
+
+
+def test_partial_frame_cut_off(tmp_path):
+    filename = str(tmp_path / 'dom.vka')
+    archive = ResponseArchive(filename)
+    archive.append('wall.get', {'offset': 0}, {'response': {'items': [1]}})
+    archive.append('wall.get', {'offset': 100}, {'response': {'items': [2]}})
+    archive.close()
+    with open(filename, 'r+b') as f:
+        f.truncate(os.path.getsize(filename) - 3)
+
+    archive = ResponseArchive(filename)
+    assert len(archive) == 1
+    archive.append('wall.get', {'offset': 100}, {'response': {'items': [3]}})
+    archive.close()
+    archive = ResponseArchive(filename, readonly=True)
+    assert archive.get('wall.get', {'offset': 100}) == {'response': {'items': [3]}}
+    archive.close()
+
+
+def test_users_replayed_one_by_one(tmp_path):
+    archive = ResponseArchive(str(tmp_path / 'dom.vka'))
+    archive.append('users.get', {'user_ids': '1,2'}, {'response': [{'id': 1}, {'id': 2}]})
+    archive.append('users.get', {'user_ids': '3'}, {'response': [{'id': 3}]})
+    assert archive.replay('users.get', {'user_ids': '3,1,4'}) == {'response': [{'id': 3}, {'id': 1}]}
+    archive.close()
@@ -0,0 +1,33 @@
+from vk_checkpoint import CrawlCheckpoint
+
+
+def test_update_keeps_highest_ids(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / 'dom.json'))
+    checkpoint.update(5, 10, last_comment_id=100, max_comment_id=120)
+    checkpoint.update(5, 12, last_comment_id=None, max_comment_id=110)  # Run that fetched nothing new
+    assert checkpoint.get(5) == {'comments_count': 12, 'last_comment_id': 100, 'max_comment_id': 120}
+    checkpoint.update(5, 15, last_comment_id=130, max_comment_id=140)
+    assert checkpoint.get(5) == {'comments_count': 15, 'last_comment_id': 130, 'max_comment_id': 140}
+    checkpoint.update(7, 0)
+    assert checkpoint.get(7) == {'comments_count': 0, 'last_comment_id': None, 'max_comment_id': None}
+    assert checkpoint.max_post_id == 7
+
+
+def test_save_keeps_newest_posts(tmp_path):
+    filename = str(tmp_path / 'checkpoints' / 'dom.json')
+    checkpoint = CrawlCheckpoint(filename, max_posts=2)
+    for post_id in (1, 2, 3):
+        checkpoint.update(post_id, post_id, post_id * 10, post_id * 10)
+    checkpoint.save()
+
+    loaded = CrawlCheckpoint(filename)
+    assert loaded.max_post_id == 3
+    assert sorted(loaded.posts) == [2, 3]
+    assert loaded.get(3) == checkpoint.get(3)
+
+
+def test_broken_file_starts_over(tmp_path):
+    filename = tmp_path / 'dom.json'
+    filename.write_text('{"max_post_id": 4, "po', encoding='utf-8')
+    checkpoint = CrawlCheckpoint(str(filename))
+    assert checkpoint.max_post_id == 0 and checkpoint.posts == {}
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import cli
+
+
+def write_jobs(tmp_path, api_url, **config):
+    jobs = tmp_path / 'jobs.json'
+    jobs.write_text(json.dumps({
+        'token': 't1', 'token_type': 'group', 'api_url': api_url, 'output_dir': str(tmp_path / 'results'),
+        'period_days': 0, 'count': 3, **config
+    }), encoding='utf-8')
+    return str(jobs)
+
+
+def read_comment_keys(filename):
+    with open(filename, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    return [(record['post_id'], record['comment_id']) for record in records if record['type'] != 'post']
+
+
+def test_report_alone_on_stdout(fake_vk, tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = fake_vk(posts=3, comments=5, members=1500)
+    jobs = write_jobs(tmp_path, server.api_url, walls=[{'domain': 'dom', 'owner_id': '-1'}],
+                      members=[{'group_id': 'club1'}])
+
+    assert cli.main([jobs, '--report', '-']) == cli.EXIT_OK
+    out, err = capsys.readouterr()
+    report = json.loads(out)
+    assert [job['status'] for job in report['jobs']] == ['ok', 'ok']
+    assert '[dom] Начало парсинга' in err
+    assert '[ok]' in err
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['jobs.json', 'results']
+
+
+def test_incremental_run_appends(fake_vk, tmp_path):
+    server = fake_vk(posts=3, comments=20, thread_every=5, thread_size=3)
+    jobs = write_jobs(tmp_path, server.api_url, incremental=True, checkpoint_dir=str(tmp_path / 'checkpoints'),
+                      walls=[{'domain': 'dom', 'owner_id': '1'}])
+    output = str(tmp_path / 'results' / 'dom_data.ndjson')
+    assert cli.main([jobs]) == cli.EXIT_OK
+    first = read_comment_keys(output)
+
+    server.data.config['comments'] = 25
+    assert cli.main([jobs]) == cli.EXIT_OK
+    keys = read_comment_keys(output)
+    assert keys[:len(first)] == first
+    assert len(keys) == len(set(keys)) == 3 * (25 + 5 * 3)
+
+
+@pytest.mark.parametrize('file_format', ['json', 'xlsx'])
+def test_incremental_needs_appendable_format(fake_vk, tmp_path, capsys, file_format):
+    jobs = write_jobs(tmp_path, 'http://127.0.0.1:1/method/', format=file_format, incremental=True,
+                      walls=[{'domain': 'dom', 'owner_id': '1'}])
+    assert cli.main([jobs]) == cli.EXIT_USAGE
+    assert 'incremental' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('owner_id', ['apiclub', '0', 'club1'])
+def test_owner_id_checked(tmp_path, capsys, owner_id):
+    jobs = write_jobs(tmp_path, 'http://127.0.0.1:1/method/', walls=[{'domain': 'dom', 'owner_id': owner_id}])
+    assert cli.main([jobs]) == cli.EXIT_USAGE
+    assert f'Owner ID должен быть числовым ID сообщества, например -164992662, а не «{owner_id}»' in \
+        capsys.readouterr().err
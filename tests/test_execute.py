@@ -0,0 +1,64 @@
+import asyncio
+
+from fake_vk_server import FakeVKData, DEFAULTS
+from vk_execute import ExecuteBatcher, build_execute_code
+
+
+class FakeSend:
+    """Answers execute and single calls from FakeVKData, counting requests."""
+
+    def __init__(self, runtime_error=False):
+        self.data = FakeVKData(dict(DEFAULTS, posts=50, comments=5))
+        self.runtime_error = runtime_error
+        self.requests = []
+
+    async def __call__(self, method, params):
+        self.requests.append(method)
+        if method != 'execute':
+            return self.data.call(method, {k: str(v) for k, v in params.items() if k != 'access_token'})
+        if self.runtime_error:
+            return {'error': {'error_code': 13, 'error_msg': 'Runtime error: response size is too big'}}
+        return self.data.execute(params['code'])
+
+
+async def acquire(method):
+    return 't1'
+
+
+def run_calls(send, calls):
+    async def run():
+        batcher = ExecuteBatcher(acquire, send)
+        results = await asyncio.gather(*[batcher.call(method, params) for method, params in calls])
+        return batcher, results
+    return asyncio.run(run())
+
+
+def test_build_execute_code_skips_none():
+    code = build_execute_code([('wall.get', {'domain': 'dom', 'offset': 0, 'filter': None})])
+    assert code == 'return [API.wall.get({"domain":"dom","offset":0})];'
+
+
+def test_calls_packed_and_fanned_out():
+    send = FakeSend()
+    calls = [('wall.getComments', {'owner_id': -1, 'post_id': post_id, 'count': 100}) for post_id in range(1, 31)]
+    batcher, results = run_calls(send, calls)
+    assert send.requests == ['execute', 'execute']  # 25 and 5 calls
+    assert batcher.stats == {'calls': 30, 'requests': 2}
+    assert [result['response']['items'][0]['post_id'] for result in results] == list(range(1, 31))
+
+
+def test_failed_calls_get_their_errors():
+    send = FakeSend()
+    calls = [('wall.getComments', {'owner_id': -1, 'post_id': post_id}) for post_id in (1, 999, 2)]
+    _, results = run_calls(send, calls)
+    assert 'response' in results[0] and 'response' in results[2]
+    assert results[1]['error']['error_code'] == 100
+    assert results[1]['error']['method'] == 'wall.getComments'
+
+
+def test_runtime_error_falls_back_to_single_calls():
+    send = FakeSend(runtime_error=True)
+    calls = [('wall.get', {'domain': 'dom', 'offset': offset, 'count': 10}) for offset in (0, 10, 20)]
+    _, results = run_calls(send, calls)
+    assert send.requests == ['execute', 'wall.get', 'wall.get', 'wall.get']
+    assert [result['response']['items'][0]['id'] for result in results] == [50, 40, 30]
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import vk_parser  # noqa: E402
+from fake_vk_server import FakeVKData, DEFAULTS  # noqa: E402
+from main import ExportWorker  # noqa: E402
+from vk_parser import VKParser  # noqa: E402
+
+
+@pytest.fixture
+def parser():
+    parser = VKParser('dom', [''], '-1', time_period=None)
+    data = FakeVKData(dict(DEFAULTS, posts=30))
+    for post in data.wall_get({'count': '30'})['response']['items']:
+        parser.emit(parser.parse_post(post))
+    return parser
+
+
+def test_export_progress(parser, tmp_path, monkeypatch):
+    monkeypatch.setattr(vk_parser, 'EXPORT_PROGRESS_STEP', 10)
+    written = []
+    parser.export_to_csv(str(tmp_path / 'dom.csv'), written.append)
+    assert written == [10, 20, 30]
+
+
+def test_export_worker(parser, tmp_path):
+    steps = [(str(tmp_path / 'dom.json'), parser.export_to_json, 30),
+             (str(tmp_path / 'dom_metrics.json'), lambda path, progress: parser.metrics.write(path), 1)]
+    worker = ExportWorker(steps)
+    progress = []
+    paths = []
+    worker.progress.connect(lambda done, total: progress.append((done, total)))
+    worker.finished.connect(paths.extend)
+    worker.run()
+    assert paths == [path for path, _, _ in steps]
+    assert all(os.path.exists(path) for path in paths)
+    assert progress == [(30, 31), (31, 31)]
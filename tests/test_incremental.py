@@ -0,0 +1,44 @@
+import asyncio
+
+from vk_api import VKApi
+from vk_parser import VKParser
+
+
+async def crawl(api_url, checkpoint_file, filter_keywords=False):
+    api = VKApi(api_url=api_url)
+    parser = VKParser('dom', ['t1'], '-1', count=3, time_period=None, api=api, token_type='group', delay=0.0005,
+                      use_execute=False, checkpoint_file=checkpoint_file, filter_keywords=filter_keywords)
+    try:
+        await parser.parse_data()
+    finally:
+        await parser.close()
+        await api.close()
+    return parser
+
+
+def test_new_comments_fetched_from_tail(fake_vk, tmp_path):
+    server = fake_vk(posts=3, comments=20, thread_every=5, thread_size=15)
+    checkpoint_file = str(tmp_path / 'dom.json')
+    asyncio.run(crawl(server.api_url, checkpoint_file))
+
+    server.data.config['comments'] = 25  # Comment 20 with 15 replies and 4 more on every post
+    requests = server.stats['wall.getComments']
+    parser = asyncio.run(crawl(server.api_url, checkpoint_file))
+    assert parser.counts == {'post': 0, 'comment': 15, 'reply': 45}
+    # Tail page and the rest of the thread of comment 20 on every post
+    assert server.stats['wall.getComments'] - requests == 3 * 2
+
+
+def test_keyword_filtered_tail_not_crawled_in_full(fake_vk, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'words.txt').write_text('посту\n', encoding='utf-8')  # Comments only, no replies
+    server = fake_vk(posts=3, comments=20, thread_every=5, thread_size=15)
+    checkpoint_file = str(tmp_path / 'dom.json')
+    asyncio.run(crawl(server.api_url, checkpoint_file, filter_keywords=True))
+
+    server.data.config['comments'] = 25
+    requests = server.stats['wall.getComments']
+    parser = asyncio.run(crawl(server.api_url, checkpoint_file, filter_keywords=True))
+    assert parser.counts == {'post': 0, 'comment': 15, 'reply': 0}
+    assert server.stats['wall.getComments'] - requests == 3 * 2
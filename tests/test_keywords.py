@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from vk_keywords import KeywordMatcher, fold
+
+
+# Every occurrence of every keyword by str.find
+def naive_find(keywords, text, whole_words=False):
+    text = fold(text)
+    found = []
+    for keyword in dict.fromkeys(fold(k.strip()) for k in keywords):
+        start = text.find(keyword) if keyword else -1
+        while start >= 0:
+            end = start + len(keyword)
+            if not whole_words or not ((start > 0 and text[start - 1].isalnum())
+                                       or (end < len(text) and text[end].isalnum())):
+                found.append(keyword)
+                break
+            start = text.find(keyword, start + 1)
+    return found
+
+
+def test_case_and_yo_folded():
+    matcher = KeywordMatcher(['Ёлка', 'STRASSE'])
+    assert matcher.find('Купили елку? ЁЛКА стоит на Straße') == ['елка', 'strasse']
+
+
+def test_whole_words():
+    matcher = KeywordMatcher(['кот', 'кот ученый'], whole_words=True)
+    assert matcher.find('Котёнок и скот') == []
+    assert matcher.find('(Кот ученый), кот.') == ['кот', 'кот ученый']
+    assert not matcher.matches('котокот')
+
+
+def test_keywords_listed_once_in_order():
+    matcher = KeywordMatcher(['б', ' а ', 'Б', ''])
+    assert matcher.keywords == ['б', 'а']
+    assert matcher.find('ааа ббб') == ['б', 'а']
+
+
+@pytest.mark.parametrize('whole_words', [False, True])
+def test_matches_naive_search(whole_words):
+    rng = random.Random(1)
+    alphabet = 'аеёбАЕЁБ ,.'
+
+    def word(low, high):
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+    for _ in range(500):
+        keywords = [word(1, 4) for _ in range(rng.randint(1, 6))]
+        text = word(0, 40)
+        matcher = KeywordMatcher(keywords, whole_words=whole_words)
+        expected = naive_find(keywords, text, whole_words)
+        assert matcher.find(text) == [k for k in matcher.keywords if k in expected]
+        assert matcher.matches(text) == bool(expected)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from vk_limiter import RateLimiter, TokenBucket
+
+
+def test_rate_limit_halves_rate_and_caps_recovery():
+    limiter = RateLimiter('t1', 'group')
+    limiter.rate_limited()
+    assert limiter.rate == 10
+    assert limiter.ceiling == 18
+    assert limiter.rate_limits == 1
+    for _ in range(30):
+        limiter.recover()
+    assert limiter.rate == pytest.approx(18)
+    assert all(bucket.rate == limiter.rate for bucket in limiter.buckets)
+    for _ in range(limiter.probe_after):
+        limiter.recover()
+    assert limiter.ceiling == pytest.approx(19)
+
+
+def test_ceiling_probed_back_to_max_rate():
+    limiter = RateLimiter('t1', 'user', window=0)
+    for _ in range(15):
+        limiter.rate_limited()
+        for _ in range(60):
+            limiter.recover()
+    assert limiter.ceiling > 1.5  # Never raised, it would be 0.62
+    for _ in range(300):
+        limiter.recover()
+    assert limiter.rate == limiter.ceiling == 3
+
+
+def test_errors_of_requests_sent_before_slowdown_ignored():
+    limiter = RateLimiter('t1', 'group')
+    started = time.monotonic()
+    limiter.rate_limited(started)
+    limiter.rate_limited(started)  # Sent at the old rate, already covered
+    assert limiter.rate == 10
+    limiter.rate_limited(time.monotonic() + limiter.window)
+    assert limiter.rate == 5
+    assert limiter.rate_limits == 2
+
+
+def test_rate_floor():
+    limiter = RateLimiter('t1', 'group', window=0)
+    for _ in range(20):
+        limiter.rate_limited()
+    assert limiter.rate == pytest.approx(limiter.max_rate * 0.05)
+
+
+def test_tokens_rotate():
+    limiter = RateLimiter(['t1', 't2', 't3'], rate=1000)
+
+    async def acquire_all():
+        return [await limiter.acquire('wall.get') for _ in range(6)]
+
+    tokens = asyncio.run(acquire_all())
+    assert tokens[:3] == ['t1', 't2', 't3']
+    assert sorted(tokens) == ['t1', 't1', 't2', 't2', 't3', 't3']
+    assert limiter.throughput == 3000
+
+
+def test_bucket_spaces_requests():
+    bucket = TokenBucket(rate=50)
+
+    async def acquire(count):
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire(6)) >= 5 / 50 * 0.9
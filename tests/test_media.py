@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import json
+import os
+
+from vk_media import INDEX_FILE, PARTS_DIR, MediaDownloader
+
+
+def part_file(directory, url):
+    return os.path.join(directory, PARTS_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+
+
+def stored_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory) for root, _, names in os.walk(directory)
+                  for name in names if PARTS_DIR not in root and name != INDEX_FILE)
+
+
+def read_index(directory):
+    with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+async def download(directory, urls):
+    media = MediaDownloader(directory, workers=2)
+    try:
+        added = [media.add(url, post_id=1) for url in urls]
+        await media.join()
+    finally:
+        await media.close()
+    return media, added
+
+
+def test_complete_part_file_moved_in_place(fake_vk, tmp_path):
+    server = fake_vk(media_size=1000)
+    url = f'{server.data.media_url}p1.jpg'
+    content = server.data.media('p1.jpg')
+    directory = str(tmp_path)
+    os.makedirs(os.path.join(directory, PARTS_DIR))
+    with open(part_file(directory, url), 'wb') as f:
+        f.write(content)  # Run stopped before moving it
+
+    media, _ = asyncio.run(download(directory, [url]))
+    entry, = read_index(directory)
+    assert entry['size'] == len(content) and entry['sha256'] == hashlib.sha256(content).hexdigest()
+    assert media.stats['failed'] == 0 and media.stats['bytes'] == 0
+
+
+def test_same_content_stored_once_and_rerun_skips(fake_vk, tmp_path):
+    server = fake_vk(media_size=1000, media_variants=1)
+    urls = [f'{server.data.media_url}p{post_id}.jpg' for post_id in (1, 2, 3)]
+    directory = str(tmp_path)
+
+    media, added = asyncio.run(download(directory, urls + urls[:1]))
+    assert added == [True, True, True, False]
+    assert media.stats['duplicates'] == 2
+    assert len(stored_files(directory)) == 1
+    assert {entry['url'] for entry in read_index(directory)} == set(urls)
+    assert len({entry['file'] for entry in read_index(directory)}) == 1
+
+    requests = server.stats['media']
+    media, added = asyncio.run(download(directory, urls + [f'{server.data.media_url}p4.jpg']))
+    assert added == [False, False, False, True]
+    assert server.stats['media'] == requests + 1
+    assert media.stats['duplicates'] == 1
+    assert len(stored_files(directory)) == 1
+
+
+def test_interrupted_download_resumed(fake_vk, tmp_path):
+    server = fake_vk(media_size=2000000)
+    url = f'{server.data.media_url}p1.jpg'
+    directory = str(tmp_path)
+
+    async def interrupt():
+        media = MediaDownloader(directory, chunk_size=1024)
+        task = asyncio.ensure_future(media.download(url))
+        part = part_file(directory, url)
+        while not (os.path.exists(part) and os.path.getsize(part)):
+            await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await media.close()
+        return os.path.getsize(part)
+
+    left = asyncio.run(interrupt())
+    assert 0 < left < 2000000
+    media, _ = asyncio.run(download(directory, [url]))
+    assert media.stats['resumed'] == 1 and server.stats['media_ranges'] == 1
+    assert media.stats['bytes'] == 2000000 - left
+    entry, = read_index(directory)
+    content = server.data.media('p1.jpg')
+    assert entry['size'] == len(content) and entry['sha256'] == hashlib.sha256(content).hexdigest()
+    with open(os.path.join(directory, entry['file']), 'rb') as f:
+        assert f.read() == content
+    assert os.listdir(os.path.join(directory, PARTS_DIR)) == []
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from vk_api import VKApi
+from vk_parser import VKGroupMembers
+from vk_snapshots import fetched_member_ids, read_member_ids
+
+
+class Interrupted(Exception):
+    pass
+
+
+async def fetch(api_url, filename, stop_at=None, runs=None):
+    api = VKApi(api_url=api_url)
+    members = VKGroupMembers('t1', 'club1', api=api, token_type='group')
+    if runs is not None:
+        runs.append(members)
+
+    def progress(percent):
+        if stop_at is not None and members.fetched_count >= stop_at:
+            raise Interrupted()
+
+    try:
+        return await members.fetch_all_members(filename, progress_callback=progress, pages_per_step=1)
+    finally:
+        await api.close()
+
+
+@pytest.mark.parametrize('extension', ['csv', 'ndjson', 'db'])
+def test_resume_from_state_file(fake_vk, tmp_path, extension):
+    server = fake_vk(members=3500)
+    filename = str(tmp_path / f'members.{extension}')
+    with pytest.raises(Interrupted):
+        asyncio.run(fetch(server.api_url, filename, stop_at=2000))
+    with open(f'{filename}.state.json', encoding='utf-8') as f:
+        assert json.load(f)['offset'] == 2000
+
+    result = asyncio.run(fetch(server.api_url, filename))
+    assert result.pop('started') <= time.time()
+    assert result == {'count': 3500, 'fetched': 3500, 'filename': filename}
+    assert not os.path.exists(f'{filename}.state.json')
+    ids = read_member_ids(filename, 'club1')
+    assert ids.tolist() == list(range(1, 3501))
+    if extension != 'db':
+        with open(filename, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3500 + (extension == 'csv')  # No rows written twice
+
+
+@pytest.mark.parametrize('extension', ['json', 'xlsx'])
+def test_not_resumable_format_rejected(fake_vk, tmp_path, extension):
+    server = fake_vk(members=10)
+    filename = str(tmp_path / f'members.{extension}')
+    with pytest.raises(ValueError):
+        asyncio.run(fetch(server.api_url, filename))
+    assert not os.path.exists(filename)
+
+
+def test_csv_widened_after_state_restarts(fake_vk, tmp_path):
+    server = fake_vk(members=1500)
+    filename = str(tmp_path / 'members.csv')
+    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('id,deactivated\r\n1,\r\n')
+    job = {'group_id': 'club1', 'sort': None, 'fields': None, 'filter': None}
+    with open(f'{filename}.state.json', 'w', encoding='utf-8') as f:
+        json.dump({'job': job, 'offset': 1000, 'count': 1500, 'size': 5, 'columns': ['id']}, f)
+
+    asyncio.run(fetch(server.api_url, filename))
+    assert read_member_ids(filename).tolist() == list(range(1, 1501))
+    with open(filename, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 1501
+
+
+def test_resumed_database_snapshot_leaves_out_former_members(fake_vk, tmp_path):
+    server = fake_vk(members=3500)
+    filename = str(tmp_path / 'members.db')
+    asyncio.run(fetch(server.api_url, filename))
+    connection = sqlite3.connect(filename)
+    with connection:
+        connection.execute('UPDATE members SET updated = updated - 3600')  # An earlier fetch
+    connection.close()
+
+    server.data.config['members'] = 3000  # 3001..3500 left
+    with pytest.raises(Interrupted):
+        asyncio.run(fetch(server.api_url, filename, stop_at=2000))
+    runs = []
+    result = asyncio.run(fetch(server.api_url, filename, runs=runs))
+    assert len(runs[0].member_ids) == 1000
+    assert fetched_member_ids(runs[0], result).tolist() == list(range(1, 3001))
+    assert len(read_member_ids(filename, 'club1')) == 3500
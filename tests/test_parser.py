@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from vk_api import VKApi
+from vk_parser import VKParser
+
+
+async def crawl(api_url, count=20, time_period=None, **options):
+    api = VKApi(api_url=api_url)
+    parser = VKParser('dom', ['t1'], '-1', count=count, time_period=time_period, api=api, token_type='group',
+                      delay=0.0005, **options)
+    try:
+        await parser.parse_data()
+    finally:
+        await parser.close()
+        await api.close()
+    return parser
+
+
+@pytest.mark.parametrize('use_execute', [True, False])
+def test_crawl_all_comments_and_replies(fake_vk, use_execute):
+    server = fake_vk(posts=20, comments=120, thread_every=10, thread_size=25)
+    parser = asyncio.run(crawl(server.api_url, use_execute=use_execute))
+    # Every 10th comment has a thread of 25 replies, 10 of them inline
+    assert parser.counts == {'post': 20, 'comment': 20 * 120, 'reply': 20 * 12 * 25}
+    assert parser.failed_posts == 0
+    records = list(parser.parsed_data)
+    replies = [record for record in records if record['type'] == 'reply']
+    assert len({(record['post_id'], record['comment_id']) for record in replies}) == len(replies)
+
+
+def test_execute_saves_requests(fake_vk):
+    server = fake_vk(posts=20, comments=120, thread_every=10, thread_size=25)
+    asyncio.run(crawl(server.api_url, use_execute=False))
+    single = server.stats['requests']
+    asyncio.run(crawl(server.api_url, use_execute=True))
+    assert server.stats['requests'] - single < single / 5
+
+
+def post_ids(parser):
+    return [record['post_id'] for record in parser.parsed_data if record['type'] == 'post']
+
+
+def test_count_capped_across_pages(fake_vk):
+    server = fake_vk(posts=300, comments=1, thread_size=0)
+    parser = asyncio.run(crawl(server.api_url, count=250, use_execute=False))
+    assert post_ids(parser) == list(range(300, 50, -1))
+    assert server.stats['wall.get'] == 3
+
+
+# Posts are an hour apart, the newest 11 are within 10.5 hours
+@pytest.mark.parametrize('pinned, expected', [(0, list(range(300, 289, -1))),
+                                              (1, list(range(300, 289, -1))),
+                                              (295, [295] + [post_id for post_id in range(300, 289, -1)
+                                                             if post_id != 295])])
+def test_time_period_cutoff(fake_vk, pinned, expected):
+    server = fake_vk(posts=300, comments=1, thread_size=0, pinned=pinned)
+    parser = asyncio.run(crawl(server.api_url, count=1000, time_period=int(10.5 * 3600), use_execute=False))
+    assert post_ids(parser) == expected
+    assert server.stats['wall.get'] == 1
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from vk_profiles import USERS_GET_LIMIT, ProfileCache
+
+
+def test_least_recently_used_dropped():
+    cache = ProfileCache(max_size=2)
+    cache.put(1, 'Анна', 'А')
+    cache.put(2, 'Борис', 'Б')
+    assert cache.get(1) == ('Анна', 'А')  # 2 is now the oldest
+    cache.put(3, 'Вера', 'В')
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert cache.get(2) is None
+    assert cache.stats == {'hits': 1, 'misses': 1, 'resolved': 0}
+
+
+def test_groups_keyed_by_negative_id():
+    cache = ProfileCache()
+    cache.add_response({'profiles': [{'id': 5, 'first_name': 'Иван', 'last_name': 'Петров'}],
+                        'groups': [{'id': 5, 'name': 'Клуб'}]})
+    assert cache.get(5) == ('Иван', 'Петров')
+    assert cache.get(-5) == ('Клуб', '')
+
+
+def test_concurrent_callers_share_users_get():
+    cache = ProfileCache(window=0.01)
+    calls = []
+
+    async def fetch(ids):
+        calls.append(ids)
+        return {'response': [{'id': user_id, 'first_name': f'Имя{user_id}', 'last_name': ''}
+                             for user_id in ids if user_id % 2]}
+
+    async def resolve():
+        await asyncio.gather(cache.resolve(range(1, 1501), fetch), cache.resolve([1500, 1501, -3], fetch))
+        await cache.resolve([2, 3], fetch)  # 2 unknown, 3 cached
+
+    asyncio.run(resolve())
+    assert [len(ids) for ids in calls] == [USERS_GET_LIMIT, 501]
+    assert cache.get(1501) == ('Имя1501', '')
+    assert cache.get(2) is None
+    assert cache.stats['resolved'] == 751
+
+
+def test_file_only_when_given(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ProfileCache()
+    cache.put(1, 'Анна', 'А')
+    cache.save()
+    assert list(tmp_path.iterdir()) == []
+
+    filename = str(tmp_path / 'data' / 'profiles.json')
+    cache.use_file(filename)
+    cache.save()
+    with open(filename, encoding='utf-8') as f:
+        assert json.load(f) == {'1': ['Анна', 'А']}
+    assert ProfileCache(filename).get(1) == ('Анна', 'А')
+
+    cache.use_file(None)
+    cache.put(2, 'Борис', 'Б')
+    cache.save()
+    assert ProfileCache(filename).get(2) is None
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from reprocess import reprocess
+from vk_api import VKApi
+from vk_archive import ResponseArchive
+from vk_parser import VKParser, community_id
+from vk_sinks import NDJSONSink
+from vk_storage import SQLiteStore
+
+OWNER_ID = '-164992662'  # As typed in the GUI
+
+
+async def crawl(api_url, archive_file, output, database):
+    api = VKApi(api_url=api_url)
+    archive = ResponseArchive(archive_file)
+    store = SQLiteStore(database)
+    parser = VKParser('dom', ['t1'], OWNER_ID, count=5, time_period=None, api=api, token_type='group', delay=0.0005,
+                      sinks=[NDJSONSink(output), store.sink(community_id(OWNER_ID))], archive=archive)
+    try:
+        await parser.parse_data()
+    finally:
+        await parser.close()
+        await api.close()
+        archive.close()
+        store.close()
+
+
+# Records in a fixed order: reprocessing keeps the order of archived responses, not of posts
+def read_ndjson(filename):
+    with open(filename, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    return sorted(records, key=lambda record: (record['post_id'], record.get('comment_id', 0)))
+
+
+def table_keys(database):
+    connection = sqlite3.connect(database)
+    try:
+        return {table: connection.execute(f'SELECT owner_id, post_id, comment_id FROM {table} ORDER BY 2, 3').fetchall()
+                for table in ('comments', 'replies')}
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def crawled(fake_vk, tmp_path):
+    # Every third author is missing from page profiles and resolved with users.get
+    server = fake_vk(posts=5, comments=30, thread_every=4, thread_size=12, unlisted_every=3)
+    files = {name: str(tmp_path / name) for name in ('crawl.vka', 'crawl.ndjson', 'crawl.db')}
+    asyncio.run(crawl(server.api_url, *files.values()))
+    return files
+
+
+@pytest.mark.parametrize('owner_id', [OWNER_ID, OWNER_ID.lstrip('-')])
+def test_reprocess_matches_crawl(crawled, tmp_path, owner_id):
+    output = str(tmp_path / 'reprocessed.ndjson')
+    database = str(tmp_path / 'reprocessed.db')
+    reprocess([crawled['crawl.vka']], output, workers=0, domain='dom', owner_id=owner_id)
+    reprocess([crawled['crawl.vka']], database, workers=0, domain='dom', owner_id=owner_id)
+
+    records = read_ndjson(crawled['crawl.ndjson'])
+    assert records[0]['link'] == 'https://vk.com/dom?w=wall-164992662_1'
+    unlisted = [record for record in records if record['type'] != 'post' and int(record['user_id']) % 3 == 0]
+    assert unlisted and all(record['first_name'] for record in unlisted)
+    assert read_ndjson(output) == records
+    assert table_keys(database) == table_keys(crawled['crawl.db'])
+    assert table_keys(database)['comments'][0][0] == 164992662
+
+
+def test_reprocess_in_processes(crawled, tmp_path):
+    output = str(tmp_path / 'reprocessed.ndjson')
+    reprocess([crawled['crawl.vka']], output, workers=2, domain='dom', owner_id=OWNER_ID, shard_bytes=1)
+    assert read_ndjson(output) == read_ndjson(crawled['crawl.ndjson'])
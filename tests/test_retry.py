@@ -0,0 +1,85 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from vk_retry import RetryPolicy, error_code
+
+
+def error(code):
+    return {'error': {'error_code': code, 'error_msg': 'test'}}
+
+
+# request() answering with the given results in turn, exceptions are raised
+def replies(*results):
+    calls = []
+
+    async def request():
+        result = results[min(len(calls), len(results) - 1)]
+        calls.append(result)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return request, calls
+
+
+def test_error_code():
+    assert error_code(error(6)) == 6
+    assert error_code({'response': []}) is None
+    assert error_code({'error': 'text'}) is None
+    assert error_code([]) is None
+
+
+def test_errors_classified():
+    limited, succeeded = [], []
+    policy = RetryPolicy(base_delay=0, on_rate_limit=limited.append, on_success=lambda: succeeded.append(1))
+    request, calls = replies(error(6), error(9), error(10), {'response': 1})
+    assert asyncio.run(policy.call(request)) == {'response': 1}
+    assert len(calls) == 4
+    assert len(limited) == 2 and succeeded == [1]
+    assert policy.stats == {'retries': 3, 'rate_limited': 2, 'server_errors': 1, 'network_errors': 0, 'failed': 0}
+
+
+def test_other_errors_returned_at_once():
+    succeeded = []
+    policy = RetryPolicy(base_delay=0, on_success=lambda: succeeded.append(1))
+    request, calls = replies(error(100), {'response': 1})
+    assert asyncio.run(policy.call(request)) == error(100)
+    assert len(calls) == 1 and succeeded == []
+
+
+@pytest.mark.parametrize('code, attempts', [(10, 4), (6, 7)])
+def test_attempt_budgets(code, attempts):
+    policy = RetryPolicy(max_attempts=4, max_rate_limit_attempts=7, base_delay=0)
+    request, calls = replies(error(code))
+    assert asyncio.run(policy.call(request)) == error(code)
+    assert len(calls) == attempts
+    assert policy.stats['failed'] == 1 and policy.stats['retries'] == attempts - 1
+
+
+def test_rate_limit_errors_leave_other_budget():
+    policy = RetryPolicy(max_attempts=2, max_rate_limit_attempts=10, base_delay=0)
+    request, calls = replies(error(10), error(6), error(6), error(6), {'response': 1})
+    assert asyncio.run(policy.call(request)) == {'response': 1}
+    assert len(calls) == 5
+
+
+def test_network_errors_retried_then_raised():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    request, calls = replies(asyncio.TimeoutError(), ValueError('not json'), {'response': 1})
+    assert asyncio.run(policy.call(request)) == {'response': 1}
+    assert policy.stats['network_errors'] == 2
+
+    request, calls = replies(aiohttp.ClientConnectionError('refused'))
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(policy.call(request))
+    assert len(calls) == 3
+    assert policy.stats['failed'] == 1
+
+
+def test_backoff_bounds(monkeypatch):
+    policy = RetryPolicy(base_delay=0.5, max_delay=30.0)
+    monkeypatch.setattr('random.uniform', lambda low, high: (low, high))
+    assert [policy.backoff(attempt) for attempt in range(8)] == [
+        (0, 0.5), (0, 1.0), (0, 2.0), (0, 4.0), (0, 8.0), (0, 16.0), (0, 30.0), (0, 30.0)]
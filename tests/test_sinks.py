@@ -0,0 +1,95 @@
+import csv
+import json
+
+import pytest
+
+from vk_sinks import CSVSink, XLSXSink, open_sink
+
+
+def read_csv(filename):
+    with open(filename, encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_adds_columns_of_later_rows(tmp_path):
+    filename = str(tmp_path / 'members.csv')
+    sink = CSVSink(filename, buffer_size=2)
+    sink.write({'id': 1, 'first_name': 'А'})
+    sink.write({'id': 2, 'first_name': 'Б'})
+    sink.write({'id': 3, 'first_name': 'В', 'deactivated': 'deleted'})
+    sink.write({'id': 4, 'city': {'id': 1, 'title': 'Москва'}})
+    sink.close()
+
+    rows = read_csv(filename)
+    assert list(rows[0]) == ['id', 'first_name', 'deactivated', 'city.id', 'city.title']
+    assert [row['id'] for row in rows] == ['1', '2', '3', '4']
+    assert rows[0]['deactivated'] == ''
+    assert rows[2]['deactivated'] == 'deleted'
+    assert rows[3]['city.title'] == 'Москва'
+
+
+def test_csv_append_adds_columns(tmp_path):
+    filename = str(tmp_path / 'members.csv')
+    sink = CSVSink(filename)
+    sink.write({'id': 1})
+    sink.close()
+    sink = CSVSink(filename, append=True)
+    sink.write({'id': 2, 'mobile_phone': '+7 900'})
+    sink.close()
+
+    assert read_csv(filename) == [{'id': '1', 'mobile_phone': ''}, {'id': '2', 'mobile_phone': '+7 900'}]
+
+
+def test_csv_fixed_columns(tmp_path):
+    filename = str(tmp_path / 'records.csv')
+    sink = CSVSink(filename, fieldnames=['id'], buffer_size=1)
+    sink.write({'id': 1})
+    sink.write({'id': 2, 'extra': 'x'})
+    sink.close()
+
+    assert read_csv(filename) == [{'id': '1'}, {'id': '2'}]
+
+
+@pytest.mark.parametrize('extension', ['json', 'xlsx'])
+def test_append_rejected(tmp_path, extension):
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / f'records.{extension}'), append=True)
+
+
+def test_json_and_ndjson_round_trip(tmp_path):
+    records = [{'id': 1, 'text': 'Привет'}, {'id': 2, 'city': {'id': 1}}]
+    for extension in ('json', 'ndjson'):
+        filename = str(tmp_path / f'records.{extension}')
+        sink = open_sink(filename, buffer_size=1)
+        for record in records:
+            sink.write(record)
+        sink.close()
+        with open(filename, encoding='utf-8') as f:
+            loaded = json.load(f) if extension == 'json' else [json.loads(line) for line in f]
+        assert loaded == records
+
+
+def test_ndjson_append(tmp_path):
+    filename = str(tmp_path / 'records.ndjson')
+    for record_id in (1, 2):
+        sink = open_sink(filename, append=True)
+        sink.write({'id': record_id})
+        sink.close()
+    with open(filename, encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == [1, 2]
+
+
+def test_xlsx_sheets_and_overflow(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    filename = str(tmp_path / 'records.xlsx')
+    sink = XLSXSink(filename, fieldnames=['type', 'text'], max_rows=3, buffer_size=2)
+    for index in range(5):
+        sink.write({'type': 'comment', 'text': f'Комментарий {index}\x01'})
+    sink.write({'type': 'post', 'text': ['a', 'b']})
+    sink.close()
+
+    workbook = openpyxl.load_workbook(filename, read_only=True)
+    sheets = {sheet.title: [list(row) for row in sheet.iter_rows(values_only=True)] for sheet in workbook}
+    assert list(sheets) == ['comments', 'comments (2)', 'comments (3)', 'posts']
+    assert sheets['comments'] == [['type', 'text'], ['comment', 'Комментарий 0'], ['comment', 'Комментарий 1']]
+    assert sheets['posts'] == [['type', 'text'], ['post', 'a, b']]
@@ -0,0 +1,55 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import cli
+from vk_snapshots import MemberSnapshots, diff_ids, snapshot_key, sorted_ids
+
+
+@pytest.mark.parametrize('old_size, new_size', [(0, 0), (0, 50), (50, 0), (1, 1), (200, 300), (1000, 1000)])
+def test_diff_ids_matches_sets(old_size, new_size):
+    rng = np.random.default_rng(old_size * 7 + new_size)
+    universe = 2 * max(old_size, new_size, 1)  # Lists overlap by about a half
+    for _ in range(20):
+        old = rng.choice(universe, old_size, replace=False)
+        new = rng.choice(universe, new_size, replace=False)
+        joined, left = diff_ids(sorted_ids(old), sorted_ids(new))
+        assert joined.tolist() == sorted(set(new.tolist()) - set(old.tolist()))
+        assert left.tolist() == sorted(set(old.tolist()) - set(new.tolist()))
+        assert joined.dtype == left.dtype == np.int64
+
+
+def test_sorted_ids_drop_duplicates():
+    assert sorted_ids([5, 1, 5, 3, 1]).tolist() == [1, 3, 5]
+    assert sorted_ids([]).tolist() == []
+
+
+def test_take_compares_with_previous(tmp_path):
+    snapshots = MemberSnapshots(str(tmp_path))
+    first = snapshots.take('club1', [3, 1, 2])
+    assert first['previous'] is None and first['members'] == 3
+    later = snapshots.take('club1', [2, 3, 4, 5], taken=snapshots.taken(first['snapshot']).replace(year=2100))
+    assert later['previous'] == first['snapshot']
+    assert (later['joined'], later['left']) == (2, 1)
+    assert later['joined_ids'].tolist() == [4, 5] and later['left_ids'].tolist() == [1]
+
+
+def test_filtered_lists_kept_apart(fake_vk, tmp_path):
+    server = fake_vk(members=1500)
+    snapshot_dir = tmp_path / 'snapshots'
+    jobs = tmp_path / 'jobs.json'
+    reports = []
+    for job in ({'group_id': 'club1'}, {'group_id': 'club1', 'filter': 'managers'}):
+        jobs.write_text(json.dumps({
+            'token': 't1', 'token_type': 'group', 'api_url': server.api_url, 'output_dir': str(tmp_path / 'results'),
+            'snapshot_dir': str(snapshot_dir), 'members': [job]
+        }), encoding='utf-8')
+        report = tmp_path / 'report.json'
+        assert cli.main([str(jobs), '--report', str(report)]) == cli.EXIT_OK
+        reports.append(json.loads(report.read_text(encoding='utf-8'))['jobs'][0]['summary']['snapshot'])
+
+    assert snapshot_key('club1', 'managers') == 'club1_managers'
+    assert sorted(os.listdir(snapshot_dir)) == ['club1', 'club1_managers']
+    assert reports[1]['previous'] is None  # Not compared with the full list
@@ -0,0 +1,129 @@
+import os
+import random
+from array import array
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtCore import QCoreApplication, QPersistentModelIndex, Qt  # noqa: E402
+
+from vk_records import RecordTable, format_date  # noqa: E402
+from vk_table_models import RecordTableModel, MembersTableModel  # noqa: E402
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    yield QCoreApplication.instance() or QCoreApplication([])
+
+
+def records(count, seed=1):
+    rng = random.Random(seed)
+    for index in range(count):
+        post_id = 100 + index // 10
+        record = {'date': format_date(1700000000 + rng.randrange(10 ** 6)), 'text': rng.choice(['б', 'А', 'в', '']),
+                  'photo_count': 0, 'video_count': 0, 'likes_count': rng.randrange(5), 'post_id': post_id}
+        if index % 10 == 0:
+            record.update(type='post', user_id=-1, comments_count=rng.randrange(5), reposts_count=0, views_count=0)
+        else:
+            record.update(type='comment', user_id=str(index % 7), first_name=rng.choice(['Иван', 'Анна', 'Петр']),
+                          last_name='', comment_id=1000 + index)
+        yield record
+
+
+def view(model):
+    return [model.source_row(row) for row in range(model.rowCount())]
+
+
+def column(model, field):
+    return [field for field, _ in model.columns].index(field)
+
+
+def rebuilt(table, count, field, order, record_type=None, text=''):
+    model = RecordTableModel(table)
+    model.set_count(count)
+    model.set_record_type(record_type)
+    model.set_filter(text)
+    model.sort(column(model, field), order)
+    return view(model)
+
+
+@pytest.mark.parametrize('field', ['date', 'likes_count', 'comments_count', 'link'])
+@pytest.mark.parametrize('order', [Qt.SortOrder.AscendingOrder, Qt.SortOrder.DescendingOrder])
+def test_new_rows_merged_into_sort(field, order):
+    table = RecordTable('dom', '1')
+    model = RecordTableModel(table)
+    model.set_record_type('comment' if field == 'likes_count' else None)
+    model.sort(column(model, field), order)
+    for record in records(500):
+        table.append(record)
+        if len(table) % 37 == 0:
+            model.set_count(len(table))
+    model.set_count(len(table))
+    assert view(model) == rebuilt(table, len(table), field, order, 'comment' if field == 'likes_count' else None)
+
+
+def table_author_rows(table):
+    return {row for row, name in enumerate(table.names) if name >= 0 and 'а' in table.author_names()[name].lower()}
+
+
+def test_ranked_rows_appended_until_finish():
+    table = RecordTable('dom', '1')
+    for record in records(100):
+        table.append(record)
+    model = RecordTableModel(table)
+    model.set_count(50)
+    model.set_filter('а')
+    model.sort(column(model, 'author'))
+    sorted_rows = view(model)
+    model.set_count(100)
+    author_rows = table_author_rows(table)
+    new_rows = [row for row in range(50, 100) if 'а' in table.text(row).lower() or row in author_rows]
+    assert view(model)[:len(sorted_rows)] == sorted_rows
+    assert sorted(view(model)[len(sorted_rows):]) == new_rows
+    model.finish()
+    assert view(model) == rebuilt(table, 100, 'author', Qt.SortOrder.AscendingOrder, text='а')
+
+
+def test_text_sort():
+    table = RecordTable('dom', '1')
+    for record in records(200):
+        table.append(record)
+    model = RecordTableModel(table)
+    model.set_count(200)
+    model.sort(column(model, 'text'))
+    texts = [table.text(row).lower() for row in view(model)]
+    assert texts == sorted(texts)
+    assert table.texts(0, 200) == [table.text(row) for row in range(200)]
+
+
+def test_members_ids_merged():
+    ids = array('q', [5, 1, 4])
+    model = MembersTableModel(ids)
+    model.set_count(3)
+    model.sort(0, Qt.SortOrder.DescendingOrder)
+    ids.extend([3, 6, 2])
+    model.set_count(6)
+    assert [ids[row] for row in view(model)] == [6, 5, 4, 3, 2, 1]
+
+
+@pytest.mark.parametrize('order', [Qt.SortOrder.AscendingOrder, Qt.SortOrder.DescendingOrder])
+def test_merge_keeps_persistent_indexes(order):
+    table = RecordTable('dom', '1')
+    rows = list(records(300))
+    for record in rows[:100]:
+        table.append(record)
+    model = RecordTableModel(table)
+    model.set_count(100)
+    model.sort(column(model, 'date'), order)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(1))
+    kept = [QPersistentModelIndex(model.index(row, 2)) for row in (0, 37, 99)]
+    sources = [model.source_row(index.row()) for index in kept]
+
+    for record in rows[100:]:
+        table.append(record)
+    model.set_count(300)
+    assert resets == []
+    assert model.rowCount() == 300
+    assert [model.source_row(index.row()) for index in kept] == sources
+    assert [index.column() for index in kept] == [2, 2, 2]